@@ -0,0 +1,79 @@
+"""Memory retained by the AST of a source file, `Node` tree vs `NodeArena`.
+
+For every input size the source is tokenized up front, then parsed into a `Node` tree and
+stored into a `NodeArena`. The memory still allocated once each structure is built is measured
+with `tracemalloc` and reported per line of source. Tokens are allocated before the
+measurement starts, so the figures for the tree only cover the nodes themselves.
+
+Usage:
+    python -m benchmarks.ast_memory [--max-size BYTES]
+"""
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from benchmarks.utils import format_size, generate_code, print_table
+from pyro_compiler.compiler.parsing import Node, NodeArena, Parser
+from pyro_compiler.compiler.tokens import Token, Tokenizer
+
+
+SIZES = [10 * 1024, 100 * 1024, 1024 * 1024]
+
+
+def build_tree(tokens: list[Token]) -> Node:
+    return Parser()(tokens=tokens)
+
+
+def build_arena(tree: Node) -> NodeArena:
+    return NodeArena(tree)
+
+
+def retained_memory(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(max_size: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for size in SIZES:
+        if size > max_size:
+            break
+        code = generate_code(size)
+        lines = code.count("\n")
+        tokens = Tokenizer()(code=code)
+        tree = build_tree(tokens)
+        as_tree = retained_memory(partial(build_tree, tokens))
+        as_arena = retained_memory(partial(build_arena, tree))
+        rows.append(
+            [
+                format_size(size),
+                str(lines),
+                str(len(NodeArena(tree))),
+                f"{as_tree / lines:.1f}",
+                f"{as_arena / lines:.1f}",
+            ]
+        )
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="AST memory benchmark")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1])
+    args = parser.parse_args()
+    print_table(
+        ["input", "lines", "nodes", "tree B/line", "arena B/line"],
+        run(max_size=args.max_size),
+    )
+
+
+if __name__ == "__main__":
+    main()
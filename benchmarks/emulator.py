@@ -0,0 +1,206 @@
+"""Interpreter of the instructions produced by `Generation`.
+
+Only the small part of x86-64 emitted by the compiler is supported. It lets the benchmarks count
+the instructions a program executes and the memory accesses they make, without assembling and
+linking the program.
+"""
+from dataclasses import dataclass, field
+
+from pyro_compiler.compiler.generation.utils import (
+    PHYSICAL_REGISTERS,
+    ASMInstruction,
+    CallInstruction,
+    ControllFlowInstruction,
+    DataMoveInstruction,
+    InstructionType,
+    LabelInstruction,
+    MathLogicInstruction,
+)
+
+
+MASK = (1 << 64) - 1
+
+BYTE_REGISTERS: dict[str, str] = {"al": "rax", "bl": "rbx", "cl": "rcx", "dl": "rdx"}
+
+CONDITIONS = {
+    InstructionType.JE: lambda a, b: a == b,
+    InstructionType.JZ: lambda a, b: a == b,
+    InstructionType.JNE: lambda a, b: a != b,
+    InstructionType.JG: lambda a, b: a > b,
+    InstructionType.JGE: lambda a, b: a >= b,
+    InstructionType.JL: lambda a, b: a < b,
+    InstructionType.JLE: lambda a, b: a <= b,
+    InstructionType.SETE: lambda a, b: a == b,
+    InstructionType.SETNE: lambda a, b: a != b,
+    InstructionType.SETG: lambda a, b: a > b,
+    InstructionType.SETGE: lambda a, b: a >= b,
+    InstructionType.SETL: lambda a, b: a < b,
+    InstructionType.SETLE: lambda a, b: a <= b,
+}
+
+
+def to_signed(value: int) -> int:
+    return value - (1 << 64) if value >> 63 else value
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of running a program.
+
+    Fields:
+        - `instructions[int]`: number of executed instructions, labels not included
+        - `memory_accesses[int]`: number of executed instructions reading or writing memory
+        - `multiplications[int]`: number of executed `mul` instructions
+        - `branches[int]`: number of executed comparisons and jumps
+        - `output[list[int]]`: values printed by the debug output
+
+    """
+
+    instructions: int = 0
+    memory_accesses: int = 0
+    multiplications: int = 0
+    branches: int = 0
+    output: list[int] = field(default_factory=list)
+
+
+class Emulator:
+    def __init__(self, instructions: list[ASMInstruction], max_steps: int = 100_000_000):
+        self.instructions = instructions
+        self.max_steps = max_steps
+        self.labels = {
+            instruction.label_name: i
+            for i, instruction in enumerate(instructions)
+            if isinstance(instruction, LabelInstruction)
+        }
+        self.registers: dict[str, int] = {}
+        self.memory: dict[int, int] = {}
+        self.flags: tuple[int, int] = (0, 0)
+
+    def __call__(self) -> ExecutionResult:
+        result = ExecutionResult()
+        self.registers = {"rsp": 1 << 40, "rbp": 0}
+        self.memory = {}
+        position = 0
+        while position < len(self.instructions):
+            instruction = self.instructions[position]
+            position += 1
+            if isinstance(instruction, LabelInstruction):
+                continue
+            result.instructions += 1
+            if result.instructions > self.max_steps:
+                raise Exception("Program takes too many steps")
+            if any("[" in operand for operand in self._operands(instruction)) and (
+                instruction.instruction_type != InstructionType.LEA
+            ):
+                result.memory_accesses += 1
+            if instruction.instruction_type == InstructionType.MUL:
+                result.multiplications += 1
+
+            if isinstance(instruction, CallInstruction):
+                if instruction.callee == "printf":
+                    result.output.append(self._read("rsi"))
+                    continue
+                break
+            if isinstance(instruction, ControllFlowInstruction):
+                result.branches += 1
+                jump = self._execute_control_flow(instruction)
+                if jump is not None:
+                    position = self.labels[jump]
+                continue
+            self._execute(instruction)
+        return result
+
+    def _operands(self, instruction: ASMInstruction) -> tuple[str, ...]:
+        if isinstance(instruction, DataMoveInstruction):
+            return (instruction.register,) + (
+                (instruction.data,) if instruction.data is not None else ()
+            )
+        if isinstance(instruction, MathLogicInstruction):
+            return instruction.registers
+        if isinstance(instruction, ControllFlowInstruction):
+            return instruction.data
+        return ()
+
+    def _address(self, operand: str) -> int:
+        expression = operand[operand.index("[") + 1 : operand.index("]")].replace(" ", "")
+        if "+" in expression:
+            register, offset = expression.split("+")
+            return self.registers.get(register, 0) + int(offset)
+        if "-" in expression:
+            register, offset = expression.split("-")
+            return self.registers.get(register, 0) - int(offset)
+        return self.registers.get(expression, 0)
+
+    def _read(self, operand: str) -> int:
+        if operand in BYTE_REGISTERS:
+            return self.registers.get(BYTE_REGISTERS[operand], 0) & 0xFF
+        if operand in PHYSICAL_REGISTERS:
+            return self.registers.get(operand, 0)
+        if "[" in operand:
+            return self.memory.get(self._address(operand), 0)
+        return int(operand, 0) & MASK
+
+    def _write(self, operand: str, value: int):
+        if operand in BYTE_REGISTERS:
+            register = BYTE_REGISTERS[operand]
+            self.registers[register] = (self.registers.get(register, 0) & ~0xFF) | (value & 0xFF)
+        elif "[" in operand:
+            self.memory[self._address(operand)] = value & MASK
+        else:
+            self.registers[operand] = value & MASK
+
+    def _execute_control_flow(self, instruction: ControllFlowInstruction) -> str | None:
+        if instruction.instruction_type == InstructionType.CMP:
+            self.flags = (self._read(instruction.data[0]), self._read(instruction.data[1]))
+            return None
+        if instruction.instruction_type == InstructionType.JMP:
+            return instruction.data[0]
+        left, right = self.flags
+        if CONDITIONS[instruction.instruction_type](to_signed(left), to_signed(right)):
+            return instruction.data[0]
+        return None
+
+    def _execute(self, instruction: ASMInstruction):
+        operands = self._operands(instruction)
+        match instruction.instruction_type:
+            case InstructionType.MOV:
+                self._write(operands[0], self._read(operands[1]))
+            case InstructionType.LEA:
+                self._write(operands[0], self._address(operands[1]))
+            case InstructionType.PUSH:
+                self.registers["rsp"] -= 8
+                self.memory[self.registers["rsp"]] = self._read(operands[0])
+            case InstructionType.POP:
+                self._write(operands[0], self.memory.get(self.registers["rsp"], 0))
+                self.registers["rsp"] += 8
+            case InstructionType.ADD:
+                self._write(operands[0], self._read(operands[0]) + self._read(operands[1]))
+            case InstructionType.SUB:
+                self._write(operands[0], self._read(operands[0]) - self._read(operands[1]))
+            case InstructionType.AND:
+                self._write(operands[0], self._read(operands[0]) & self._read(operands[1]))
+            case InstructionType.OR:
+                self._write(operands[0], self._read(operands[0]) | self._read(operands[1]))
+            case InstructionType.XOR:
+                self._write(operands[0], self._read(operands[0]) ^ self._read(operands[1]))
+            case InstructionType.NOT:
+                self._write(operands[0], ~self._read(operands[0]))
+            case InstructionType.SHL:
+                self._write(operands[0], self._read(operands[0]) << (self._read(operands[1]) & 63))
+            case InstructionType.SHR:
+                self._write(operands[0], self._read(operands[0]) >> (self._read(operands[1]) & 63))
+            case InstructionType.MUL:
+                product = self._read("rax") * self._read(operands[0])
+                self._write("rax", product)
+                self._write("rdx", product >> 64)
+            case InstructionType.DIV:
+                dividend = (self._read("rdx") << 64) | self._read("rax")
+                divisor = self._read(operands[0])
+                self._write("rax", dividend // divisor)
+                self._write("rdx", dividend % divisor)
+            case instruction_type if instruction_type in CONDITIONS:
+                left, right = self.flags
+                condition = CONDITIONS[instruction_type](to_signed(left), to_signed(right))
+                self._write(operands[0], int(condition))
+            case _:
+                raise Exception(f"Unsupported instruction {instruction.to_asm()}")
@@ -0,0 +1,75 @@
+"""Exponentiation benchmark.
+
+Raises a number to a few exponents in `benchmarks.emulator` with the loop of
+`code_tests/python_files/power.py`, with `**` over an exponent known only at run time and with
+`**` over a constant exponent, reporting the instructions and the multiplications executed and
+the size of the generated code. Constants are not propagated, for `**` not to be computed at
+compile time.
+
+Usage:
+    python -m benchmarks.exponentiation [--base BASE]
+"""
+from argparse import ArgumentParser
+
+from benchmarks.utils import compare_emulated, print_table
+
+
+EXPONENTS: tuple[int, ...] = (10, 31, 100, 1000)
+
+# the power is the first variable, printed first by the debug output
+PROGRAMS: dict[str, str] = {
+    "loop": (
+        "result = 0\n"
+        "target = {base}\n"
+        "pov = {exponent}\n"
+        "if pov == 0:\n"
+        "    target = 1\n"
+        "else:\n"
+        "    intermediary = 1\n"
+        "    while pov > 0:\n"
+        "        val = pov % 2\n"
+        "        if val == 0:\n"
+        "            number_of_muls = pov // 2\n"
+        "            pov = pov - number_of_muls\n"
+        "            while number_of_muls > 0:\n"
+        "                intermediary = intermediary * target\n"
+        "                number_of_muls = number_of_muls - 1\n"
+        "        else:\n"
+        "            intermediary = intermediary * target\n"
+        "            pov = pov - 1\n"
+        "    target = intermediary\n"
+        "result = target\n"
+    ),
+    "** variable": (
+        "result = 0\n" "target = {base}\n" "pov = {exponent}\n" "result = target ** pov\n"
+    ),
+    "** constant": ("result = 0\n" "target = {base}\n" "result = target ** {exponent}\n"),
+}
+
+METRICS = ["instructions", "multiplications", "code size"]
+
+
+def run(base: int) -> list[list[str]]:
+    programs = {
+        str(exponent): {
+            name: (program.format(base=base, exponent=exponent), {"constant_propagation": False})
+            for name, program in PROGRAMS.items()
+        }
+        for exponent in EXPONENTS
+    }
+    # the programs only share the power they compute
+    return compare_emulated(programs, METRICS, get_outcome=lambda result: result.output[0])
+
+
+def main():
+    parser = ArgumentParser(description="Exponentiation benchmark")
+    parser.add_argument("--base", type=int, default=3)
+    args = parser.parse_args()
+    print_table(
+        ["exponent", "program", *METRICS, "ratio"],
+        run(base=args.base),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Code generation scaling benchmark.
+
+Builds the intermediate representation of synthetic programs with roughly 1k, 10k and 100k IR
+commands and reports the time `Generation` spends per command. Tokenizing, parsing and building
+the IR are done up front and are not included in the timings. Every size repeats the sample
+program of `benchmarks.utils`, so each row generates the same mix of labels, scopes and
+arithmetic, only more of it.
+
+Usage:
+    python -m benchmarks.generation_scaling [--max-commands COUNT]
+"""
+from argparse import ArgumentParser
+from functools import partial
+
+from benchmarks.utils import generate_statements, measure, print_table
+from pyro_compiler.compiler.generation import Generation
+from pyro_compiler.compiler.parsing import Parser
+from pyro_compiler.compiler.representation import IRBuilder
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.tokens import Tokenizer
+
+
+COMMANDS = [1_000, 10_000, 100_000]
+
+
+def build_representation(code: str) -> Representation:
+    return IRBuilder()(ast=Parser()(tokens=Tokenizer()(code=code)))
+
+
+def generate(representation: Representation):
+    Generation()(representation=representation)
+
+
+def run(max_commands: int) -> list[list[str]]:
+    sample = build_representation(generate_statements(1_000))
+    commands_per_statement = len(sample.commands) / 1_000
+
+    rows: list[list[str]] = []
+    for count in COMMANDS:
+        if count > max_commands:
+            break
+        representation = build_representation(
+            generate_statements(int(count / commands_per_statement))
+        )
+        commands = len(representation.commands)
+        elapsed = measure(partial(generate, representation))
+        rows.append([str(commands), f"{elapsed:.3f}", f"{elapsed / commands * 1e6:.1f}"])
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Code generation scaling benchmark")
+    parser.add_argument("--max-commands", type=int, default=COMMANDS[-1])
+    args = parser.parse_args()
+    print_table(["commands", "s", "us/cmd"], run(max_commands=args.max_commands))
+
+
+if __name__ == "__main__":
+    main()
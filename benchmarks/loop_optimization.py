@@ -0,0 +1,87 @@
+"""Loop optimization benchmark.
+
+Compiles a few nested `while` kernels with several optimization pipelines and runs the generated
+code in `benchmarks.emulator`, reporting the instructions executed, the memory accesses among
+them and the time spent compiling. `O1` is the default pipeline, the others add the loop passes
+on top of it.
+
+Usage:
+    python -m benchmarks.loop_optimization [--iterations COUNT]
+"""
+from argparse import ArgumentParser
+
+from benchmarks.utils import compare_emulated, print_table
+
+
+KERNELS: dict[str, str] = {
+    "matrix": (
+        "rows = {n}\n"
+        "columns = 16\n"
+        "total = 0\n"
+        "i = 0\n"
+        "while i < rows:\n"
+        "    j = 0\n"
+        "    while j < columns:\n"
+        "        total += i * columns + j * (rows + columns) + rows // 4\n"
+        "        j += 1\n"
+        "    i += 1\n"
+    ),
+    "polynomial": (
+        "a, b, c = 3, 5, 7\n"
+        "scale = {n}\n"
+        "acc = 0\n"
+        "x = 0\n"
+        "while x < scale:\n"
+        "    y = 0\n"
+        "    while y < 8:\n"
+        "        acc += a * b * c + (a + b) * x + y\n"
+        "        acc = acc % 1000003\n"
+        "        y += 1\n"
+        "    x += 1\n"
+    ),
+    "stencil": (
+        "width = {n}\n"
+        "sum = 0\n"
+        "t = 0\n"
+        "while t < 4:\n"
+        "    left, right = t + 3, t * 9\n"
+        "    k = 1\n"
+        "    while k < width:\n"
+        "        sum += (left + right) * k - (left << 2) + (right ^ left)\n"
+        "        k += 1\n"
+        "    t += 1\n"
+    ),
+}
+
+PIPELINES: dict[str, list[str]] = {
+    "O1": ["sccp", "dse"],
+    "licm": ["sccp", "licm", "dse"],
+    "O2": ["sccp", "gvn", "licm", "dse"],
+}
+
+METRICS = ["instructions", "memory", "compile ms"]
+
+
+def run(iterations: int) -> list[list[str]]:
+    programs = {
+        name: {
+            pipeline: (kernel.format(n=iterations), {"passes": passes})
+            for pipeline, passes in PIPELINES.items()
+        }
+        for name, kernel in KERNELS.items()
+    }
+    return compare_emulated(programs, METRICS)
+
+
+def main():
+    parser = ArgumentParser(description="Loop optimization benchmark")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    print_table(
+        ["kernel", "pipeline", *METRICS, "ratio"],
+        run(iterations=args.iterations),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Loop unrolling benchmark.
+
+Runs counted loops in `benchmarks.emulator` after the `O2` pipeline, with and without unrolling
+them by a few factors, reporting the instructions executed, the comparisons and jumps among them
+and the size of the generated code. `tile` has an inner loop short enough to be unrolled fully,
+the others have to keep a loop running the iterations left over.
+
+Usage:
+    python -m benchmarks.loop_unrolling [--iterations COUNT] [--budget COMMANDS]
+"""
+from argparse import ArgumentParser
+
+from benchmarks.utils import compare_emulated, print_table
+from pyro_compiler.compiler.optimization import DEFAULT_UNROLL_BUDGET, OptimizationLevel
+
+
+KERNELS: dict[str, str] = {
+    "sum": ("n = {n}\n" "total = 0\n" "i = 0\n" "while i < n:\n" "    total += i\n" "    i += 1\n"),
+    "checksum": (
+        "n = {n}\n"
+        "hash = 7\n"
+        "i = 0\n"
+        "while i < n:\n"
+        "    hash = (hash * 31 + i) % 1000003\n"
+        "    i += 1\n"
+    ),
+    "strided": (
+        "n = {n}\n"
+        "total = 0\n"
+        "k = 3\n"
+        "while k < n * 3:\n"
+        "    if k % 2 == 0:\n"
+        "        total += k\n"
+        "    k += 3\n"
+    ),
+    "tile": (
+        "n = {n}\n"
+        "total = 0\n"
+        "i = 0\n"
+        "while i < n:\n"
+        "    j = 0\n"
+        "    while j < 4:\n"
+        "        total += i * 4 + j\n"
+        "        j += 1\n"
+        "    i += 1\n"
+    ),
+}
+
+# unrolling factors compared, None standing for not unrolling
+FACTORS: dict[str, int | None] = {"O2": None, "x2": 2, "x4": 4, "x8": 8}
+
+METRICS = ["instructions", "branches", "code size"]
+
+
+def run(iterations: int, budget: int) -> list[list[str]]:
+    programs = {
+        name: {
+            pipeline: (
+                kernel.format(n=iterations),
+                {
+                    "optimization_level": OptimizationLevel.O2,
+                    "unroll_factor": factor,
+                    "unroll_budget": budget,
+                },
+            )
+            for pipeline, factor in FACTORS.items()
+        }
+        for name, kernel in KERNELS.items()
+    }
+    return compare_emulated(programs, METRICS)
+
+
+def main():
+    parser = ArgumentParser(description="Loop unrolling benchmark")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--budget", type=int, default=DEFAULT_UNROLL_BUDGET)
+    args = parser.parse_args()
+    print_table(
+        ["kernel", "pipeline", *METRICS, "ratio"],
+        run(iterations=args.iterations, budget=args.budget),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Parser scaling benchmark.
+
+Parses synthetic programs of 1k, 10k and 100k statements and reports the time spent per
+statement for every way the parser can be fed: a materialized `list[Token]`, the lazy
+`Tokenizer.tokenize` generator and a `TokenStore`. Tokenization is done up front and is not
+included in the timings, except for the streamed column, where the two are interleaved.
+
+Usage:
+    python -m benchmarks.parser_scaling [--max-statements COUNT]
+"""
+from argparse import ArgumentParser
+from functools import partial
+
+from benchmarks.utils import generate_statements, measure, print_table
+from pyro_compiler.compiler.parsing import Parser
+from pyro_compiler.compiler.tokens import Token, Tokenizer, TokenStore
+
+
+STATEMENTS = [1_000, 10_000, 100_000]
+
+
+def parse_list(tokens: list[Token]):
+    Parser()(tokens=tokens)
+
+
+def parse_streamed(code: str):
+    Parser()(tokens=Tokenizer().tokenize(code=code))
+
+
+def parse_store(store: TokenStore):
+    Parser()(tokens=store)
+
+
+def run(max_statements: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for count in STATEMENTS:
+        if count > max_statements:
+            break
+        code = generate_statements(count)
+        tokens = Tokenizer()(code=code)
+        store = TokenStore(tokens)
+        row = [str(count), str(len(tokens))]
+        for func in (
+            partial(parse_list, tokens),
+            partial(parse_streamed, code),
+            partial(parse_store, store),
+        ):
+            elapsed = measure(func)
+            row += [f"{elapsed:.3f}", f"{elapsed / count * 1e6:.1f}"]
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Parser scaling benchmark")
+    parser.add_argument("--max-statements", type=int, default=STATEMENTS[-1])
+    args = parser.parse_args()
+    header = ["stmts", "tokens"]
+    for name in ("list", "stream", "store"):
+        header += [f"{name} s", f"{name} us/stmt"]
+    print_table(header, run(max_statements=args.max_statements))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Register allocation benchmark.
+
+Compiles a few numeric kernels with every `RegisterAllocation` mode and runs the generated code
+in `benchmarks.emulator`, reporting the instructions executed, the memory accesses among them
+and the time spent compiling. `none` is the stack only code every variable used to be compiled
+to, `linear` is the linear scan allocator and `graph` the graph coloring one.
+
+Usage:
+    python -m benchmarks.register_allocation [--iterations COUNT]
+"""
+from argparse import ArgumentParser
+from functools import partial
+
+from benchmarks.emulator import Emulator, ExecutionResult
+from benchmarks.utils import measure, print_table
+from pyro_compiler.compiler.compiler import Compiler
+from pyro_compiler.compiler.generation.allocation import RegisterAllocation
+
+
+KERNELS: dict[str, str] = {
+    "fibonacci": (
+        "a, b = 0, 1\n"
+        "count = 0\n"
+        "while count < {n}:\n"
+        "    c = a + b\n"
+        "    a, b = b, c\n"
+        "    count += 1\n"
+    ),
+    "collatz": (
+        "steps = 0\n"
+        "i = 1\n"
+        "while i < {n}:\n"
+        "    x = i\n"
+        "    while x != 1:\n"
+        "        if x % 2 == 0:\n"
+        "            x = x // 2\n"
+        "        else:\n"
+        "            x = x * 3 + 1\n"
+        "        steps += 1\n"
+        "    i += 1\n"
+    ),
+    "pressure": (
+        "a, b, c, d = 1, 2, 3, 4\n"
+        "e, f, g, h = 5, 6, 7, 8\n"
+        "i, j, k, l = 9, 10, 11, 12\n"
+        "count = 0\n"
+        "while count < {n}:\n"
+        "    a = a + b * c\n"
+        "    d = d ^ e + f\n"
+        "    g = g + h - i\n"
+        "    j = j & k | l\n"
+        "    b, e, h, k = c + 1, f + 1, i + 1, l + 1\n"
+        "    count += 1\n"
+        "total = a + b + c + d + e + f + g + h + i + j + k + l\n"
+    ),
+}
+
+
+def execute(code: str, register_allocation: RegisterAllocation) -> ExecutionResult:
+    compiler = Compiler(register_allocation=register_allocation)
+    compiler(code)
+    return Emulator(compiler.generation.code_chunks)()
+
+
+def run(iterations: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for name, kernel in KERNELS.items():
+        code = kernel.format(n=iterations)
+        baseline = execute(code, RegisterAllocation.NONE)
+        for mode in RegisterAllocation:
+            result = execute(code, mode)
+            elapsed = measure(partial(Compiler(register_allocation=mode), code), repeats=3)
+            rows.append(
+                [
+                    name,
+                    mode.value,
+                    str(result.instructions),
+                    str(result.memory_accesses),
+                    f"{result.instructions / baseline.instructions:.2f}",
+                    f"{elapsed * 1e3:.2f}",
+                ]
+            )
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Register allocation benchmark")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    print_table(
+        ["kernel", "mode", "instructions", "memory", "ratio", "compile ms"],
+        run(iterations=args.iterations),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Peak memory of tokenizing and parsing, materialized token list vs streamed tokens.
+
+For every input size the source is parsed twice: once from the full `list[Token]` returned by
+`Tokenizer.__call__` and once from the lazy `Tokenizer.tokenize` generator. Peak memory is
+measured with `tracemalloc` and does not include the source string itself.
+
+Usage:
+    python -m benchmarks.streaming_memory [--max-size BYTES]
+"""
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from benchmarks.utils import format_size, generate_code, print_table
+from pyro_compiler.compiler.parsing import Parser
+from pyro_compiler.compiler.tokens import Tokenizer
+
+
+SIZES = [10 * 1024, 100 * 1024, 1024 * 1024]
+
+
+def parse_materialized(code: str):
+    Parser()(tokens=Tokenizer()(code=code))
+
+
+def parse_streamed(code: str):
+    Parser()(tokens=Tokenizer().tokenize(code=code))
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(max_size: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for size in SIZES:
+        if size > max_size:
+            break
+        code = generate_code(size)
+        materialized = peak_memory(partial(parse_materialized, code))
+        streamed = peak_memory(partial(parse_streamed, code))
+        rows.append(
+            [
+                format_size(size),
+                f"{materialized / 2**20:.1f}",
+                f"{streamed / 2**20:.1f}",
+                f"{1 - streamed / materialized:.0%}",
+            ]
+        )
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Token streaming memory benchmark")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1])
+    args = parser.parse_args()
+    print_table(["input", "list MB", "stream MB", "saved"], run(max_size=args.max_size))
+
+
+if __name__ == "__main__":
+    main()
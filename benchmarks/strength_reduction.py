@@ -0,0 +1,86 @@
+"""Strength reduction benchmark.
+
+Runs counted loops multiplying their counters in `benchmarks.emulator`, with and without the
+`lsr` pass, reporting the instructions and the multiplications executed. `no lsr` runs every
+other pass of `O2`, for the difference to only come from replacing the multiplications.
+
+Usage:
+    python -m benchmarks.strength_reduction [--iterations COUNT]
+"""
+from argparse import ArgumentParser
+
+from benchmarks.utils import compare_emulated, print_table
+
+
+KERNELS: dict[str, str] = {
+    "scale": (
+        "n = {n}\n" "total = 0\n" "i = 0\n" "while i < n:\n" "    total += i * 12\n" "    i += 1\n"
+    ),
+    "rows": (
+        "height = {n}\n"
+        "width = 24\n"
+        "total = 0\n"
+        "row = 0\n"
+        "while row < height:\n"
+        "    column = 0\n"
+        "    while column < width:\n"
+        "        total += row * width + column * 4\n"
+        "        column += 1\n"
+        "    row += 1\n"
+    ),
+    "stride": (
+        "n = {n}\n"
+        "total = 0\n"
+        "k = 0\n"
+        "while k < n * 4:\n"
+        "    total += k * 5 - k * 3\n"
+        "    k += 3\n"
+    ),
+    "countdown": (
+        "k = {n}\n" "total = 0\n" "while k > 0:\n" "    total += k * 7\n" "    k = k - 1\n"
+    ),
+    "triangle": (
+        "n = {n}\n"
+        "total = 0\n"
+        "i = 0\n"
+        "while i < n:\n"
+        "    j = 0\n"
+        "    while j < i:\n"
+        "        total += j * 3\n"
+        "        j += 1\n"
+        "    i += 1\n"
+    ),
+}
+
+PIPELINES: dict[str, list[str]] = {
+    "O1": ["sccp", "dse"],
+    "no lsr": ["sccp", "gvn", "licm", "dse"],
+    "O2": ["sccp", "gvn", "licm", "lsr", "dse"],
+}
+
+METRICS = ["instructions", "multiplications", "compile ms"]
+
+
+def run(iterations: int) -> list[list[str]]:
+    programs = {
+        name: {
+            pipeline: (kernel.format(n=iterations), {"passes": passes})
+            for pipeline, passes in PIPELINES.items()
+        }
+        for name, kernel in KERNELS.items()
+    }
+    return compare_emulated(programs, METRICS)
+
+
+def main():
+    parser = ArgumentParser(description="Strength reduction benchmark")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    print_table(
+        ["kernel", "pipeline", *METRICS, "ratio"],
+        run(iterations=args.iterations),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Memory retained by the tokens of a source file, `list[Token]` vs `TokenStore`.
+
+For every input size the source is tokenized once into the list returned by
+`Tokenizer.__call__` and once into a `TokenStore`. The memory still allocated once the tokens
+are built (not the peak during tokenization) is measured with `tracemalloc` and reported per
+token.
+
+Usage:
+    python -m benchmarks.token_memory [--max-size BYTES]
+"""
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from benchmarks.utils import format_size, generate_code, print_table
+from pyro_compiler.compiler.tokens import Tokenizer, TokenStore
+
+
+SIZES = [10 * 1024, 100 * 1024, 1024 * 1024]
+
+
+def build_list(code: str) -> list:
+    return Tokenizer()(code=code)
+
+
+def build_store(code: str) -> TokenStore:
+    return TokenStore(Tokenizer().tokenize(code=code))
+
+
+def retained_memory(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(max_size: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for size in SIZES:
+        if size > max_size:
+            break
+        code = generate_code(size)
+        token_count = len(build_store(code))
+        as_list = retained_memory(partial(build_list, code))
+        as_store = retained_memory(partial(build_store, code))
+        rows.append(
+            [
+                format_size(size),
+                str(token_count),
+                f"{as_list / token_count:.1f}",
+                f"{as_store / token_count:.1f}",
+                f"{as_list / as_store:.1f}x",
+            ]
+        )
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Token storage memory benchmark")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1])
+    args = parser.parse_args()
+    print_table(
+        ["input", "tokens", "list B/token", "store B/token", "ratio"],
+        run(max_size=args.max_size),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Tokenizer scaling benchmark.
+
+Lexes synthetic programs from 1KB up to 10MB with every lexing engine and reports the time
+spent per byte of input. Both engines lex the same repeated sample program, and the `tokens`
+column counts the tokens the handwritten one produces from it.
+
+Usage:
+    python -m benchmarks.tokenizer_scaling [--max-size BYTES]
+"""
+from argparse import ArgumentParser
+
+from benchmarks.utils import format_size, generate_code, measure, print_table
+from pyro_compiler.compiler.tokens import RegexTokenizer, Tokenizer
+
+
+SIZES = [1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024]
+ENGINES: dict[str, type[Tokenizer]] = {"handwritten": Tokenizer, "regex": RegexTokenizer}
+
+
+def run(max_size: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for size in SIZES:
+        if size > max_size:
+            break
+        code = generate_code(size)
+        row = [format_size(size), str(len(Tokenizer()(code=code)))]
+        for engine in ENGINES.values():
+            elapsed = measure(lambda: engine()(code=code))  # noqa B023
+            row += [f"{elapsed:.3f}", f"{elapsed / len(code) * 1e9:.1f}"]
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Tokenizer scaling benchmark")
+    parser.add_argument("--max-size", type=int, default=SIZES[-1])
+    args = parser.parse_args()
+    header = ["input", "tokens"]
+    for name in ENGINES:
+        header += [f"{name} s", f"{name} ns/byte"]
+    print_table(header, run(max_size=args.max_size))
+
+
+if __name__ == "__main__":
+    main()
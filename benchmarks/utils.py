@@ -0,0 +1,128 @@
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from benchmarks.emulator import Emulator, ExecutionResult
+from pyro_compiler.compiler.compiler import Compiler
+
+
+SAMPLE_PROGRAM = (
+    "a, b = 0, 1\n"
+    "count = 0\n"
+    "while a <= 10:\n"
+    "    c = a + b\n"
+    "    a, b = b, c\n"
+    "    count += 1\n"
+    "x = (2 + 2) * 2\n"
+    "if x >= 8:\n"
+    "    x = x // 2 - 1\n"
+    "elif x != 3:\n"
+    "    x <<= 1\n"
+    "else:\n"
+    "    x = x % 3\n"
+)
+
+
+def generate_code(size: int, sample: str = SAMPLE_PROGRAM) -> str:
+    """Repeat `sample` until the resulting source is at least `size` bytes long"""
+    repeats = size // len(sample) + 1
+    return sample * repeats
+
+
+def generate_statements(count: int, sample: str = SAMPLE_PROGRAM) -> str:
+    """Repeat `sample` until the resulting source has at least `count` statement lines"""
+    repeats = -(-count // sample.count("\n"))
+    return sample * repeats
+
+
+def measure(func: Callable[[], Any], repeats: int = 1) -> float:
+    """Best wall time of `repeats` runs of `func`, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size}{unit}"
+        size //= 1024
+    return f"{size}GB"
+
+
+def print_table(header: list[str], rows: list[list[str]]) -> None:
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header, *rows]:
+        print("  ".join(str(cell).rjust(width) for cell, width in zip(row, widths)))  # noqa T201
+
+
+@dataclass
+class EmulatedRun:
+    """Program compiled in debug mode and run in `benchmarks.emulator`.
+
+    Fields:
+        - `result[ExecutionResult]`: what running the program did
+        - `code_size[int]`: number of generated instructions, labels not included
+        - `compile_time[float]`: best time spent compiling the program without debug output, in
+          seconds
+
+    """
+
+    result: ExecutionResult
+    code_size: int
+    compile_time: float
+
+
+# columns `compare_emulated` can report, by their names
+EMULATED_METRICS: dict[str, Callable[[EmulatedRun], str]] = {
+    "instructions": lambda run: str(run.result.instructions),
+    "memory": lambda run: str(run.result.memory_accesses),
+    "multiplications": lambda run: str(run.result.multiplications),
+    "branches": lambda run: str(run.result.branches),
+    "code size": lambda run: str(run.code_size),
+    "compile ms": lambda run: f"{run.compile_time * 1e3:.2f}",
+}
+
+
+def emulate(code: str, options: dict[str, Any]) -> EmulatedRun:
+    """Compile the code with the given `Compiler` arguments and run it"""
+    compiler = Compiler(debug=True, **options)
+    compiler(code)
+    # compilers are not reused, every compilation gets a new one
+    compile_time = measure(lambda: Compiler(**options)(code), repeats=3)
+    return EmulatedRun(
+        result=Emulator(compiler.generation.code_chunks)(),
+        code_size=compiler.generation.instruction_count,
+        compile_time=compile_time,
+    )
+
+
+def compare_emulated(
+    programs: dict[str, dict[str, tuple[str, dict[str, Any]]]],
+    metrics: list[str],
+    get_outcome: Callable[[ExecutionResult], Any] = lambda result: result.output,
+) -> list[list[str]]:
+    """Table rows of the `metrics` of every variant of every program, and the ratio of the
+    instructions they execute to the ones the first variant does
+
+    Variants are given by their names, as the code and the `Compiler` arguments to run, and every
+    one of them has to reach the outcome the first variant does.
+    """
+    rows: list[list[str]] = []
+    for name, variants in programs.items():
+        baseline: EmulatedRun | None = None
+        for variant, (code, options) in variants.items():
+            run = emulate(code, options)
+            baseline = baseline or run
+            if get_outcome(run.result) != get_outcome(baseline.result):
+                raise Exception(f"{variant} changes the outcome of {name}")
+            rows.append(
+                [name, variant]
+                + [EMULATED_METRICS[metric](run) for metric in metrics]
+                + [f"{run.result.instructions / baseline.result.instructions:.2f}"]
+            )
+    return rows
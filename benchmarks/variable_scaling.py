@@ -0,0 +1,58 @@
+"""Stack variable lookup benchmark.
+
+Generates programs that keep 1k, 2k, 5k and 10k variables alive at once, every one of them
+read back once after all are declared, and reports the time `Generation` spends per variable.
+Tokenizing, parsing and building the IR are done up front and are not included in the timings.
+
+Usage:
+    python -m benchmarks.variable_scaling [--max-variables COUNT]
+"""
+from argparse import ArgumentParser
+from functools import partial
+
+from benchmarks.utils import measure, print_table
+from pyro_compiler.compiler.generation import Generation
+from pyro_compiler.compiler.parsing import Parser
+from pyro_compiler.compiler.representation import IRBuilder
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.tokens import Tokenizer
+
+
+VARIABLES = [1_000, 2_000, 5_000, 10_000]
+
+
+def generate_variables(count: int) -> str:
+    """Source declaring `count` variables and then reading every one of them"""
+    declarations = "".join(f"v{i} = {i}\n" for i in range(count))
+    reads = "".join(f"total = v{i} + 1\n" for i in range(count))
+    return declarations + reads
+
+
+def build_representation(code: str) -> Representation:
+    return IRBuilder()(ast=Parser()(tokens=Tokenizer()(code=code)))
+
+
+def generate(representation: Representation):
+    Generation()(representation=representation)
+
+
+def run(max_variables: int) -> list[list[str]]:
+    rows: list[list[str]] = []
+    for count in VARIABLES:
+        if count > max_variables:
+            break
+        representation = build_representation(generate_variables(count))
+        elapsed = measure(partial(generate, representation))
+        rows.append([str(count), f"{elapsed:.3f}", f"{elapsed / count * 1e6:.1f}"])
+    return rows
+
+
+def main():
+    parser = ArgumentParser(description="Stack variable lookup benchmark")
+    parser.add_argument("--max-variables", type=int, default=VARIABLES[-1])
+    args = parser.parse_args()
+    print_table(["variables", "s", "us/var"], run(max_variables=args.max_variables))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,56 @@
 from pyro_compiler import CLI, Compiler
 from pyro_compiler.cli.args import MAIN_CLI_ARGS
-from pyro_compiler.cli.commands import handle_input_file, handle_output_file
+from pyro_compiler.cli.commands import handle_input_file, handle_output_file, handle_stats_file
+from pyro_compiler.compiler.generation.allocation import RegisterAllocation
+from pyro_compiler.compiler.optimization import DEFAULT_UNROLL_BUDGET, OptimizationLevel
+from pyro_compiler.compiler.tokens import LexerMode
 
 
 def main():
     cli = CLI(arguments=MAIN_CLI_ARGS)
     args = cli()
     debug = args.get("debug", False)
+    lexer = LexerMode(args.get("lexer", LexerMode.HANDWRITTEN.value))
+    register_allocation = RegisterAllocation(
+        args.get("register_allocation", RegisterAllocation.LINEAR_SCAN.value)
+    )
+    dead_store_elimination = args.get("dead_store_elimination", True)
+    constant_propagation = args.get("constant_propagation", True)
+    optimization_level = OptimizationLevel(
+        args.get("optimization_level", OptimizationLevel.O1.value)
+    )
+    passes = args.get("passes")
+    dump_ir_after = args.get("dump_ir_after")
+    unroll_factor = args.get("unroll_factor")
+    unroll_budget = args.get("unroll_budget", DEFAULT_UNROLL_BUDGET)
+    error_limit = args.get("error_limit")
+    stats_json = args.get("stats_json")
+    time_passes = args.get("time_passes", False) or stats_json is not None
+    mem_report = args.get("mem_report", False)
 
     code = handle_input_file(src=args["src"])
-    compiler = Compiler(debug=debug)
+    compiler = Compiler(
+        debug=debug,
+        lexer=lexer,
+        error_limit=error_limit,
+        time_passes=time_passes,
+        mem_report=mem_report,
+        register_allocation=register_allocation,
+        dead_store_elimination=dead_store_elimination,
+        constant_propagation=constant_propagation,
+        optimization_level=optimization_level,
+        passes=passes,
+        dump_ir_after=dump_ir_after,
+        unroll_factor=unroll_factor,
+        unroll_budget=unroll_budget,
+    )
     asm = compiler(code=code)
+    for dump in compiler.pass_manager.dumps:
+        print(dump)  # noqa T201
+    if compiler.stats is not None:
+        print(compiler.stats.report())  # noqa T201
+        if stats_json is not None:
+            handle_stats_file(dst=stats_json, stats=compiler.stats.to_json())
     if compiler.registry.is_blocking_compilation:
         print(asm)  # noqa T201
         return
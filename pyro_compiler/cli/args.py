@@ -1,4 +1,31 @@
-from pyro_compiler.cli.utils import CLIArg
+from argparse import ArgumentTypeError
+from collections.abc import Callable
+
+from pyro_compiler.cli.utils import CLIArg, positive_int
+from pyro_compiler.compiler.generation.allocation import RegisterAllocation
+from pyro_compiler.compiler.optimization import (
+    AVAILABLE_PASSES,
+    DEFAULT_UNROLL_BUDGET,
+    DEFAULT_UNROLL_FACTOR,
+    DUMP_NAMES,
+    OptimizationLevel,
+)
+from pyro_compiler.compiler.tokens import LexerMode
+
+
+def get_pass_names_type(names: list[str]) -> Callable[[str], list[str]]:
+    """Argument type splitting comma separated pass names, rejecting the ones not among `names`"""
+
+    def parse_pass_names(value: str) -> list[str]:
+        passes = [name for name in value.split(",") if name]
+        unknown = [name for name in passes if name not in names]
+        if unknown:
+            raise ArgumentTypeError(
+                f"unknown passes {', '.join(unknown)}, available: {', '.join(names)}"
+            )
+        return passes
+
+    return parse_pass_names
 
 
 MAIN_CLI_ARGS = [
@@ -21,4 +48,109 @@ MAIN_CLI_ARGS = [
         default=False,
         dest="debug",
     ),
+    CLIArg(
+        name_or_flags="--lexer",
+        help="Lexing engine used to split the source code into tokens",
+        choices=[mode.value for mode in LexerMode],
+        default=LexerMode.HANDWRITTEN.value,
+        dest="lexer",
+    ),
+    CLIArg(
+        name_or_flags="--regalloc",
+        help=(
+            "Register allocator keeping variables and temporaries in registers: linear scan, "
+            "graph coloring (slower to compile, fewer moves and spills) or none"
+        ),
+        choices=[mode.value for mode in RegisterAllocation],
+        default=RegisterAllocation.LINEAR_SCAN.value,
+        dest="register_allocation",
+    ),
+    CLIArg(
+        name_or_flags="-O",
+        help="Optimization level: 0 runs no passes over the representation, 1 and 2 run more of them",
+        choices=[level.value for level in OptimizationLevel],
+        default=OptimizationLevel.O1.value,
+        dest="optimization_level",
+    ),
+    CLIArg(
+        name_or_flags="--passes",
+        arg_type=get_pass_names_type(list(AVAILABLE_PASSES)),
+        help=(
+            "Comma separated passes to run over the representation instead of the ones of the "
+            f"optimization level, out of: {', '.join(AVAILABLE_PASSES)}"
+        ),
+        metavar="<pass,...>",
+        dest="passes",
+    ),
+    CLIArg(
+        name_or_flags="--unroll",
+        arg_type=positive_int,
+        help=(
+            "Unroll counted loops, repeating the bodies of the ones whose trip count is not known "
+            f"this many times (the default factor is {DEFAULT_UNROLL_FACTOR}). Loops whose trip "
+            "count is known are unrolled fully whatever the factor, 1 unrolling only those"
+        ),
+        metavar="<factor>",
+        dest="unroll_factor",
+    ),
+    CLIArg(
+        name_or_flags="--unroll-budget",
+        arg_type=positive_int,
+        help="Number of commands the copies of an unrolled loop body may take",
+        default=DEFAULT_UNROLL_BUDGET,
+        metavar="<commands>",
+        dest="unroll_budget",
+    ),
+    CLIArg(
+        name_or_flags="--dump-ir-after",
+        arg_type=get_pass_names_type([*DUMP_NAMES, *AVAILABLE_PASSES]),
+        help=(
+            "Comma separated passes to print the representation after, 'ir' for the one "
+            "before any pass and 'all' for every pass"
+        ),
+        metavar="<pass,...>",
+        dest="dump_ir_after",
+    ),
+    CLIArg(
+        name_or_flags="--no-dse",
+        help="Keep the stores to variables that are overwritten before being read",
+        action="store_false",
+        default=True,
+        dest="dead_store_elimination",
+    ),
+    CLIArg(
+        name_or_flags="--no-sccp",
+        help="Keep computing constant expressions and branches at run time",
+        action="store_false",
+        default=True,
+        dest="constant_propagation",
+    ),
+    CLIArg(
+        name_or_flags="--error-limit",
+        arg_type=int,
+        help="Stop collecting compilation messages after this many of them",
+        metavar="<count>",
+        dest="error_limit",
+    ),
+    CLIArg(
+        name_or_flags="--time-passes",
+        help="Report wall and CPU time spent in every compilation phase",
+        action="store_true",
+        default=False,
+        dest="time_passes",
+    ),
+    CLIArg(
+        name_or_flags="--mem-report",
+        help="Report peak memory used by every compilation phase (slows compilation down)",
+        action="store_true",
+        default=False,
+        dest="mem_report",
+    ),
+    CLIArg(
+        name_or_flags="--stats-json",
+        arg_type=str,
+        help="Write the compilation phase statistics to this file as JSON",
+        metavar="<filename.json>",
+        dest="stats_json",
+    ),
 ]
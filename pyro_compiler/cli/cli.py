@@ -21,6 +21,7 @@ class CLI:
         try:
             namespace = self.parser.parse_args()
             return vars(namespace)
-        except SystemExit:
-            self.parser.print_help()
-            return {}
+        except SystemExit as exit:
+            if exit.code:
+                self.parser.print_help()
+            raise
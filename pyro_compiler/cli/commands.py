@@ -7,6 +7,11 @@ def handle_input_file(src: str) -> str:
         return data
 
 
+def handle_stats_file(dst: str, stats: str) -> None:
+    with open(dst, "w") as f:
+        f.write(stats)
+
+
 def handle_output_file(dst: str, asm: str, debug: bool = False) -> None:
     with open(f"{dst}.asm", "w") as f:
         f.write(asm)
@@ -1,3 +1,5 @@
+from argparse import ArgumentTypeError
+from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any
 
@@ -7,12 +9,13 @@ class CLIArg:
     name_or_flags: str | list[str]
     help: str | None = None
     metavar: str | None = None
-    arg_type: type | None = None
+    arg_type: Callable[[str], Any] | None = None
     dest: str | None = None
     required: bool | None = None
     default: Any | None = None
     nargs: int | None = None
     action: str | None = None
+    choices: list[str] | None = None
 
     def to_args(self):
         result = {}
@@ -25,3 +28,14 @@ class CLIArg:
                 result[k] = v
 
         return result
+
+
+def positive_int(value: str) -> int:
+    """Argument type for the integers that have to be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"{value} is not an integer") from None
+    if number < 1:
+        raise ArgumentTypeError(f"{value} is not a positive integer")
+    return number
@@ -1,25 +1,125 @@
 from pyro_compiler.compiler.errors.message_registry import MessageRegistry
 from pyro_compiler.compiler.generation import Generation
+from pyro_compiler.compiler.generation.allocation import (
+    CALLEE_SAVED_REGISTERS,
+    GENERAL_PURPOSE_REGISTERS,
+    Allocation,
+    GraphColoringAllocator,
+    LinearScanAllocator,
+    RegisterAllocation,
+    RegisterAllocator,
+)
+from pyro_compiler.compiler.optimization import (
+    DEFAULT_UNROLL_BUDGET,
+    OPTIMIZATION_PIPELINES,
+    OptimizationLevel,
+    PassManager,
+)
 from pyro_compiler.compiler.parsing import Parser
 from pyro_compiler.compiler.representation import IRBuilder
-from pyro_compiler.compiler.tokens import Tokenizer
+from pyro_compiler.compiler.stats import CompilationStats
+from pyro_compiler.compiler.tokens import LexerMode, RegexTokenizer, Tokenizer
 
 
 class Compiler:
-    def __init__(self, debug: bool = False):
-        self.registry = MessageRegistry(code="")
+    def __init__(
+        self,
+        debug: bool = False,
+        lexer: LexerMode = LexerMode.HANDWRITTEN,
+        error_limit: int | None = None,
+        time_passes: bool = False,
+        mem_report: bool = False,
+        register_allocation: RegisterAllocation = RegisterAllocation.LINEAR_SCAN,
+        dead_store_elimination: bool = True,
+        constant_propagation: bool = True,
+        optimization_level: OptimizationLevel = OptimizationLevel.O1,
+        passes: list[str] | None = None,
+        dump_ir_after: list[str] | None = None,
+        unroll_factor: int | None = None,
+        unroll_budget: int = DEFAULT_UNROLL_BUDGET,
+    ):
+        self.registry = MessageRegistry(code="", error_limit=error_limit)
+        self.stats: CompilationStats | None = None
+        if time_passes or mem_report:
+            self.stats = CompilationStats(track_memory=mem_report)
 
-        self.tokenizer = Tokenizer(message_registry=self.registry)
+        self.tokenizer: Tokenizer
+        if lexer == LexerMode.REGEX:
+            self.tokenizer = RegexTokenizer(message_registry=self.registry)
+        else:
+            self.tokenizer = Tokenizer(message_registry=self.registry)
         self.parser = Parser(message_registry=self.registry)
         self.representation = IRBuilder(registry=self.registry)
+        if passes is None:
+            passes = list(OPTIMIZATION_PIPELINES[optimization_level])
+        disabled_passes = {
+            name
+            for name, is_enabled in (
+                ("sccp", constant_propagation),
+                ("dse", dead_store_elimination),
+            )
+            if not is_enabled
+        }
+        pass_options: dict[str, dict[str, object]] = {"unroll": {"budget": unroll_budget}}
+        if unroll_factor is not None:
+            pass_options["unroll"]["factor"] = unroll_factor
+            if "unroll" not in passes:
+                # unrolled after the passes taking values out of loops, the stores left to dse
+                position = passes.index("dse") if "dse" in passes else len(passes)
+                passes = passes[:position] + ["unroll"] + passes[position:]
+        self.pass_manager = PassManager(
+            passes=[name for name in passes if name not in disabled_passes],
+            stats=self.stats,
+            dump_after=dump_ir_after,
+            pass_options=pass_options,
+        )
         self.generation = Generation(debug=debug)
+        self.allocator: RegisterAllocator | None = None
+        # printf calls made in debug mode clobber caller saved registers
+        registers = CALLEE_SAVED_REGISTERS if debug else GENERAL_PURPOSE_REGISTERS
+        if register_allocation == RegisterAllocation.LINEAR_SCAN:
+            self.allocator = LinearScanAllocator(registers=registers, keep_main_variables=debug)
+        elif register_allocation == RegisterAllocation.GRAPH_COLORING:
+            self.allocator = GraphColoringAllocator(registers=registers, keep_main_variables=debug)
 
     def __call__(self, code: str) -> str:
         self.registry.code = code
-        tokens = self.tokenizer(code=code)
+        if self.stats is not None:
+            return self._compile_with_stats(code=code, stats=self.stats)
+        tokens = self.tokenizer.tokenize(code=code)
         ast = self.parser(tokens=tokens)
         int_rep = self.representation(ast=ast)
         if self.registry.is_blocking_compilation:
             return self.registry.display_messages()
-        asm = self.generation(representation=int_rep)
+        self.pass_manager(representation=int_rep)
+        allocation: Allocation | None = None
+        if self.allocator is not None:
+            allocation = self.allocator(representation=int_rep)
+        asm = self.generation(representation=int_rep, allocation=allocation)
+        return asm
+
+    def _compile_with_stats(self, code: str, stats: CompilationStats) -> str:
+        # tokens are materialized here, so that lexing is not accounted to parsing
+        with stats.phase("tokenize") as phase:
+            tokens = list(self.tokenizer.tokenize(code=code))
+        phase.count("tokens", len(tokens))
+        with stats.phase("parse") as phase:
+            ast = self.parser(tokens=tokens)
+        phase.count("nodes", ast.count())
+        with stats.phase("ir") as phase:
+            int_rep = self.representation(ast=ast)
+        phase.count("commands", len(int_rep.commands))
+        if self.registry.is_blocking_compilation:
+            return self.registry.display_messages()
+        self.pass_manager(representation=int_rep)
+        allocation: Allocation | None = None
+        if self.allocator is not None:
+            with stats.phase("regalloc") as phase:
+                allocation = self.allocator(representation=int_rep)
+            phase.count("values", allocation.value_count)
+            phase.count("spills", allocation.spill_count)
+            phase.count("coalesced", allocation.coalesced_count)
+        with stats.phase("codegen") as phase:
+            asm = self.generation(representation=int_rep, allocation=allocation)
+        phase.count("instructions", self.generation.instruction_count)
         return asm
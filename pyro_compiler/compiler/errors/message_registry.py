@@ -12,33 +12,68 @@ from pyro_compiler.compiler.errors.message_factory import (
 from pyro_compiler.compiler.errors.utils import IsBlockingMessageT, is_blocking_message
 
 
+@dataclass
+class PendingMessage:
+    line: int
+    pos: int
+    message_type: MessageType
+    arguments: dict[str, str]
+
+
 @dataclass
 class MessageRegistry:
+    """Collects the messages produced during compilation
+
+    Registering a message only records where it happened and with which arguments. The message
+    text and the offending line of code are produced once the messages are displayed, using an
+    index of line offsets that is built once per source code.
+
+    Fields:
+        - `code[str]`: source code the messages refer to
+        - `messages[list[CompileTimeMessage]]`: messages that were already formatted
+        - `pending_messages[list[PendingMessage]]`: messages registered since the last formatting
+        - `error_limit[int | None]`: how many messages are kept at most, None for no limit
+        - `dropped_messages[int]`: how many messages were registered after the limit was hit
+
+    """
+
     code: str
     messages: list[CompileTimeMessage] = field(default_factory=list)
     is_blocking_compilation: bool = False
     get_message: GetMessageT = get_message
     message_factory: MessageFactoryT = message_factory
     is_blocking_message: IsBlockingMessageT = is_blocking_message
+    pending_messages: list[PendingMessage] = field(default_factory=list)
+    error_limit: int | None = None
+    dropped_messages: int = 0
+    line_offsets: list[int] = field(default_factory=list)
+    indexed_code: str | None = None
 
     def register_message(self, line: int, pos: int, message_type: MessageType, **kwargs: str):
-        code_lines = self.code.split("\n")
-        code_line = code_lines[line - 1]
         if not self.is_blocking_compilation:
             self.is_blocking_compilation = self.is_blocking_message(message_type=message_type)
-        message_str = self.get_message(message_type=message_type)
-        if kwargs:
-            message_str = message_str.format(**kwargs)
-        message = self.message_factory(
-            line=line,
-            pos=pos,
-            message_str=message_str,
-            code_line=code_line,
-            message_type=message_type,
+        if self.is_limit_reached():
+            self.dropped_messages += 1
+            return
+        self.pending_messages.append(
+            PendingMessage(line=line, pos=pos, message_type=message_type, arguments=kwargs)
         )
-        self.messages.append(message)
+
+    def is_limit_reached(self) -> bool:
+        if self.error_limit is None:
+            return False
+        return len(self.messages) + len(self.pending_messages) >= self.error_limit
+
+    def get_code_line(self, line: int) -> str:
+        if self.indexed_code is not self.code:
+            self._index_lines()
+        start = self.line_offsets[line - 1]
+        if line < len(self.line_offsets):
+            return self.code[start : self.line_offsets[line] - 1]
+        return self.code[start:]
 
     def display_messages(self) -> str:
+        self._format_messages()
         result: str
         if self.is_blocking_message:
             result = "Compilation stopped due to several messages:\n"
@@ -47,11 +82,37 @@ class MessageRegistry:
         for message in self.messages:
             message_str = message.to_message()
             result += message_str + "\n\n"
+        if self.dropped_messages:
+            result += f"... and {self.dropped_messages} more messages\n"
 
         return result
 
     def get_messages_as_json(self) -> str:
+        self._format_messages()
         message_dicts: list[dict] = []
         for message in self.messages:
             message_dicts.append(message.__dict__)
         return json.dumps(message_dicts)
+
+    def _format_messages(self):
+        for pending in self.pending_messages:
+            message_str = self.get_message(message_type=pending.message_type)
+            if pending.arguments:
+                message_str = message_str.format(**pending.arguments)
+            message = self.message_factory(
+                line=pending.line,
+                pos=pending.pos,
+                message_str=message_str,
+                code_line=self.get_code_line(pending.line),
+                message_type=pending.message_type,
+            )
+            self.messages.append(message)
+        self.pending_messages = []
+
+    def _index_lines(self):
+        self.line_offsets = [0]
+        offset = self.code.find("\n")
+        while offset != -1:
+            self.line_offsets.append(offset + 1)
+            offset = self.code.find("\n", offset + 1)
+        self.indexed_code = self.code
@@ -0,0 +1,397 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+
+from pyro_compiler.compiler.optimization.liveness import (
+    compute_liveness,
+    get_jump_target,
+    get_memory_bound_variables,
+    get_value_key,
+)
+from pyro_compiler.compiler.representation.command import CommandType
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+class RegisterAllocation(Enum):
+    NONE = "none"
+    LINEAR_SCAN = "linear"
+    GRAPH_COLORING = "graph"
+
+
+# rax, rbx, rcx and rdx are used as scratch registers by the code generation, rsp and rbp
+# hold the stack frame
+GENERAL_PURPOSE_REGISTERS: tuple[str, ...] = (
+    "r12",
+    "r13",
+    "r14",
+    "r15",
+    "r8",
+    "r9",
+    "r10",
+    "r11",
+    "rsi",
+    "rdi",
+)
+CALLEE_SAVED_REGISTERS: tuple[str, ...] = ("r12", "r13", "r14", "r15")
+
+# renamed pseudo registers are numbered above the ones mapped onto physical registers
+FIRST_VIRTUAL_REGISTER = 16
+
+
+@dataclass(slots=True)
+class LiveInterval:
+    """Range of positions in the command list where a value has to be kept.
+
+    Positions are doubled command indexes: a command reads its operands at `2 * i` and writes
+    its target at `2 * i + 1`, so the value a command defines can take the register of a value
+    the same command reads for the last time.
+
+    Fields:
+        - `value[PseudoRegister | Variable]`: the kept value
+        - `start[int]`: position of the first definition or usage of the value
+        - `end[int]`: position of the last usage of the value
+
+    """
+
+    value: PseudoRegister | Variable
+    start: int
+    end: int
+
+    def covers(self, position: int) -> bool:
+        return self.start < position <= self.end
+
+
+@dataclass
+class Allocation:
+    """Locations chosen by a register allocator for the values of a representation.
+
+    Fields:
+        - `registers[dict[str, str]]`: physical register of every allocated pseudo register
+        - `variables[dict[str, str]]`: physical register of every allocated variable
+        - `spill_slots[dict[str, int]]`: stack frame slot of every spilled pseudo register
+        - `spilled_variables[list[str]]`: variables left in their stack memory regions
+        - `value_count[int]`: number of values considered by the allocator
+        - `coalesced_count[int]`: number of copies between values sharing a register
+
+    """
+
+    registers: dict[str, str] = field(default_factory=dict)
+    variables: dict[str, str] = field(default_factory=dict)
+    spill_slots: dict[str, int] = field(default_factory=dict)
+    spilled_variables: list[str] = field(default_factory=list)
+    value_count: int = 0
+    coalesced_count: int = 0
+
+    @property
+    def spill_count(self) -> int:
+        return len(self.spill_slots) + len(self.spilled_variables)
+
+    def assign(self, value: PseudoRegister | Variable, register: str):
+        if isinstance(value, Variable):
+            self.variables[value.name] = register
+        else:
+            self.registers[value.name] = register
+
+    def spill(self, value: PseudoRegister | Variable):
+        if isinstance(value, Variable):
+            self.spilled_variables.append(value.name)
+        else:
+            self.spill_slots[value.name] = len(self.spill_slots)
+
+    def report(self) -> str:
+        report = f"register allocation: {self.value_count} values, {self.spill_count} spilled"
+        if self.coalesced_count:
+            report += f", {self.coalesced_count} copies coalesced"
+        return report
+
+
+def rename_registers(representation: Representation):
+    """Give every definition of a pseudo register its own register
+
+    `IRBuilder` reuses the same few pseudo registers for all expressions, so a pseudo register
+    name stands for many unrelated values. Every definition gets a new pseudo register here, and
+    the usages are pointed at the last definition before them.
+    """
+    current: dict[str, PseudoRegister] = {}
+    next_order = FIRST_VIRTUAL_REGISTER
+    for command in representation.commands:
+        if isinstance(command.operand_a, PseudoRegister):
+            command.operand_a = current.get(command.operand_a.name, command.operand_a)
+        if isinstance(command.operand_b, PseudoRegister):
+            command.operand_b = current.get(command.operand_b.name, command.operand_b)
+        if isinstance(command.target, PseudoRegister):
+            renamed = PseudoRegister(order=next_order)
+            next_order += 1
+            current[command.target.name] = renamed
+            command.target = renamed
+
+
+def compute_live_intervals(
+    representation: Representation, live_out: set[str] | None = None
+) -> list[LiveInterval]:
+    """Live intervals of the pseudo registers and variables, ordered by their start
+
+    Intervals live at the beginning of a loop are stretched up to the jump closing the loop,
+    as the value is needed again on the next iteration. Variables named in `live_out` are kept
+    alive up to the end of the program.
+    """
+    bound_variables = get_memory_bound_variables(representation)
+    register_intervals: dict[str, LiveInterval] = {}
+    variable_intervals: dict[str, LiveInterval] = {}
+
+    def mark(value: object, position: int):
+        intervals: dict[str, LiveInterval]
+        if isinstance(value, PseudoRegister):
+            intervals = register_intervals
+        elif isinstance(value, Variable) and value.name not in bound_variables:
+            intervals = variable_intervals
+        else:
+            return
+        interval = intervals.get(value.name)
+        if interval is None:
+            intervals[value.name] = LiveInterval(value=value, start=position, end=position)
+        else:
+            interval.end = max(interval.end, position)
+
+    loops: list[tuple[int, int]] = []
+    for command_id, command in enumerate(representation.commands):
+        mark(command.operand_a, 2 * command_id)
+        mark(command.operand_b, 2 * command_id)
+        mark(command.target, 2 * command_id + 1)
+        loop_start = get_jump_target(representation, command)
+        if loop_start is not None and 0 <= loop_start <= command_id:
+            loops.append((2 * loop_start, 2 * command_id + 1))
+
+    for varname in live_out or ():
+        if (interval := variable_intervals.get(varname)) is not None:
+            interval.end = 2 * len(representation.commands)
+
+    intervals = list(register_intervals.values()) + list(variable_intervals.values())
+    is_changed = True
+    while is_changed:
+        is_changed = False
+        for loop_start, loop_end in loops:
+            for interval in intervals:
+                if interval.covers(loop_start) and interval.end < loop_end:
+                    interval.end = loop_end
+                    is_changed = True
+
+    intervals.sort(key=lambda interval: interval.start)
+    return intervals
+
+
+class RegisterAllocator(ABC):
+    """Base of the register allocators.
+
+    Fields:
+        - `registers[tuple[str, ...]]`: physical registers to allocate, in the order of preference
+        - `keep_main_variables[bool]`: keep the variables of the outermost scope alive up to the end
+          of the program, for the debug output to print them
+
+    """
+
+    def __init__(
+        self,
+        registers: tuple[str, ...] = GENERAL_PURPOSE_REGISTERS,
+        keep_main_variables: bool = False,
+    ):
+        self.registers = registers
+        self.keep_main_variables = keep_main_variables
+
+    @abstractmethod
+    def __call__(self, representation: Representation) -> Allocation:
+        ...
+
+    def get_live_out(self, representation: Representation) -> set[str]:
+        if self.keep_main_variables and representation.scopes:
+            return set(representation.scopes[0].variable_table)
+        return set()
+
+
+class LinearScanAllocator(RegisterAllocator):
+    """Linear scan register allocator.
+
+    Walks the live intervals in the order they start, giving every value a free register. When
+    none is left, the value living the longest is spilled to the stack frame for its whole life.
+    """
+
+    def __call__(self, representation: Representation) -> Allocation:
+        rename_registers(representation)
+        live_out = self.get_live_out(representation)
+        intervals = compute_live_intervals(representation, live_out=live_out)
+        allocation = Allocation(value_count=len(intervals))
+        preference = {register: i for i, register in enumerate(self.registers)}
+
+        free_registers: list[str] = list(self.registers)
+        active: list[tuple[LiveInterval, str]] = []
+        for interval in intervals:
+            expired = [
+                (other, register) for other, register in active if other.end < interval.start
+            ]
+            if expired:
+                active = [
+                    (other, register) for other, register in active if other.end >= interval.start
+                ]
+                free_registers += [register for _, register in expired]
+                free_registers.sort(key=preference.__getitem__)
+
+            if free_registers:
+                register = free_registers.pop(0)
+                allocation.assign(interval.value, register)
+                active.append((interval, register))
+                continue
+
+            spilled, register = max(active, key=lambda item: item[0].end)
+            if spilled.end > interval.end:
+                active = [item for item in active if item[0] is not spilled]
+                allocation.spill(spilled.value)
+                allocation.assign(interval.value, register)
+                active.append((interval, register))
+            else:
+                allocation.spill(interval.value)
+
+        for value_name in allocation.spilled_variables:
+            allocation.variables.pop(value_name, None)
+        for value_name in allocation.spill_slots:
+            allocation.registers.pop(value_name, None)
+
+        return allocation
+
+
+def get_loop_depths(representation: Representation) -> list[int]:
+    """Number of loops containing every command, loops being closed by jumps going backwards"""
+    depths = [0] * len(representation.commands)
+    for command_id, command in enumerate(representation.commands):
+        loop_start = get_jump_target(representation, command)
+        if loop_start is not None and 0 <= loop_start <= command_id:
+            for loop_command_id in range(loop_start, command_id + 1):
+                depths[loop_command_id] += 1
+    return depths
+
+
+class GraphColoringAllocator(RegisterAllocator):
+    """Chaitin-Briggs graph coloring register allocator.
+
+    Builds the interference graph of the values from their liveness, merges the values copied
+    into each other by `STORE` commands when it can not make the graph harder to color (Briggs'
+    conservative coalescing), and colors the graph with the registers. Values whose neighbours
+    take all the registers are spilled to the stack frame, the cheapest ones being picked first,
+    with every usage inside a loop weighting ten times more.
+    """
+
+    def __call__(self, representation: Representation) -> Allocation:
+        rename_registers(representation)
+        bound_variables = get_memory_bound_variables(representation)
+        live_after = compute_liveness(
+            representation, bound_variables, live_out=self.get_live_out(representation)
+        )
+        loop_depths = get_loop_depths(representation)
+
+        values: dict[str, PseudoRegister | Variable] = {}
+        costs: dict[str, float] = {}
+        graph: dict[str, set[str]] = {}
+        copies: list[tuple[str, str]] = []
+        for command_id, command in enumerate(representation.commands):
+            for value in (command.target, command.operand_a, command.operand_b):
+                key = get_value_key(value, bound_variables)
+                if key is not None:
+                    values.setdefault(key, value)  # type: ignore
+                    costs[key] = costs.get(key, 0) + 10 ** loop_depths[command_id]
+                    graph.setdefault(key, set())
+            definition = get_value_key(command.target, bound_variables)
+            if definition is None:
+                continue
+            source = (
+                get_value_key(command.operand_a, bound_variables)
+                if command.operation == CommandType.STORE
+                else None
+            )
+            if source is not None:
+                copies.append((definition, source))
+            for key in live_after[command_id]:
+                if key != definition and key != source:
+                    graph[definition].add(key)
+                    graph[key].add(definition)
+
+        aliases = self._coalesce(graph, costs, copies)
+        colors = self._color(graph, costs)
+
+        allocation = Allocation(value_count=len(values))
+        for key, value in values.items():
+            node = self._get_alias(aliases, key)
+            if node in colors:
+                allocation.assign(value, colors[node])
+            else:
+                allocation.spill(value)
+        allocation.coalesced_count = sum(
+            self._get_alias(aliases, definition) == self._get_alias(aliases, source)
+            for definition, source in copies
+        )
+        return allocation
+
+    def _get_alias(self, aliases: dict[str, str], key: str) -> str:
+        while key in aliases:
+            key = aliases[key]
+        return key
+
+    def _coalesce(
+        self, graph: dict[str, set[str]], costs: dict[str, float], copies: list[tuple[str, str]]
+    ) -> dict[str, str]:
+        register_count = len(self.registers)
+        aliases: dict[str, str] = {}
+        is_changed = True
+        while is_changed:
+            is_changed = False
+            for definition, source in copies:
+                node = self._get_alias(aliases, definition)
+                merged = self._get_alias(aliases, source)
+                if node == merged or merged in graph[node]:
+                    continue
+                neighbours = graph[node] | graph[merged]
+                significant = sum(len(graph[other]) >= register_count for other in neighbours)
+                if significant >= register_count:
+                    continue
+                for other in graph.pop(merged):
+                    graph[other].discard(merged)
+                    graph[other].add(node)
+                graph[node] = neighbours
+                costs[node] += costs.pop(merged)
+                aliases[merged] = node
+                is_changed = True
+        return aliases
+
+    def _color(self, graph: dict[str, set[str]], costs: dict[str, float]) -> dict[str, str]:
+        register_count = len(self.registers)
+        degrees = {node: len(neighbours) for node, neighbours in graph.items()}
+        # nodes are visited in the order of the graph, so the allocation is reproducible
+        remaining = dict.fromkeys(graph)
+        simplified = [node for node in graph if degrees[node] < register_count]
+        stack: list[str] = []
+        while remaining:
+            if simplified:
+                node = simplified.pop()
+                if node not in remaining:
+                    continue
+            else:
+                # optimistically pushed, it may still get a register when selected
+                node = min(remaining, key=lambda node: costs[node] / (degrees[node] + 1))
+            del remaining[node]
+            stack.append(node)
+            for other in graph[node]:
+                if other in remaining:
+                    degrees[other] -= 1
+                    if degrees[other] == register_count - 1:
+                        simplified.append(other)
+
+        colors: dict[str, str] = {}
+        while stack:
+            node = stack.pop()
+            taken = {colors[other] for other in graph[node] if other in colors}
+            register = next(
+                (register for register in self.registers if register not in taken), None
+            )
+            if register is not None:
+                colors[node] = register
+        return colors
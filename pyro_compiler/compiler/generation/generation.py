@@ -1,11 +1,8 @@
+from pyro_compiler.compiler.generation.allocation import Allocation
 from pyro_compiler.compiler.generation.memory import MemoryManager
-from pyro_compiler.compiler.generation.registers import (
-    get_register_for_carried_command,
-    get_register_for_command,
-    get_register_reassignment,
-)
+from pyro_compiler.compiler.generation.power import find_multiplication_chain, is_stored
+from pyro_compiler.compiler.generation.stores import store_value
 from pyro_compiler.compiler.generation.utils import (
-    X86_64_REGISTER_SCHEMA,
     ASMInstruction,
     CallInstruction,
     ControllFlowInstruction,
@@ -13,21 +10,27 @@ from pyro_compiler.compiler.generation.utils import (
     InstructionType,
     LabelInstruction,
     MathLogicInstruction,
-    dereference_offset,
+    is_memory,
+    is_register,
+    is_wide_immediate,
 )
+from pyro_compiler.compiler.optimization.constant_propagation import WORD_MASK, parse_constant
 from pyro_compiler.compiler.representation.command import Command, CommandType
 from pyro_compiler.compiler.representation.label import Label
 from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
 from pyro_compiler.compiler.representation.representation import Representation
 from pyro_compiler.compiler.representation.scope import Scope
 from pyro_compiler.compiler.representation.struct_declaration import StructDeclaration
-from pyro_compiler.compiler.representation.utils import (
-    is_operand_a_register,
-    is_operand_a_value,
-    is_operand_a_variable,
-)
 from pyro_compiler.compiler.representation.variable import Variable, VarType
-from pyro_compiler.compiler.utils import OperandAT
+from pyro_compiler.compiler.utils import OperandANullT, OperandAT
+
+
+COMMUTATIVE_INSTRUCTIONS: frozenset[InstructionType] = frozenset(
+    (InstructionType.ADD, InstructionType.AND, InstructionType.OR, InstructionType.XOR)
+)
+DIVISION_COMMANDS: frozenset[CommandType] = frozenset(
+    (CommandType.DIV, CommandType.FLOOR, CommandType.REMAIN)
+)
 
 
 class Generation:
@@ -36,10 +39,17 @@ class Generation:
         self.representation = representation
         self.code_chunks: list[ASMInstruction] = []
         self.memory_manager: MemoryManager = MemoryManager()
+        # operands of the `div` leaving its quotient and remainder in rax and rdx, if it was the
+        # last instruction emitted
+        self.last_division: tuple[str, str] | None = None
+        # number of powers computed by loops, naming their labels
+        self.power_loop_count = 0
 
-    def __call__(self, representation: Representation) -> str:
+    def __call__(self, representation: Representation, allocation: Allocation | None = None) -> str:
         if self.representation is None:
             self.representation = representation
+        if allocation is not None:
+            self.memory_manager = MemoryManager(allocation=allocation)
         asm_header: str
         if self.debug:
             asm_header = (
@@ -50,6 +60,8 @@ class Generation:
                 "    global main\n"
                 "\nmain:\n"
             )
+            if allocation is not None:
+                asm_header = f"; {allocation.report()}\n" + asm_header
         else:
             asm_header = "section .text\nglobal _start\n\n_start:\n"
 
@@ -60,6 +72,8 @@ class Generation:
                 self.code_chunks += instructions
             if processed_scope != scope:
                 processed_scope = scope
+            if label is not None or command.operation not in DIVISION_COMMANDS:
+                self.last_division = None
             match command.operation:
                 case CommandType.STORE:
                     instructions = self._generate_store(command)
@@ -74,7 +88,7 @@ class Generation:
                     instructions = self._generate_mul(command)
                     self.code_chunks += instructions
                 case CommandType.POV:
-                    instructions = self._generate_mul(command)
+                    instructions = self._generate_pov(command)
                     self.code_chunks += instructions
                 case CommandType.DIV:
                     instructions = self._generate_div(command)
@@ -163,21 +177,23 @@ class Generation:
                 case CommandType.ESCALATE:
                     self.memory_manager.escalate()
                 case CommandType.DEESCALATE:
-                    if self.debug and not self.representation.is_last_command(command):
-                        instructions = self.memory_manager.deescalate()
-                        self.code_chunks += instructions
-                    if not self.debug:
-                        instructions = self.memory_manager.deescalate()
-                        self.code_chunks += instructions
+                    if not self.debug or not self.representation.is_last_command(command):
+                        self.memory_manager.deescalate()
                 case _:
                     raise Exception("Unreachable")
-        if len(self.representation.labels) != 0:
-            last_label: Label = list(self.representation.labels.items())[0][1]
-            instructions = self._generate_label(last_label)
+        trailing_labels = self.representation.get_trailing_labels()
+        if len(trailing_labels) != 0:
+            instructions = self._generate_label(trailing_labels[0])
             self.code_chunks += instructions
 
+        self.code_chunks = self.memory_manager.allocate_frame() + self.code_chunks
         if self.debug:
-            self.code_chunks += self.memory_manager.debug_memory()
+            varnames = (
+                list(self.representation.scopes[0].variable_table)
+                if self.representation.scopes
+                else None
+            )
+            self.code_chunks += self.memory_manager.debug_memory(varnames=varnames)
         asm_body: str = asm_header + "\n".join(chunk.to_asm() for chunk in self.code_chunks)
         exit_chunk: list[ASMInstruction]
         if self.debug:
@@ -201,6 +217,10 @@ class Generation:
             result_asm += "\n\n\nsection .data\n    formatString: db '%llu', 10, 0\n"
         return result_asm
 
+    @property
+    def instruction_count(self) -> int:
+        return sum(not isinstance(chunk, LabelInstruction) for chunk in self.code_chunks)
+
     def _generate_store(self, command: Command) -> list[ASMInstruction]:
         instructions: list[ASMInstruction] = []
         saved_value: OperandAT = command.operand_a
@@ -224,34 +244,19 @@ class Generation:
             return instructions
 
     def _generate_logical_operation(self, command: Command) -> list[ASMInstruction]:
-        if not isinstance(command.target, PseudoRegister):
+        if command.target is None:
             raise Exception("Unreachable")
-        cmp_command = Command(
-            operation=CommandType.CMP, operand_a=command.operand_a, operand_b=command.operand_b
-        )
-        cmp_instructions = self._generate_cmp(cmp_command)
-        boolean_value_register = PseudoRegister(order=2)
-        bitshift_register = boolean_value_register.get_subregister(new_size=1)
-        clear_bool = DataMoveInstruction(
-            instruction_type=InstructionType.MOV,
-            register=X86_64_REGISTER_SCHEMA[boolean_value_register.name],
-            data="0",
-        )
-        save_comparison = MathLogicInstruction(
-            instruction_type=self._get_setcc_instruction(command_type=command.operation),
-            registers=(X86_64_REGISTER_SCHEMA[bitshift_register.name],),
-        )
-        move_to_target = DataMoveInstruction(
-            instruction_type=InstructionType.MOV,
-            register=X86_64_REGISTER_SCHEMA[command.target.name],
-            data=X86_64_REGISTER_SCHEMA[boolean_value_register.name],
-        )
-
-        store_instructions = [clear_bool, save_comparison, move_to_target]
-
-        result = cmp_instructions + store_instructions
+        instructions = self._generate_cmp(command)
+        instructions += [
+            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rcx", data="0"),
+            MathLogicInstruction(
+                instruction_type=self._get_setcc_instruction(command_type=command.operation),
+                registers=("cl",),
+            ),
+        ]
+        instructions += store_value(value="rcx", destination=self._locate(command.target))
 
-        return result
+        return instructions
 
     def _generate_sum(self, command: Command) -> list[ASMInstruction]:
         return self._generate_binop(command=command, math_op_type=InstructionType.ADD)
@@ -260,58 +265,96 @@ class Generation:
         return self._generate_binop(command=command, math_op_type=InstructionType.SUB)
 
     def _generate_mul(self, command: Command) -> list[ASMInstruction]:
-        actual_target = command.target
-        if not is_operand_a_register(actual_target):
+        return self._generate_carried_binop(
+            command=command, math_op_type=InstructionType.MUL, result_register="rax"
+        )
+
+    def _generate_pov(self, command: Command) -> list[ASMInstruction]:
+        if command.operand_b is None:
             raise Exception("Unreachable")
+        base = self._locate(command.operand_a)
+        target = self._locate(command.target)
+        exponent = parse_constant(command.operand_b) if isinstance(command.operand_b, str) else None
+        if exponent is None:
+            return self._generate_power_loop(base, self._locate(command.operand_b), target)
+        exponent &= WORD_MASK
+        if exponent == 0:
+            return store_value(value="1", destination=target)
+        if exponent.bit_length() > 32:
+            return self._generate_power_loop(base, str(exponent), target)
+        return self._generate_power_chain(base, exponent, target)
+
+    def _generate_power_chain(self, base: str, exponent: int, target: str) -> list[ASMInstruction]:
+        """Raise to a known exponent with the multiplications of `find_multiplication_chain`"""
+        chain = find_multiplication_chain(exponent)
+        if not chain:
+            return store_value(value=base, destination=target)
+        instructions = store_value(value=base, destination="rbx")
+        # where the powers used more than once right after being computed are kept
+        slots: dict[int, str] = {0: "rbx"}
+        free_slots = ["rcx", target]
+        power_in_rax: int | None = None
+        for index, (first, second) in enumerate(chain):
+            if power_in_rax not in (first, second):
+                instructions += store_value(value=slots[first], destination="rax")
+                power_in_rax = first
+            other = second if power_in_rax == first else first
+            multiplier = "rax" if other == power_in_rax else slots[other]
+            instructions.append(self._process_op_type(InstructionType.MUL, multiplier))
+            power_in_rax = index + 1
+            for power in list(slots):
+                if not any(power in step for step in chain[index + 1 :]):
+                    free_slots.append(slots.pop(power))
+            if is_stored(chain, power_in_rax):
+                slot = target if power_in_rax == len(chain) else free_slots.pop(0)
+                instructions += store_value(value="rax", destination=slot)
+                slots[power_in_rax] = slot
+        return instructions
 
-        command.target = PseudoRegister(order=0)
-        instructions = self._generate_carried_binop(
-            command=command, math_op_type=InstructionType.MUL
-        )
-        instructions.append(
-            DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
-                register=X86_64_REGISTER_SCHEMA[actual_target.name],  # type: ignore
-                data=X86_64_REGISTER_SCHEMA[command.target.name],
-            ),
-        )
+    def _generate_power_loop(self, base: str, exponent: str, target: str) -> list[ASMInstruction]:
+        """Raise to an exponent known at run time by squaring the base for every binary digit of
+        the exponent, multiplying the result by the squares of the digits set"""
+        self.power_loop_count += 1
+        loop_label = f"pov_loop_{self.power_loop_count}"
+        square_label = f"pov_square_{self.power_loop_count}"
+        end_label = f"pov_end_{self.power_loop_count}"
+        instructions = store_value(value=base, destination="rbx")
+        instructions += store_value(value=exponent, destination="rcx")
+        instructions += store_value(value="1", destination=target)
+        instructions += [
+            ControllFlowInstruction(instruction_type=InstructionType.CMP, data=("rcx", "0")),
+            ControllFlowInstruction(instruction_type=InstructionType.JE, data=(end_label,)),
+            LabelInstruction(instruction_type=InstructionType.LABEL, label_name=loop_label),
+            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rdx", data="rcx"),
+            self._process_op_type(InstructionType.AND, "rdx", "1"),
+            ControllFlowInstruction(instruction_type=InstructionType.CMP, data=("rdx", "0")),
+            ControllFlowInstruction(instruction_type=InstructionType.JE, data=(square_label,)),
+        ]
+        instructions += store_value(value=target, destination="rax")
+        instructions.append(self._process_op_type(InstructionType.MUL, "rbx"))
+        instructions += store_value(value="rax", destination=target)
+        instructions += [
+            LabelInstruction(instruction_type=InstructionType.LABEL, label_name=square_label),
+            self._process_op_type(InstructionType.SHR, "rcx", "1"),
+            ControllFlowInstruction(instruction_type=InstructionType.CMP, data=("rcx", "0")),
+            ControllFlowInstruction(instruction_type=InstructionType.JE, data=(end_label,)),
+            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rax", data="rbx"),
+            self._process_op_type(InstructionType.MUL, "rbx"),
+            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rbx", data="rax"),
+            ControllFlowInstruction(instruction_type=InstructionType.JMP, data=(loop_label,)),
+            LabelInstruction(instruction_type=InstructionType.LABEL, label_name=end_label),
+        ]
         return instructions
 
     def _generate_div(self, command: Command) -> list[ASMInstruction]:
-        actual_target = command.target
-        if not is_operand_a_register(actual_target):
-            raise Exception("Unreachable")
-
-        command.target = PseudoRegister(order=0)
-        instructions = self._generate_carried_binop(
-            command=command, math_op_type=InstructionType.DIV
+        return self._generate_carried_binop(
+            command=command, math_op_type=InstructionType.DIV, result_register="rax"
         )
-        instructions.append(
-            DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
-                register=X86_64_REGISTER_SCHEMA[actual_target.name],  # type: ignore
-                data=X86_64_REGISTER_SCHEMA[command.target.name],
-            ),
-        )
-        return instructions
 
     def _generate_remain(self, command: Command) -> list[ASMInstruction]:
-        actual_target = command.target
-        if not is_operand_a_register(actual_target):
-            raise Exception("Unreachable")
-
-        command.target = PseudoRegister(order=0)
-        instructions = self._generate_carried_binop(
-            command=command, math_op_type=InstructionType.DIV
-        )
-        instructions.append(
-            DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
-                register=X86_64_REGISTER_SCHEMA[actual_target.name],  # type: ignore
-                data="rdx",
-            ),
+        return self._generate_carried_binop(
+            command=command, math_op_type=InstructionType.DIV, result_register="rdx"
         )
-        return instructions
 
     def _generate_and(self, command: Command) -> list[ASMInstruction]:
         return self._generate_binop(command=command, math_op_type=InstructionType.AND)
@@ -362,7 +405,7 @@ class Generation:
         if isinstance(command.operand_a, str | Label | StructDeclaration):
             raise Exception("Unreachable")
         conversion_command = Command(
-            target=command.operand_a,
+            target=command.target,
             operation=CommandType.GT,
             operand_a=command.operand_a,
             operand_b="0",
@@ -375,107 +418,87 @@ class Generation:
         if command.operand_b is None:
             return self._generate_unary(command=command, math_op_type=math_op_type)
         instructions: list[ASMInstruction] = []
-        register_a, register_b = get_register_for_command(command)
-        is_operand_a, is_operand_b = get_register_reassignment(command)
-        if command.operand_a is None or command.operand_b is None:
-            raise Exception("Unreachable")
-        if isinstance(command.operand_a, VarType) or isinstance(command.operand_b, VarType):
-            raise Exception("Unreachable")
-        instruction_a = self._process_operand(
-            command.operand_a, register_a, register_b, is_operand_b=is_operand_a
-        )
-        instruction_b = self._process_operand(
-            command.operand_b, register_a, register_b, is_operand_b=is_operand_b
+        target = self._locate(command.target)
+        operand_a = self._locate(command.operand_a)
+        operand_b = self._locate(command.operand_b)
+        if math_op_type in (InstructionType.SHL, InstructionType.SHR):
+            # shift counts can only be taken from cl or an immediate
+            if is_register(operand_b) or is_memory(operand_b):
+                instructions += store_value(value=operand_b, destination="rcx")
+                operand_b = "cl"
+        else:
+            if target == operand_b and math_op_type in COMMUTATIVE_INSTRUCTIONS:
+                operand_a, operand_b = operand_b, operand_a
+            if is_wide_immediate(operand_b):
+                instructions += store_value(value=operand_b, destination="rbx")
+                operand_b = "rbx"
+        # the target register can only be used if loading the first operand keeps the second one
+        register = (
+            target
+            if is_register(target) and (target != operand_b or operand_a == operand_b)
+            else "rax"
         )
-        inctruction_c = self._process_op_type(math_op_type, register_a, register_b)
-        if instruction_a is not None:
-            instructions.append(instruction_a)
-        if instruction_b is not None:
-            instructions.append(instruction_b)
-        instructions.append(inctruction_c)
+        instructions += store_value(value=operand_a, destination=register)
+        instructions.append(self._process_op_type(math_op_type, register, operand_b))
+        instructions += store_value(value=register, destination=target)
         return instructions
 
     def _generate_carried_binop(
-        self, command: Command, math_op_type: InstructionType
+        self, command: Command, math_op_type: InstructionType, result_register: str
     ) -> list[ASMInstruction]:
-        instructions: list[ASMInstruction] = [
-            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rdx", data="0")
-        ]
-        # argument extraction
-        register_a, register_b = get_register_for_carried_command(command)
-        if register_a != "rax":
-            instructions.append(
-                DataMoveInstruction(
-                    instruction_type=InstructionType.MOV, register="rax", data=register_a
-                )
-            )
-        else:
-            operation = self._process_operand(command.operand_a, "rax", "rbx", False)
-            if operation is None:
-                raise Exception("Unreachable")
-            instructions.append(operation)
-        if register_b != "rbx":
+        instructions: list[ASMInstruction] = []
+        if command.operand_b is None:
+            raise Exception("Unreachable")
+        operand_a = self._locate(command.operand_a)
+        operand_b = self._locate(command.operand_b)
+        target = self._locate(command.target)
+        if math_op_type == InstructionType.DIV:
+            division = (operand_a, operand_b)
+            if self.last_division == division:
+                # the division right before had the same operands, its results are still there
+                self.last_division = None if target in division else division
+                return store_value(value=result_register, destination=target)
+            self.last_division = None if target in division else division
             instructions.append(
-                DataMoveInstruction(
-                    instruction_type=InstructionType.MOV, register="rbx", data=register_b
-                )
+                DataMoveInstruction(instruction_type=InstructionType.MOV, register="rdx", data="0")
             )
-        else:
-            if command.operand_b is None or isinstance(command.operand_b, VarType):
-                raise Exception("Unreachable")
-            operation = self._process_operand(command.operand_b, "rax", "rbx", True)
-            if operation is None:
-                raise Exception("Unreachable")
-            instructions.append(operation)
-        instructions.append(self._process_op_type(math_op_type, register_b))
+        if not is_register(operand_b) and not is_memory(operand_b):
+            instructions += store_value(value=operand_b, destination="rbx")
+            operand_b = "rbx"
+        instructions += store_value(value=operand_a, destination="rax")
+        instructions.append(self._process_op_type(math_op_type, operand_b))
+        instructions += store_value(value=result_register, destination=target)
         return instructions
 
     def _generate_unary(
         self, command: Command, math_op_type: InstructionType
     ) -> list[ASMInstruction]:
-        register = (
-            X86_64_REGISTER_SCHEMA[command.operand_a.name]  # type: ignore
-            if is_operand_a_register(command.operand_a)
-            else X86_64_REGISTER_SCHEMA[command.target.name]  # type: ignore
-        )  # type: ignore
-
-        instruction_a = self._process_operand(
-            operand=command.operand_a, register_a=register, register_b="", is_operand_b=False
-        )
-        instruction_b = MathLogicInstruction(
-            instruction_type=math_op_type,
-            registers=(register,),
-        )
-        if instruction_a is None:
-            return [instruction_b]
-        return [instruction_a, instruction_b]
+        instructions: list[ASMInstruction] = []
+        target = self._locate(command.target)
+        register = target if is_register(target) else "rax"
+        instructions += store_value(value=self._locate(command.operand_a), destination=register)
+        instructions.append(self._process_op_type(math_op_type, register))
+        instructions += store_value(value=register, destination=target)
+        return instructions
 
     def _generate_label(self, label: Label) -> list[ASMInstruction]:
         return [LabelInstruction(instruction_type=InstructionType.LABEL, label_name=label.name)]
 
     def _generate_cmp(self, command: Command) -> list[ASMInstruction]:
-        command.target = PseudoRegister(order=8)
-        register_a, register_b = get_register_for_command(command=command)
         instruction: list[ASMInstruction] = []
-        operand_a = self._process_operand(
-            operand=command.operand_a,
-            register_a=register_a,
-            register_b=register_b,
-            is_operand_b=False,
-        )
-        operand_b = self._process_operand(
-            operand=command.operand_b,  # type: ignore
-            register_a=register_a,
-            register_b=register_b,
-            is_operand_b=True,
-        )
+        if command.operand_b is None:
+            raise Exception("Unreachable")
+        operand_a = self._locate(command.operand_a)
+        operand_b = self._locate(command.operand_b)
+        if not is_register(operand_a):
+            instruction += store_value(value=operand_a, destination="rax")
+            operand_a = "rax"
+        if is_wide_immediate(operand_b):
+            instruction += store_value(value=operand_b, destination="rbx")
+            operand_b = "rbx"
         cmp = ControllFlowInstruction(
-            instruction_type=InstructionType.CMP, data=(register_a, register_b)
+            instruction_type=InstructionType.CMP, data=(operand_a, operand_b)
         )
-        if operand_a is not None:
-            instruction.append(operand_a)
-        if operand_b is not None:
-            instruction.append(operand_b)
         instruction.append(cmp)
 
         return instruction
@@ -504,31 +527,9 @@ class Generation:
             case _:
                 raise Exception("Unreachable")
 
-    def _process_operand(
-        self,
-        operand: OperandAT,
-        register_a: str,
-        register_b: str,
-        is_operand_b: bool,
-    ) -> ASMInstruction | None:
-        if is_operand_a_register(operand):
-            return None
-        if is_operand_a_variable(operand):
-            operand_id = self.memory_manager.get_region_index(operand.name)  # type: ignore
-            if operand_id is None:
-                raise Exception("Unreachable")
-            stack_offset = self.memory_manager.calculate_region_offset(operand_id)  # type: ignore
-            return DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
-                register=register_b if is_operand_b else register_a,
-                data=dereference_offset(stack_offset),
-            )
-        if is_operand_a_value(operand):
-            return DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
-                register=register_b if is_operand_b else register_a,
-                data=operand,  # type: ignore
-            )
+    def _locate(self, operand: OperandANullT | VarType) -> str:
+        if isinstance(operand, str | PseudoRegister | Variable):
+            return self.memory_manager.locate(operand)
         raise Exception("Unreachable")
 
     def _process_op_type(
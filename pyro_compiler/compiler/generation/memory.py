@@ -1,11 +1,9 @@
 from dataclasses import dataclass, field
 
-from pyro_compiler.compiler.generation.stores import (
-    store_from_register,
-    store_from_string,
-    store_from_variable,
-)
+from pyro_compiler.compiler.generation.allocation import Allocation
+from pyro_compiler.compiler.generation.stores import store_value
 from pyro_compiler.compiler.generation.utils import (
+    X86_64_REGISTER_SCHEMA,
     ASMInstruction,
     CallInstruction,
     DataMoveInstruction,
@@ -32,6 +30,7 @@ class MemoryRegion:
         - `size_t[int]`: a size that the memory region is occupying, calculated in 8 byte chunks
         - `inner_values[list[MemoryRegion]]`: nested values in the memory region
         - `is_pointer[bool]`: is a given memory region a pointer
+        - `register[str | None]`: physical register holding the value instead of the stack
 
     """
 
@@ -40,6 +39,7 @@ class MemoryRegion:
     size_t: int
     inner_values: list["MemoryRegion"] = field(default_factory=list)
     is_pointer: bool = False
+    register: str | None = None
 
     def nest_memory(self, nested: "MemoryRegion"):
         self.inner_values.append(nested)
@@ -63,8 +63,32 @@ class MemoryRegion:
 
 
 class MemoryManager:
-    def __init__(self):
+    """Keeps track of the memory regions allocated in the stack frame.
+
+    Every region gets a fixed slot in the frame, right below the regions of the scopes it is
+    nested in, so sibling scopes share the same slots. The frame itself is reserved once with
+    `allocate_frame` and regions are addressed relative to `rbp`. Values placed in registers
+    by a register allocator keep a region without a size, so they can still be looked up by name.
+
+    Fields:
+        - `allocation[Allocation | None]`: registers and spill slots chosen by a register allocator
+        - `region[list[MemoryRegion]]`: allocated regions, in the order they were pushed
+        - `region_ids[dict[str, int]]`: index of the first region allocated for every name
+        - `region_offsets[list[int]]`: running sizes of the regions, `region_offsets[i]` being
+          the size of all regions before the i-th one, and the last item the total size
+        - `frame_size[int]`: the biggest total size of the regions alive at the same time
+        - `scope_boundaries[list[int]]`: number of regions allocated before each open scope
+        - `current_scope_boundary[int]`: number of regions allocated before the current scope
+
+    """
+
+    def __init__(self, allocation: Allocation | None = None):
+        self.allocation = allocation
+        spill_size = len(allocation.spill_slots) if allocation is not None else 0
         self.region: list[MemoryRegion] = []
+        self.region_ids: dict[str, int] = {}
+        self.region_offsets: list[int] = [spill_size]
+        self.frame_size: int = spill_size
         self.scope_boundaries: list[int] = []
         self.current_scope_boundary: int = 0
 
@@ -75,28 +99,18 @@ class MemoryManager:
         destination: Variable | None = None,
         store_to_main: bool = True,
         is_pointer: bool = False,
+        field_id: int = 0,
     ) -> list[ASMInstruction]:
         instructions: list[ASMInstruction] = []
+        register: str | None = None
+        destination_location: str
         if destination is not None:
-            variable_position = self.get_region_index(destination.name)
-            if variable_position is None:
-                raise Exception("Unreachable")
-            destination_offset = self.calculate_region_offset(variable_position)
+            destination_location = self.locate(destination)
+        elif store_to_main and (register := self.get_allocated_register(name)) is not None:
+            destination_location = register
         else:
-            destination_offset = None
-        if isinstance(val, PseudoRegister):
-            instructions += store_from_register(value=val, destination_offset=destination_offset)
-        if isinstance(val, str):
-            instructions += store_from_string(value=val, destination_offset=destination_offset)
-        if isinstance(val, Variable):
-            var_id = self.get_region_index(val.name)
-            if var_id is None:
-                raise Exception("Unreachable")
-            offset = self.calculate_region_offset(var_id)
-            instructions += store_from_variable(
-                value=dereference_offset(offset=offset),
-                destination_offset=destination_offset,
-            )
+            destination_location = dereference_offset(self.calculate_free_offset(field_id))
+        instructions += store_value(value=self.locate(val), destination=destination_location)
 
         if destination is None and store_to_main:
             region = self.register_memory_region(
@@ -105,8 +119,9 @@ class MemoryManager:
                 if (isinstance(val, Variable) and isinstance(val.var_type, Structure))
                 else "BASE_64",
                 is_pointer=is_pointer,
+                register=register,
             )
-            self.region.append(region)
+            self.push_region(region)
 
         return instructions
 
@@ -115,23 +130,27 @@ class MemoryManager:
     ) -> list[ASMInstruction]:
         instructions: list[ASMInstruction] = []
         parent_region = self.register_memory_region(name=decl_name, structure=declaration.structure)
-        for field_value, field_name in zip(
-            declaration.field_values, declaration.structure.names, strict=True
+        for field_id, (field_value, field_name) in enumerate(
+            zip(declaration.field_values, declaration.structure.names, strict=True)
         ):
             if isinstance(field_value, Variable) and isinstance(field_value.var_type, Structure):
                 insts, pointer_register = self.calculate_pointer(val=field_value)
                 instructions += insts
                 instructions += self.store_region(
-                    name=decl_name, val=pointer_register, store_to_main=False, is_pointer=True
+                    name=decl_name,
+                    val=pointer_register,
+                    store_to_main=False,
+                    is_pointer=True,
+                    field_id=field_id,
                 )
             else:
                 instructions += self.store_region(
-                    name=decl_name, val=field_value, store_to_main=False
+                    name=decl_name, val=field_value, store_to_main=False, field_id=field_id
                 )
             child_region = MemoryRegion(name=field_name, size_t=1, is_pointer=True, addr=-1)
             parent_region.nest_memory(child_region)
 
-        self.region.append(parent_region)
+        self.push_region(parent_region)
 
         return instructions
 
@@ -143,12 +162,9 @@ class MemoryManager:
         offset = self.calculate_region_offset(var_index)
         instructions += [
             DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
+                instruction_type=InstructionType.LEA,
                 register="rax",
-                data="rsp",
-            ),
-            MathLogicInstruction(
-                instruction_type=InstructionType.ADD, registers=("rax", str(offset))
+                data=f"[rbp - {offset}]",
             ),
         ]
         pointer_register = PseudoRegister(order=0, size=8)
@@ -158,59 +174,114 @@ class MemoryManager:
         self.scope_boundaries.append(self.current_scope_boundary)
         self.current_scope_boundary = len(self.region)
 
-    def deescalate(self) -> list[ASMInstruction]:
-        instructions: list[ASMInstruction] = []
-        for region in self.region[self.current_scope_boundary :]:
-            instructions += self.deallocate(region=region)
-            self.region = self.region[: len(self.region) - 1]
+    def deescalate(self):
+        while len(self.region) > self.current_scope_boundary:
+            self.pop_region()
         new_boundary = self.scope_boundaries.pop()
         self.current_scope_boundary = new_boundary
-        return instructions
 
-    def deallocate(self, region: MemoryRegion) -> list[ASMInstruction]:
-        instructions: list[ASMInstruction] = []
-        instructions += [
+    def allocate_frame(self) -> list[ASMInstruction]:
+        if self.frame_size == 0:
+            return []
+        # keeping rsp 16 byte aligned for the calls made from the frame
+        frame_size = (self.frame_size + self.frame_size % 2) * 8
+        return [
+            DataMoveInstruction(instruction_type=InstructionType.PUSH, register="rbp"),
+            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rbp", data="rsp"),
             MathLogicInstruction(
-                instruction_type=InstructionType.ADD, registers=("rsp", str(region.size_t * 8))
-            )
+                instruction_type=InstructionType.SUB, registers=("rsp", str(frame_size))
+            ),
         ]
 
-        return instructions
-
     def register_memory_region(
-        self, name: str, structure: Structure | str, is_pointer: bool = False
+        self,
+        name: str,
+        structure: Structure | str,
+        is_pointer: bool = False,
+        register: str | None = None,
     ):
         current_index: int = len(self.region)
         size_t: int
-        if isinstance(structure, Structure):
+        if isinstance(structure, Structure) or register is not None:
             size_t = 0
         else:
             size_t = 1
-        return MemoryRegion(name=name, addr=current_index, size_t=size_t, is_pointer=is_pointer)
+        return MemoryRegion(
+            name=name,
+            addr=current_index,
+            size_t=size_t,
+            is_pointer=is_pointer,
+            register=register,
+        )
+
+    def push_region(self, region: MemoryRegion):
+        self.region_ids.setdefault(region.name, len(self.region))
+        self.region.append(region)
+        self.region_offsets.append(self.region_offsets[-1] + region.size_t)
+        self.frame_size = max(self.frame_size, self.region_offsets[-1])
+
+    def pop_region(self) -> MemoryRegion:
+        region = self.region.pop()
+        self.region_offsets.pop()
+        if self.region_ids.get(region.name) == len(self.region):
+            del self.region_ids[region.name]
+        return region
 
     def get_region_index(self, varname: str) -> int | None:
-        try:
-            variable_position = list(filter(lambda n: n.name == varname, self.region))[0]
-            return variable_position.addr
-        except IndexError:
+        region_id = self.region_ids.get(varname)
+        if region_id is None:
             return None
+        return self.region[region_id].addr
 
     def calculate_region_offset(self, variable_id: int) -> int:
-        total_stack_size: int = 0
-        for var in self.region:
-            total_stack_size += var.size_t
-        cumulative_size: int = 0
-        for var in self.region[:variable_id]:
-            cumulative_size += var.size_t
-        offset = (total_stack_size - cumulative_size - 1) * 8
+        cumulative_size = self.region_offsets[min(variable_id, len(self.region))]
+        offset = (cumulative_size + 1) * 8
+        return offset
+
+    def calculate_free_offset(self, field_id: int = 0) -> int:
+        offset = (self.region_offsets[-1] + field_id + 1) * 8
         return offset
 
-    def debug_memory(self) -> list[ASMInstruction]:
+    def get_allocated_register(self, varname: str) -> str | None:
+        if self.allocation is None:
+            return None
+        return self.allocation.variables.get(varname)
+
+    def locate(self, val: str | PseudoRegister | Variable) -> str:
+        """Operand text of a value: a physical register, a stack slot or an immediate"""
+        if isinstance(val, str):
+            return val
+        if isinstance(val, PseudoRegister):
+            if self.allocation is not None:
+                if (register := self.allocation.registers.get(val.name)) is not None:
+                    return register
+                if (spill_slot := self.allocation.spill_slots.get(val.name)) is not None:
+                    return dereference_offset((spill_slot + 1) * 8)
+            return X86_64_REGISTER_SCHEMA[val.name]
+        region_id = self.region_ids.get(val.name)
+        if region_id is None:
+            raise Exception("Unreachable")
+        return self.locate_region(region_id)
+
+    def locate_region(self, region_id: int) -> str:
+        region = self.region[region_id]
+        if region.register is not None:
+            return region.register
+        return dereference_offset(self.calculate_region_offset(region.addr))
+
+    def debug_memory(self, varnames: list[str] | None = None) -> list[ASMInstruction]:
+        """Print the variables left in memory, or the given ones that are, in the given order
+
+        Passes may add variables of their own, naming the variables of the program keeps them
+        out of the output.
+        """
         instructions = []
-        for variable in self.region:
-            variable_id = self.get_region_index(variable.name)
+        if varnames is None:
+            varnames = [variable.name for variable in self.region]
+        for varname in varnames:
+            variable_id = self.region_ids.get(varname)
             if variable_id is None:
-                raise Exception("Unreachable")
+                continue
             instructions += [
                 DataMoveInstruction(
                     instruction_type=InstructionType.LEA,
@@ -220,7 +291,7 @@ class MemoryManager:
                 DataMoveInstruction(
                     instruction_type=InstructionType.MOV,
                     register="rsi",
-                    data=dereference_offset(self.calculate_region_offset(variable_id)),
+                    data=self.locate_region(variable_id),
                 ),
                 DataMoveInstruction(instruction_type=InstructionType.MOV, register="rax", data="0"),
                 CallInstruction(instruction_type=InstructionType.CALL, callee="printf"),
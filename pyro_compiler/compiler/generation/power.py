@@ -0,0 +1,76 @@
+from functools import cache
+
+
+# exponents up to which the shortest chain of multiplications is searched for, the others get
+# one squaring per binary digit and one multiplication per digit set
+MAX_CHAIN_EXPONENT = 128
+# powers a chain may keep at once besides the one left in rax: rbx, rcx and the target
+CHAIN_SLOTS = 3
+
+ChainT = tuple[tuple[int, int], ...]
+
+
+def get_binary_chain(exponent: int) -> ChainT:
+    """Multiplications going over the binary digits of the exponent from the highest one"""
+    steps: list[tuple[int, int]] = []
+    for digit in bin(exponent)[3:]:
+        steps.append((len(steps), len(steps)))
+        if digit == "1":
+            steps.append((len(steps), 0))
+    return tuple(steps)
+
+
+def is_stored(chain: ChainT, power: int) -> bool:
+    """Whether a power of the chain has to be kept, rather than only multiplied right after"""
+    if power == len(chain):
+        return True
+    return any(power in step for step in chain[power + 1 :])
+
+
+def count_stored_powers(chain: ChainT) -> int:
+    """Largest number of powers the chain keeps at once"""
+    stored = {0}
+    most = 1
+    for index in range(len(chain)):
+        stored = {power for power in stored if any(power in later for later in chain[index + 1 :])}
+        if is_stored(chain, index + 1):
+            stored.add(index + 1)
+        most = max(most, len(stored))
+    return most
+
+
+@cache
+def find_multiplication_chain(exponent: int) -> ChainT:
+    """Fewest multiplications raising a value to a positive exponent, within `CHAIN_SLOTS`.
+
+    Every step multiplies two powers of the chain given by their indexes, the value itself being
+    the power at index 0 and the result of a step the power following the ones before it. Chains
+    of exponents above `MAX_CHAIN_EXPONENT` go over the binary digits of the exponent.
+    """
+    binary_chain = get_binary_chain(exponent)
+    if exponent > MAX_CHAIN_EXPONENT:
+        return binary_chain
+    for length in range(exponent.bit_length() - 1, len(binary_chain)):
+        chain = _search_chain(exponent, [1], (), length)
+        if chain is not None:
+            return chain
+    return binary_chain
+
+
+def _search_chain(exponent: int, powers: list[int], chain: ChainT, left: int) -> ChainT | None:
+    """Depth first search of the chains adding the last power to one of the others"""
+    last = powers[-1]
+    if last == exponent:
+        return chain if count_stored_powers(chain) <= CHAIN_SLOTS else None
+    if left == 0 or last << left < exponent:
+        return None
+    for index in reversed(range(len(powers))):
+        power = last + powers[index]
+        if power > exponent:
+            continue
+        found = _search_chain(
+            exponent, powers + [power], chain + ((len(powers) - 1, index),), left - 1
+        )
+        if found is not None:
+            return found
+    return None
@@ -1,76 +1,32 @@
 from pyro_compiler.compiler.generation.utils import (
-    X86_64_REGISTER_SCHEMA,
     ASMInstruction,
     DataMoveInstruction,
     InstructionType,
-    dereference_offset,
+    is_register,
 )
-from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
 
 
-def store_from_register(
-    value: PseudoRegister, destination_offset: int | None = None
-) -> list[ASMInstruction]:
+def store_value(value: str, destination: str) -> list[ASMInstruction]:
     instructions: list[ASMInstruction] = []
 
-    if destination_offset is not None:
+    if value == destination:
+        return instructions
+    if is_register(value) or is_register(destination):
         instructions += [
             DataMoveInstruction(
                 instruction_type=InstructionType.MOV,
-                register=dereference_offset(destination_offset),
-                data=X86_64_REGISTER_SCHEMA[value.name],
+                register=destination,
+                data=value,
             )
         ]
     else:
         instructions += [
-            DataMoveInstruction(
-                instruction_type=InstructionType.PUSH,
-                register=X86_64_REGISTER_SCHEMA[value.name],
-            )
-        ]
-
-    return instructions
-
-
-def store_from_string(value: str, destination_offset: int | None = None) -> list[ASMInstruction]:
-    instructions: list[ASMInstruction] = []
-
-    instructions += [
-        DataMoveInstruction(instruction_type=InstructionType.MOV, register="rax", data=value),
-    ]
-    if destination_offset is not None:
-        instructions += [
+            DataMoveInstruction(instruction_type=InstructionType.MOV, register="rax", data=value),
             DataMoveInstruction(
                 instruction_type=InstructionType.MOV,
-                register=dereference_offset(destination_offset),
+                register=destination,
                 data="rax",
             ),
         ]
-    else:
-        instructions += [DataMoveInstruction(instruction_type=InstructionType.PUSH, register="rax")]
-
-    return instructions
-
-
-def store_from_variable(value: str, destination_offset: int | None) -> list[ASMInstruction]:
-    instructions: list[ASMInstruction] = []
-
-    instructions += [
-        DataMoveInstruction(
-            instruction_type=InstructionType.MOV,
-            register="rax",
-            data=value,
-        ),
-    ]
-    if destination_offset is not None:
-        instructions += [
-            DataMoveInstruction(
-                instruction_type=InstructionType.MOV,
-                register=dereference_offset(destination_offset),
-                data="rax",
-            )
-        ]
-    else:
-        instructions += [DataMoveInstruction(instruction_type=InstructionType.PUSH, register="rax")]
 
     return instructions
@@ -43,6 +43,9 @@ X86_64_REGISTER_SCHEMA: dict[str, str] = {
 }
 
 
+PHYSICAL_REGISTERS: frozenset[str] = frozenset(X86_64_REGISTER_SCHEMA.values())
+
+
 class InstructionType(Enum):
     LABEL = ""
     MOV = "mov"
@@ -151,4 +154,23 @@ class LabelInstruction(ASMInstruction):
 
 
 def dereference_offset(offset: int) -> str:
-    return f"QWORD [rsp + {offset}]"
+    return f"QWORD [rbp - {offset}]"
+
+
+def is_register(location: str) -> bool:
+    return location in PHYSICAL_REGISTERS
+
+
+def is_memory(location: str) -> bool:
+    return location.startswith("QWORD [")
+
+
+def is_wide_immediate(location: str) -> bool:
+    """Is `location` an immediate not fitting into a sign extended 32 bit instruction operand"""
+    if is_register(location) or is_memory(location):
+        return False
+    try:
+        value = int(location, 0)
+    except ValueError:
+        return False
+    return not -(2**31) <= value < 2**31
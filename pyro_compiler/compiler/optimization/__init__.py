@@ -0,0 +1,27 @@
+from .cfg import BasicBlock, ControlFlowGraph  # noqa F403
+from .dead_store_elimination import DeadStoreElimination  # noqa F403
+from .ssa import SSAConstruction, SSADestruction, SSAForm, SSAVerifier  # noqa F403
+from .constant_propagation import ConstantPropagation  # noqa F403
+from .value_numbering import ValueNumbering  # noqa F403
+from .loops import Loop, find_loops  # noqa F403
+from .licm import LoopInvariantCodeMotion  # noqa F403
+from .induction_variables import (  # noqa F403
+    InductionVariable,
+    StrengthReduction,
+    find_induction_variables,
+)
+from .unrolling import (  # noqa F403
+    DEFAULT_UNROLL_BUDGET,
+    DEFAULT_UNROLL_FACTOR,
+    CountedLoop,
+    LoopUnrolling,
+    find_counted_loop,
+)
+from .pass_manager import (  # noqa F403
+    AVAILABLE_PASSES,
+    DUMP_NAMES,
+    OPTIMIZATION_PIPELINES,
+    OptimizationLevel,
+    PassManager,
+)
+from .passes import RepresentationPass, SSAPass  # noqa F403
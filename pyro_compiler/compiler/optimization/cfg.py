@@ -0,0 +1,398 @@
+from dataclasses import dataclass, field
+
+from pyro_compiler.compiler.optimization.liveness import JUMP_COMMANDS
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.label import Label
+from pyro_compiler.compiler.representation.phi import Phi
+from pyro_compiler.compiler.representation.representation import Representation
+
+
+@dataclass
+class BasicBlock:
+    """Commands always running one after another, only the last one may jump.
+
+    Fields:
+        - `block_id[int]`: number of the block, unique within its graph
+        - `commands[list[Command]]`: commands of the block, the jump ending it included
+        - `label[Label | None]`: label placed before the block, if anything jumps to it
+        - `successors[list[int]]`: blocks control may go to after the block
+        - `predecessors[list[int]]`: blocks control may come from
+        - `fallthrough[int | None]`: block reached when the block does not jump, None for the
+          blocks ending with `JMP` and for the last one
+
+    """
+
+    block_id: int
+    commands: list[Command] = field(default_factory=list)
+    label: Label | None = None
+    successors: list[int] = field(default_factory=list)
+    predecessors: list[int] = field(default_factory=list)
+    fallthrough: int | None = None
+
+    @property
+    def terminator(self) -> Command | None:
+        """Jump ending the block, None when the block falls through"""
+        if self.commands and self.commands[-1].operation in JUMP_COMMANDS:
+            return self.commands[-1]
+        return None
+
+    def __str__(self) -> str:
+        return f"block {self.block_id}"
+
+
+class ControlFlowGraph:
+    """Basic blocks of a representation and the jumps between them.
+
+    Blocks are kept in the order they are placed in the command list, the first one being the
+    entry of the program. `linearize` writes the blocks back into the representation, placing
+    labels and the jumps that are needed for the blocks to follow each other as before.
+
+    Fields:
+        - `representation[Representation]`: representation the graph is built from
+        - `blocks[dict[int, BasicBlock]]`: blocks by their number, in the order they are placed
+        - `label_blocks[dict[str, int]]`: block every label name leads to
+
+    """
+
+    def __init__(self, representation: Representation):
+        self.representation = representation
+        self.blocks: dict[int, BasicBlock] = {}
+        self.label_blocks: dict[str, int] = {}
+        # commands are kept alive for their ids to stay unique, scopes are moved through them
+        self._original_commands = list(representation.commands)
+        self._original_positions = {
+            id(command): command_id for command_id, command in enumerate(self._original_commands)
+        }
+        self._scope_bounds = [
+            (scope.beginning_line, scope.ending_line) for scope in representation.scopes
+        ]
+        self._build()
+        self._next_block_id = len(self.blocks)
+
+    @property
+    def entry(self) -> BasicBlock:
+        return next(iter(self.blocks.values()))
+
+    def get_block(self, block_id: int) -> BasicBlock:
+        return self.blocks[block_id]
+
+    def add_block(self, commands: list[Command], before: int | None = None) -> BasicBlock:
+        """New block with the given commands, placed before the block `before` or at the end"""
+        block = BasicBlock(block_id=self._next_block_id, commands=commands)
+        self._next_block_id += 1
+        if before is None:
+            self.blocks[block.block_id] = block
+            return block
+        blocks = list(self.blocks.values())
+        position = blocks.index(self.blocks[before])
+        blocks.insert(position, block)
+        self.blocks = {placed.block_id: placed for placed in blocks}
+        return block
+
+    def add_edge(self, source: int, target: int):
+        if target not in self.blocks[source].successors:
+            self.blocks[source].successors.append(target)
+            self.blocks[target].predecessors.append(source)
+
+    def remove_edge(self, source: int, target: int):
+        if target in self.blocks[source].successors:
+            self.blocks[source].successors.remove(target)
+            self.blocks[target].predecessors.remove(source)
+        if self.blocks[source].fallthrough == target:
+            self.blocks[source].fallthrough = None
+
+    def remove_block(self, block_id: int):
+        block = self.blocks[block_id]
+        for successor in list(block.successors):
+            self.remove_edge(block_id, successor)
+        for predecessor in list(block.predecessors):
+            self.remove_edge(predecessor, block_id)
+        del self.blocks[block_id]
+        for label_name in [
+            name for name, target in self.label_blocks.items() if target == block_id
+        ]:
+            del self.label_blocks[label_name]
+
+    def split_edge(self, source: int, target: int) -> BasicBlock:
+        """New empty block on the edge from `source` to `target`
+
+        The block is placed right after `source` when control falls through along the edge, and
+        before `target` when `source` jumps there. Phis of `target` are pointed at the block.
+        """
+        source_block = self.blocks[source]
+        if source_block.fallthrough == target:
+            placed = list(self.blocks)
+            position = placed.index(source) + 1
+            block = self.add_block([], before=placed[position] if position < len(placed) else None)
+            source_block.fallthrough = block.block_id
+        else:
+            block = self.add_block([], before=target)
+            terminator = source_block.terminator
+            if terminator is None:
+                raise Exception("Unreachable")
+            source_block.commands[-1] = Command(
+                operation=terminator.operation, operand_a=self.get_block_label(block.block_id)
+            )
+        target_block = self.blocks[target]
+        source_block.successors[source_block.successors.index(target)] = block.block_id
+        target_block.predecessors[target_block.predecessors.index(source)] = block.block_id
+        block.successors = [target]
+        block.predecessors = [source]
+        block.fallthrough = target
+        for command in target_block.commands:
+            if isinstance(command.operand_a, Phi) and source in command.operand_a.sources:
+                command.operand_a.sources[block.block_id] = command.operand_a.sources.pop(source)
+        return block
+
+    def redirect_edge(self, source: int, target: int, new_target: int):
+        """Make `source` go to `new_target` where it used to go to `target`"""
+        source_block = self.blocks[source]
+        is_fallthrough = source_block.fallthrough == target
+        terminator = source_block.terminator
+        if terminator is not None and self.get_jump_block(terminator) == target:
+            source_block.commands[-1] = Command(
+                operation=terminator.operation, operand_a=self.get_block_label(new_target)
+            )
+        self.remove_edge(source, target)
+        self.add_edge(source, new_target)
+        if is_fallthrough:
+            source_block.fallthrough = new_target
+
+    def get_jump_block(self, command: Command) -> int | None:
+        """Block a jump command goes to, None for the commands that are not jumps"""
+        if command.operation not in JUMP_COMMANDS or not isinstance(command.operand_a, Label):
+            return None
+        return self.label_blocks.get(command.operand_a.name)
+
+    def get_block_label(self, block_id: int) -> Label:
+        """Label placed before the block, created when nothing jumped to the block before"""
+        block = self.blocks[block_id]
+        if block.label is None:
+            name = f"{self.representation.block_name}_block_{block_id}"
+            # labels of the graphs built before may have taken the name
+            while name in self.label_blocks or name in self.representation.labels:
+                name += "_"
+            label = Label(name=name)
+            self.representation.labels[label.name] = label
+            self.label_blocks[label.name] = block_id
+            block.label = label
+        return block.label
+
+    def reverse_postorder(self) -> list[int]:
+        """Blocks reachable from the entry, every block placed before its successors
+
+        Blocks closing loops are the only ones placed after some of their successors.
+        """
+        visited: set[int] = {self.entry.block_id}
+        postorder: list[int] = []
+        stack: list[tuple[int, int]] = [(self.entry.block_id, 0)]
+        while stack:
+            block_id, successor_id = stack.pop()
+            successors = self.blocks[block_id].successors
+            if successor_id < len(successors):
+                stack.append((block_id, successor_id + 1))
+                successor = successors[successor_id]
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, 0))
+            else:
+                postorder.append(block_id)
+        return postorder[::-1]
+
+    def remove_unreachable_blocks(self) -> int:
+        """Delete the blocks control never gets to, returning how many were deleted"""
+        reachable = set(self.reverse_postorder())
+        unreachable = [block_id for block_id in self.blocks if block_id not in reachable]
+        for block_id in unreachable:
+            self.remove_block(block_id)
+        return len(unreachable)
+
+    def compute_dominators(self) -> dict[int, int]:
+        """Immediate dominator of every reachable block, the entry being its own dominator
+
+        Uses the iterative algorithm of Cooper, Harvey and Kennedy over the reverse postorder.
+        """
+        order = self.reverse_postorder()
+        order_ids = {block_id: i for i, block_id in enumerate(order)}
+        entry_id = self.entry.block_id
+        dominators: dict[int, int] = {entry_id: entry_id}
+
+        def intersect(first: int, second: int) -> int:
+            while first != second:
+                while order_ids[first] > order_ids[second]:
+                    first = dominators[first]
+                while order_ids[second] > order_ids[first]:
+                    second = dominators[second]
+            return first
+
+        is_changed = True
+        while is_changed:
+            is_changed = False
+            for block_id in order[1:]:
+                processed = [
+                    predecessor
+                    for predecessor in self.blocks[block_id].predecessors
+                    if predecessor in dominators
+                ]
+                dominator = processed[0]
+                for predecessor in processed[1:]:
+                    dominator = intersect(predecessor, dominator)
+                if dominators.get(block_id) != dominator:
+                    dominators[block_id] = dominator
+                    is_changed = True
+        return dominators
+
+    def compute_dominance_frontiers(self) -> dict[int, list[int]]:
+        """Blocks where the dominance of every reachable block ends
+
+        A block is in the frontier of another one when it has a predecessor dominated by it
+        without being strictly dominated by it itself, it is where values defined in the other
+        block meet values coming from elsewhere.
+        """
+        dominators = self.compute_dominators()
+        frontiers: dict[int, list[int]] = {block_id: [] for block_id in dominators}
+        for block_id in dominators:
+            predecessors = [
+                predecessor
+                for predecessor in self.blocks[block_id].predecessors
+                if predecessor in dominators
+            ]
+            if len(predecessors) < 2:
+                continue
+            for predecessor in predecessors:
+                runner = predecessor
+                while runner != dominators[block_id]:
+                    if block_id not in frontiers[runner]:
+                        frontiers[runner].append(block_id)
+                    if dominators[runner] == runner:
+                        break
+                    runner = dominators[runner]
+        return frontiers
+
+    def compute_dominator_tree(self) -> dict[int, list[int]]:
+        """Blocks immediately dominated by every reachable block, in the reverse postorder"""
+        dominators = self.compute_dominators()
+        tree: dict[int, list[int]] = {block_id: [] for block_id in dominators}
+        for block_id in self.reverse_postorder():
+            dominator = dominators[block_id]
+            if dominator != block_id:
+                tree[dominator].append(block_id)
+        return tree
+
+    def dominates(self, dominators: dict[int, int], dominator: int, block_id: int) -> bool:
+        """Whether every path from the entry to `block_id` goes through `dominator`"""
+        while True:
+            if block_id == dominator:
+                return True
+            if dominators[block_id] == block_id:
+                return False
+            block_id = dominators[block_id]
+
+    def linearize(self):
+        """Write the blocks back into the representation as a flat command list
+
+        Jumps are added where a block used to fall through to a block that is no longer placed
+        after it, and every jump is pointed at the single label placed before its block.
+        """
+        commands: list[Command] = []
+        block_positions: dict[int, int] = {}
+        blocks = list(self.blocks.values())
+        for i, block in enumerate(blocks):
+            block_positions[block.block_id] = len(commands)
+            commands += block.commands
+            following = blocks[i + 1].block_id if i + 1 < len(blocks) else None
+            if block.fallthrough is not None and block.fallthrough != following:
+                label = self.get_block_label(block.fallthrough)
+                commands.append(Command(operation=CommandType.JMP, operand_a=label))
+
+        labels: dict[str, Label] = {}
+        for block in blocks:
+            if block.label is not None:
+                block.label.position = block_positions[block.block_id]
+                labels[block.label.name] = block.label
+        for command in commands:
+            if command.operation in JUMP_COMMANDS and isinstance(command.operand_a, Label):
+                block_id = self.label_blocks[command.operand_a.name]
+                command.operand_a = self.get_block_label(block_id)
+                labels[command.operand_a.name] = command.operand_a
+                command.operand_a.position = block_positions[block_id]
+        self.representation.labels = labels
+        self._move_scopes(commands)
+        self.representation.commands = commands
+        # empty blocks leave their labels on the command of the block following them
+        self.representation.clear_labels()
+
+    def pprint(self) -> str:
+        header = f"{self.representation.block_name} blocks:" + "\n"
+        for block in self.blocks.values():
+            successors = ", ".join(str(successor) for successor in block.successors)
+            header += f"{block} -> [{successors}]" + "\n"
+            if block.label is not None:
+                header += str(block.label) + "\n"
+            for command in block.commands:
+                header += "   " + str(command) + "\n"
+        return header
+
+    def _build(self):
+        commands = self.representation.commands
+        labels_at: dict[int, list[Label]] = {}
+        for label in self.representation.labels.values():
+            if 0 <= label.position <= len(commands):
+                labels_at.setdefault(label.position, []).append(label)
+
+        leaders = {0} | set(labels_at)
+        for command_id, command in enumerate(commands):
+            if command.operation in JUMP_COMMANDS:
+                leaders.add(command_id + 1)
+        # the end of the program is a block of its own only when something jumps there
+        if len(commands) not in labels_at:
+            leaders.discard(len(commands))
+        leaders.add(0)
+
+        starts = sorted(leaders)
+        for block_id, start in enumerate(starts):
+            end = starts[block_id + 1] if block_id + 1 < len(starts) else len(commands)
+            block = BasicBlock(block_id=block_id, commands=commands[start:end])
+            placed_labels = labels_at.get(start, [])
+            if placed_labels:
+                block.label = placed_labels[0]
+            for label in placed_labels:
+                self.label_blocks[label.name] = block_id
+            self.blocks[block_id] = block
+
+        for block_id, block in self.blocks.items():
+            following = block_id + 1 if block_id + 1 in self.blocks else None
+            terminator = block.terminator
+            if terminator is None or terminator.operation != CommandType.JMP:
+                block.fallthrough = following
+                if following is not None:
+                    self.add_edge(block_id, following)
+            if terminator is not None:
+                target = self.get_jump_block(terminator)
+                if target is None:
+                    raise Exception(f"Jump to an unknown label in {terminator}")
+                self.add_edge(block_id, target)
+
+    def _move_scopes(self, commands: list[Command]):
+        """Point the scopes at the kept commands they used to contain
+
+        Commands added by passes count as being where the command before them used to be.
+        """
+        original_count = len(self._original_commands)
+        positions: list[int] = []
+        last_position = 0
+        for command in commands:
+            last_position = self._original_positions.get(id(command), last_position)
+            positions.append(last_position)
+        for scope, (beginning, ending) in zip(self.representation.scopes, self._scope_bounds):
+            scope.beginning_line = next(
+                (i for i, position in enumerate(positions) if position >= beginning),
+                len(commands),
+            )
+            if ending >= original_count:
+                scope.ending_line = len(commands)
+            else:
+                scope.ending_line = max(
+                    (i for i, position in enumerate(positions) if position <= ending),
+                    default=-1,
+                )
@@ -0,0 +1,364 @@
+from enum import Enum, auto
+
+from pyro_compiler.compiler.optimization.cfg import BasicBlock
+from pyro_compiler.compiler.optimization.passes import SSAPass
+from pyro_compiler.compiler.optimization.ssa import SSAForm, get_phis
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.phi import Phi
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+WORD_MASK = 2**64 - 1
+
+
+class Lattice(Enum):
+    UNKNOWN = auto()
+    VARYING = auto()
+
+
+ValueT = int | Lattice
+
+
+def to_signed(value: int) -> int:
+    """Value of a 64 bit word read as a two's complement number"""
+    value &= WORD_MASK
+    return value - 2**64 if value >= 2**63 else value
+
+
+def parse_constant(value: str) -> int | None:
+    try:
+        return to_signed(int(value))
+    except ValueError:
+        return None
+
+
+def meet(first: ValueT, second: ValueT) -> ValueT:
+    if first == Lattice.UNKNOWN:
+        return second
+    if second == Lattice.UNKNOWN:
+        return first
+    if first == second:
+        return first
+    return Lattice.VARYING
+
+
+def fold(operation: CommandType, operand_a: int, operand_b: int | None) -> int | None:
+    """Value of an operation over known operands, as the generated code computes it
+
+    Division is unsigned like `div`, comparisons are signed like `setg` and the others, and shift
+    counts are masked like `shl` does. None is returned for the operations that are left to run,
+    like division by zero.
+    """
+    if operand_b is None:
+        match operation:
+            case CommandType.NOT | CommandType.BIT_NOT:
+                return to_signed(~operand_a)
+            case _:
+                return None
+    unsigned_a, unsigned_b = operand_a & WORD_MASK, operand_b & WORD_MASK
+    match operation:
+        case CommandType.SUM:
+            return to_signed(operand_a + operand_b)
+        case CommandType.SUB:
+            return to_signed(operand_a - operand_b)
+        case CommandType.MUL:
+            return to_signed(operand_a * operand_b)
+        case CommandType.POV:
+            # the exponent is unsigned like the loop going over its binary digits
+            return to_signed(pow(operand_a, unsigned_b, 2**64))
+        case CommandType.DIV | CommandType.FLOOR:
+            return to_signed(unsigned_a // unsigned_b) if unsigned_b != 0 else None
+        case CommandType.REMAIN:
+            return to_signed(unsigned_a % unsigned_b) if unsigned_b != 0 else None
+        case CommandType.AND | CommandType.BIT_AND:
+            return to_signed(operand_a & operand_b)
+        case CommandType.OR | CommandType.BIT_OR:
+            return to_signed(operand_a | operand_b)
+        case CommandType.BIT_XOR:
+            return to_signed(operand_a ^ operand_b)
+        case CommandType.BIT_SHL:
+            return to_signed(operand_a << (operand_b & 63))
+        case CommandType.BIT_SHR:
+            return to_signed(unsigned_a >> (operand_b & 63))
+        case CommandType.EQ:
+            return int(operand_a == operand_b)
+        case CommandType.NEQ:
+            return int(operand_a != operand_b)
+        case CommandType.GT:
+            return int(operand_a > operand_b)
+        case CommandType.GTE:
+            return int(operand_a >= operand_b)
+        case CommandType.LT:
+            return int(operand_a < operand_b)
+        case CommandType.LTE:
+            return int(operand_a <= operand_b)
+        case _:
+            return None
+
+
+def is_jump_taken(operation: CommandType, operand_a: int, operand_b: int) -> bool:
+    """Whether a conditional jump following `CMP operand_a, operand_b` is taken"""
+    match operation:
+        case CommandType.JE | CommandType.JZ:
+            return operand_a == operand_b
+        case CommandType.JNE:
+            return operand_a != operand_b
+        case CommandType.JG:
+            return operand_a > operand_b
+        case CommandType.JGE:
+            return operand_a >= operand_b
+        case CommandType.JL:
+            return operand_a < operand_b
+        case CommandType.JLE:
+            return operand_a <= operand_b
+        case _:
+            raise Exception("Unreachable")
+
+
+class ConstantPropagation(SSAPass):
+    """Sparse conditional constant propagation over an SSA form.
+
+    Versions of variables start unknown and are lowered to a constant or to varying, following
+    only the edges the branches may take given what is known so far (Wegman and Zadeck). Pseudo
+    registers only live within a block, so they are evaluated while going over it.
+
+    Operations with known operands are replaced with their values, branches with known conditions
+    with the jump they take, and the blocks no longer reached are removed, along with the jumps to
+    the blocks placed right after.
+    """
+
+    name = "sccp"
+    statistic = "folded"
+
+    def __call__(self, ssa: SSAForm) -> int:
+        self.ssa = ssa
+        self.values: dict[str, ValueT] = {}
+        self.executable_edges: set[tuple[int, int]] = set()
+        executable_blocks: set[int] = set()
+        users = self._get_users()
+
+        worklist = [ssa.cfg.entry.block_id]
+        while worklist:
+            block_id = worklist.pop()
+            executable_blocks.add(block_id)
+            changed, successors = self._evaluate_block(ssa.cfg.blocks[block_id])
+            for varname in changed:
+                worklist += [user for user in users.get(varname, ()) if user in executable_blocks]
+            for successor in successors:
+                if (block_id, successor) not in self.executable_edges:
+                    self.executable_edges.add((block_id, successor))
+                    worklist.append(successor)
+
+        folded_count = 0
+        for block_id in executable_blocks:
+            folded_count += self._rewrite_block(ssa.cfg.blocks[block_id])
+        for block_id in list(ssa.cfg.blocks):
+            if block_id not in executable_blocks:
+                folded_count += len(ssa.cfg.blocks[block_id].commands)
+                ssa.cfg.remove_block(block_id)
+        ssa.cfg.remove_unreachable_blocks()
+        for block in ssa.cfg.blocks.values():
+            for phi_command in get_phis(block):
+                phi: Phi = phi_command.operand_a  # type: ignore
+                phi.sources = {
+                    predecessor: source
+                    for predecessor, source in phi.sources.items()
+                    if predecessor in block.predecessors
+                }
+        return folded_count + self._remove_jumps_to_following_blocks()
+
+    def _remove_jumps_to_following_blocks(self) -> int:
+        """Let blocks fall through to the blocks placed right after them instead of jumping"""
+        removed_count = 0
+        blocks = list(self.ssa.cfg.blocks.values())
+        for block, following in zip(blocks, blocks[1:]):
+            terminator = block.terminator
+            if (
+                terminator is not None
+                and terminator.operation == CommandType.JMP
+                and self.ssa.cfg.get_jump_block(terminator) == following.block_id
+            ):
+                block.commands = block.commands[:-1]
+                block.fallthrough = following.block_id
+                removed_count += 1
+        return removed_count
+
+    def _get_users(self) -> dict[str, set[int]]:
+        """Blocks reading every version, phis included"""
+        users: dict[str, set[int]] = {}
+        for block_id, block in self.ssa.cfg.blocks.items():
+            for command in block.commands:
+                operands: list[object] = [command.operand_a, command.operand_b]
+                if isinstance(command.operand_a, Phi):
+                    operands = list(command.operand_a.sources.values())
+                for operand in operands:
+                    if isinstance(operand, Variable):
+                        users.setdefault(operand.name, set()).add(block_id)
+        return users
+
+    def _get_value(self, operand: object, registers: dict[str, ValueT]) -> ValueT:
+        if isinstance(operand, str):
+            constant = parse_constant(operand)
+            return Lattice.VARYING if constant is None else constant
+        if isinstance(operand, PseudoRegister):
+            return registers.get(operand.name, Lattice.VARYING)
+        if isinstance(operand, Variable) and operand.name in self.ssa.origins:
+            return self.values.get(operand.name, Lattice.UNKNOWN)
+        return Lattice.VARYING
+
+    def _evaluate(self, command: Command, registers: dict[str, ValueT]) -> ValueT:
+        if command.operation == CommandType.PHI:
+            value: ValueT = Lattice.UNKNOWN
+            for predecessor, source in command.operand_a.sources.items():  # type: ignore
+                if (predecessor, self._block_id) in self.executable_edges:
+                    value = meet(value, self._get_value(source, registers))
+            return value
+        if command.operation == CommandType.STORE:
+            return self._get_value(command.operand_a, registers)
+        operand_a = self._get_value(command.operand_a, registers)
+        operand_b: ValueT | None = None
+        if command.operation == CommandType.CONVERT:
+            # conversions to bool are generated as comparisons with zero
+            operand_b = 0
+        elif command.operand_b is not None:
+            operand_b = self._get_value(command.operand_b, registers)
+        if Lattice.VARYING in (operand_a, operand_b):
+            return Lattice.VARYING
+        if Lattice.UNKNOWN in (operand_a, operand_b):
+            return Lattice.UNKNOWN
+        operation = (
+            CommandType.GT if command.operation == CommandType.CONVERT else command.operation
+        )
+        value = fold(operation, operand_a, operand_b)  # type: ignore
+        return Lattice.VARYING if value is None else value
+
+    def _evaluate_block(self, block: BasicBlock) -> tuple[list[str], list[int]]:
+        """Lower the versions assigned in the block, returning them and the edges control takes"""
+        self._block_id = block.block_id
+        registers: dict[str, ValueT] = {}
+        changed: list[str] = []
+        comparison: tuple[ValueT, ValueT] | None = None
+        for command in block.commands:
+            if command.operation == CommandType.CMP:
+                comparison = (
+                    self._get_value(command.operand_a, registers),
+                    self._get_value(command.operand_b, registers),
+                )
+                continue
+            if command.target is None:
+                continue
+            value = self._evaluate(command, registers)
+            if isinstance(command.target, PseudoRegister):
+                registers[command.target.name] = value
+            elif command.target.name in self.ssa.origins:
+                previous = self.values.get(command.target.name, Lattice.UNKNOWN)
+                lowered = meet(previous, value)
+                if lowered != previous:
+                    self.values[command.target.name] = lowered
+                    changed.append(command.target.name)
+        return changed, self._get_taken_successors(block, comparison)
+
+    def _get_taken_successors(
+        self, block: BasicBlock, comparison: tuple[ValueT, ValueT] | None
+    ) -> list[int]:
+        terminator = block.terminator
+        if terminator is None or terminator.operation == CommandType.JMP or comparison is None:
+            return list(block.successors)
+        if Lattice.VARYING in comparison:
+            return list(block.successors)
+        if Lattice.UNKNOWN in comparison:
+            return []
+        jump_block = self.ssa.cfg.get_jump_block(terminator)
+        if is_jump_taken(terminator.operation, *comparison):  # type: ignore
+            return [jump_block] if jump_block is not None else []
+        return [block.fallthrough] if block.fallthrough is not None else []
+
+    def _substitute(self, operand: object, registers: dict[str, ValueT]) -> object:
+        if isinstance(operand, PseudoRegister | Variable):
+            value = self._get_value(operand, registers)
+            if isinstance(value, int):
+                return str(value)
+        return operand
+
+    def _rewrite_block(self, block: BasicBlock) -> int:
+        """Replace what is known in the block with constants, returning how many commands were"""
+        self._block_id = block.block_id
+        registers: dict[str, ValueT] = {}
+        commands: list[Command] = []
+        folded_count = 0
+        for command in block.commands:
+            # phis are kept even when known, their versions end up sharing a name without copies
+            if command.operation == CommandType.PHI:
+                commands.append(command)
+                continue
+            if command.operation == CommandType.CMP or command.target is None:
+                commands.append(command)
+                continue
+
+            value = self._evaluate(command, registers)
+            if isinstance(value, int) and (
+                isinstance(command.target, PseudoRegister)
+                or command.target.name in self.ssa.origins
+            ):
+                if isinstance(command.target, PseudoRegister):
+                    registers[command.target.name] = value
+                    folded_count += 1
+                    continue
+                if command.operation != CommandType.STORE or command.operand_a != str(value):
+                    folded_count += 1
+                commands.append(
+                    Command(
+                        operation=CommandType.STORE, target=command.target, operand_a=str(value)
+                    )
+                )
+                continue
+            # operands are read before the target is overwritten, like `r8 = SUM r8, r9` does
+            if command.operation != CommandType.CONVERT:
+                command.operand_a = self._substitute(command.operand_a, registers)  # type: ignore
+            operand_b = self._substitute(command.operand_b, registers)
+            if isinstance(operand_b, str) and command.operation in (
+                CommandType.BIT_SHL,
+                CommandType.BIT_SHR,
+            ):
+                operand_b = str(int(operand_b) & 63)
+            command.operand_b = operand_b  # type: ignore
+            if isinstance(command.target, PseudoRegister):
+                registers[command.target.name] = value
+            commands.append(command)
+
+        block.commands = commands
+        return folded_count + self._resolve_branch(block, registers)
+
+    def _resolve_branch(self, block: BasicBlock, registers: dict[str, ValueT]) -> int:
+        """Turn a conditional jump of the block into the path it always takes, if it does"""
+        terminator = block.terminator
+        if terminator is None or terminator.operation == CommandType.JMP or len(block.commands) < 2:
+            for command in block.commands:
+                if command.operation == CommandType.CMP:
+                    command.operand_a = self._substitute(command.operand_a, registers)  # type: ignore
+                    command.operand_b = self._substitute(command.operand_b, registers)  # type: ignore
+            return 0
+        comparison_command = block.commands[-2]
+        if comparison_command.operation != CommandType.CMP:
+            return 0
+        taken = [
+            successor
+            for successor in block.successors
+            if (block.block_id, successor) in self.executable_edges
+        ]
+        jump_block = self.ssa.cfg.get_jump_block(terminator)
+        if len(taken) != 1 or jump_block == block.fallthrough:
+            comparison_command.operand_a = self._substitute(comparison_command.operand_a, registers)  # type: ignore
+            comparison_command.operand_b = self._substitute(comparison_command.operand_b, registers)  # type: ignore
+            return 0
+
+        if taken[0] == jump_block and block.fallthrough is not None:
+            self.ssa.cfg.remove_edge(block.block_id, block.fallthrough)
+            block.commands[-2:] = [
+                Command(operation=CommandType.JMP, operand_a=terminator.operand_a)
+            ]
+        elif jump_block is not None:
+            self.ssa.cfg.remove_edge(block.block_id, jump_block)
+            block.commands = block.commands[:-2]
+        return 2
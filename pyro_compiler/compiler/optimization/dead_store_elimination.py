@@ -0,0 +1,58 @@
+from pyro_compiler.compiler.optimization.liveness import (
+    compute_liveness,
+    get_memory_bound_variables,
+    get_value_key,
+)
+from pyro_compiler.compiler.optimization.passes import RepresentationPass
+from pyro_compiler.compiler.representation.command import CommandType
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+class DeadStoreElimination(RepresentationPass):
+    """Removes the commands computing values that are never read.
+
+    A `STORE` to a variable that is overwritten before being read is dropped, and so is the
+    arithmetic that fed it once nothing else reads its result. The variables of the outermost
+    scope are the outcome of the program, so their last values are kept.
+    """
+
+    name = "dse"
+    statistic = "removed"
+
+    def __call__(self, representation: Representation) -> int:
+        bound_variables = get_memory_bound_variables(representation)
+        live_out = set(representation.scopes[0].variable_table) if representation.scopes else set()
+        removed_count = 0
+        while True:
+            live_after = compute_liveness(representation, bound_variables, live_out=live_out)
+            declarations = self._get_declarations(representation)
+            dead_commands = {
+                command_id
+                for command_id, command in enumerate(representation.commands)
+                if (key := get_value_key(command.target, bound_variables)) is not None
+                and key not in live_after[command_id]
+                and command_id not in declarations
+            }
+            if not dead_commands:
+                return removed_count
+            representation.remove_commands(dead_commands)
+            removed_count += len(dead_commands)
+
+    def _get_declarations(self, representation: Representation) -> set[int]:
+        """Positions of the first stores to the variables that are referenced elsewhere
+
+        The stack slot of a variable is taken in the scope of its first store, so these stores
+        are kept even when dead, for the slot to outlive the nested scopes reading the variable.
+        """
+        first_stores: dict[str, int] = {}
+        references: dict[str, int] = {}
+        for command_id, command in enumerate(representation.commands):
+            for value in (command.target, command.operand_a, command.operand_b):
+                if isinstance(value, Variable):
+                    references[value.name] = references.get(value.name, 0) + 1
+            if command.operation == CommandType.STORE and isinstance(command.target, Variable):
+                first_stores.setdefault(command.target.name, command_id)
+        return {
+            command_id for varname, command_id in first_stores.items() if references[varname] > 1
+        }
@@ -0,0 +1,484 @@
+from collections import Counter
+from dataclasses import dataclass, field
+
+from pyro_compiler.compiler.optimization.constant_propagation import parse_constant, to_signed
+from pyro_compiler.compiler.optimization.loops import (
+    Loop,
+    append_to_block,
+    find_loops,
+    get_assigned_versions,
+    get_preheader,
+)
+from pyro_compiler.compiler.optimization.passes import SSAPass
+from pyro_compiler.compiler.optimization.ssa import SSAForm, get_phis
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.phi import Phi
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+# products of induction variables compared instead of them have to stay far from overflowing
+COMPARISON_LIMIT = 2**62
+
+
+@dataclass
+class InductionVariable:
+    """Variable of a loop changed by the same constant on every iteration.
+
+    Fields:
+        - `version[Variable]`: version the phi of the header gives the variable
+        - `initial[Variable | str]`: value the loop is entered with
+        - `step[int]`: value added to the variable on every iteration
+        - `update[Variable]`: version the latch goes back to the header with
+        - `block[int]`: block computing the update
+        - `commands[list[Command]]`: commands computing the update, its store included
+
+    """
+
+    version: Variable
+    initial: Variable | str
+    step: int
+    update: Variable
+    block: int
+    commands: list[Command] = field(default_factory=list)
+
+
+@dataclass
+class ReducedVariable:
+    """Variable keeping the product of an induction variable and a loop invariant factor.
+
+    Fields:
+        - `induction_variable[InductionVariable]`: variable the product is taken of
+        - `factor[Variable | str]`: invariant the variable is multiplied by
+        - `version[Variable]`: version holding the product during an iteration
+        - `update[Variable]`: version holding the product of the updated variable
+
+    """
+
+    induction_variable: InductionVariable
+    factor: Variable | str
+    version: Variable
+    update: Variable
+
+
+def is_version(value: object, version: Variable) -> bool:
+    return isinstance(value, Variable) and value.name == version.name
+
+
+def get_offset(command: Command, version: Variable, offsets: dict[str, int]) -> int | None:
+    """Constant the command adds to the version, through the registers holding it plus offsets"""
+
+    def get_operand_offset(operand: object) -> int | None:
+        if is_version(operand, version):
+            return 0
+        if isinstance(operand, PseudoRegister):
+            return offsets.get(operand.name)
+        return None
+
+    def get_constant(operand: object) -> int | None:
+        return parse_constant(operand) if isinstance(operand, str) else None
+
+    offset_a = get_operand_offset(command.operand_a)
+    constant_b = get_constant(command.operand_b)
+    match command.operation:
+        case CommandType.STORE:
+            return offset_a
+        case CommandType.SUM if offset_a is not None and constant_b is not None:
+            return offset_a + constant_b
+        case CommandType.SUM:
+            offset_b = get_operand_offset(command.operand_b)
+            constant_a = get_constant(command.operand_a)
+            if offset_b is None or constant_a is None:
+                return None
+            return offset_b + constant_a
+        case CommandType.SUB if offset_a is not None and constant_b is not None:
+            return offset_a - constant_b
+    return None
+
+
+def find_induction_variables(ssa: SSAForm, loop: Loop) -> list[InductionVariable]:
+    """Variables the loop adds a constant to on every iteration, the loop having a preheader
+
+    A variable is taken when the phi of the header gets it from the only latch as the version of
+    the header plus a constant, computed within a single block.
+    """
+    if loop.preheader is None or len(loop.latches) != 1:
+        return []
+    cfg = ssa.cfg
+    definitions: dict[str, int] = {
+        command.target.name: block_id  # type: ignore
+        for block_id in loop.blocks
+        for command in cfg.blocks[block_id].commands
+        if command.operation != CommandType.PHI and ssa.is_tracked(command.target)
+    }
+    induction_variables: list[InductionVariable] = []
+    for phi_command in get_phis(cfg.blocks[loop.header]):
+        phi: Phi = phi_command.operand_a  # type: ignore
+        version: Variable = phi_command.target  # type: ignore
+        update = phi.sources.get(loop.latches[0])
+        initial = phi.sources.get(loop.preheader)
+        if (
+            initial is None
+            or isinstance(initial, PseudoRegister)
+            or not ssa.is_tracked(update)
+            or update.name not in definitions  # type: ignore
+        ):
+            continue
+        block_id = definitions[update.name]  # type: ignore
+        offsets: dict[str, int] = {}
+        # commands leaving the version plus an offset in every register
+        chains: dict[str, list[Command]] = {}
+        for command in cfg.blocks[block_id].commands:
+            offset = get_offset(command, version, offsets)
+            if is_version(command.target, update):  # type: ignore
+                source = command.operand_a
+                chain = chains.get(source.name, []) if isinstance(source, PseudoRegister) else []
+                if offset:
+                    induction_variables.append(
+                        InductionVariable(
+                            version=version,
+                            initial=initial,
+                            step=offset,
+                            update=update,  # type: ignore
+                            block=block_id,
+                            commands=[*chain, command],
+                        )
+                    )
+                break
+            if not isinstance(command.target, PseudoRegister):
+                continue
+            if offset is None:
+                offsets.pop(command.target.name, None)
+                chains.pop(command.target.name, None)
+                continue
+            sources = [
+                chains.get(operand.name, [])
+                for operand in (command.operand_a, command.operand_b)
+                if isinstance(operand, PseudoRegister)
+            ]
+            offsets[command.target.name] = offset
+            chains[command.target.name] = [*(sources[0] if sources else []), command]
+    return induction_variables
+
+
+class StrengthReduction(SSAPass):
+    """Replaces the multiplications of induction variables with additions.
+
+    The product of an induction variable and a factor that does not change within the loop gets
+    a variable of its own, computed once in the preheader and increased by the step times the
+    factor every time the induction variable is updated, and the multiplications read it instead.
+
+    An induction variable read only to update itself and to test whether the loop exits gets the
+    test done on one of its products by a positive constant instead, against the bound times the
+    constant, and is then removed. Constants are required for the products to be known not to
+    overflow. Nested loops are reduced first.
+    """
+
+    name = "lsr"
+    statistic = "reduced"
+
+    def __call__(self, ssa: SSAForm) -> int:
+        self.ssa = ssa
+        self.definitions: dict[str, Command] = {
+            command.target.name: command  # type: ignore
+            for block in ssa.cfg.blocks.values()
+            for command in block.commands
+            if ssa.is_tracked(command.target)
+        }
+        loops = find_loops(ssa.cfg)
+        reduced_count = 0
+        for loop in loops:
+            if get_preheader(ssa, loop, loops) is None:
+                continue
+            induction_variables = find_induction_variables(ssa, loop)
+            if not induction_variables:
+                continue
+            reduced: dict[tuple[str, str], ReducedVariable] = {}
+            assigned = get_assigned_versions(ssa, loop)
+            for block_id in [block_id for block_id in ssa.cfg.blocks if block_id in loop.blocks]:
+                reduced_count += self._reduce_block(
+                    block_id, induction_variables, assigned, reduced
+                )
+            self._place_reduced_variables(loop, list(reduced.values()))
+            self._remove_induction_variables(loop, induction_variables, list(reduced.values()))
+        return reduced_count
+
+    def _get_constant(self, value: object) -> int | None:
+        if isinstance(value, str):
+            return parse_constant(value)
+        if not self.ssa.is_tracked(value):
+            return None
+        definition = self.definitions.get(value.name)  # type: ignore
+        if definition is None or definition.operation != CommandType.STORE:
+            return None
+        return self._get_constant(definition.operand_a)
+
+    def _is_invariant(self, value: object, assigned: set[str]) -> bool:
+        if isinstance(value, str):
+            return parse_constant(value) is not None
+        return self.ssa.is_tracked(value) and value.name not in assigned  # type: ignore
+
+    def _reduce_block(
+        self,
+        block_id: int,
+        induction_variables: list[InductionVariable],
+        assigned: set[str],
+        reduced: dict[tuple[str, str], ReducedVariable],
+    ) -> int:
+        """Make the multiplications of the block read the reduced variables, returning how many"""
+        block = self.ssa.cfg.blocks[block_id]
+        # registers of the block whose multiplications were removed, and the variables taking them
+        moved: dict[str, Variable] = {}
+        commands: list[Command] = []
+        reduced_count = 0
+        for command in block.commands:
+            if command.operation != CommandType.PHI:
+                for operand_field in ("operand_a", "operand_b"):
+                    operand = getattr(command, operand_field)
+                    if isinstance(operand, PseudoRegister) and operand.name in moved:
+                        setattr(command, operand_field, moved[operand.name])
+            target = command.target
+            if isinstance(target, PseudoRegister):
+                moved.pop(target.name, None)
+            product = self._get_product(command, induction_variables, assigned, reduced)
+            if product is None:
+                commands.append(command)
+                continue
+            reduced_count += 1
+            if isinstance(target, PseudoRegister):
+                moved[target.name] = product
+            else:
+                commands.append(
+                    Command(operation=CommandType.STORE, target=target, operand_a=product)
+                )
+        block.commands = commands
+        return reduced_count
+
+    def _get_product(
+        self,
+        command: Command,
+        induction_variables: list[InductionVariable],
+        assigned: set[str],
+        reduced: dict[tuple[str, str], ReducedVariable],
+    ) -> Variable | None:
+        """Version of a reduced variable holding what the multiplication computes"""
+        if command.operation != CommandType.MUL:
+            return None
+        if not (isinstance(command.target, PseudoRegister) or self.ssa.is_tracked(command.target)):
+            return None
+        for operand, factor in (
+            (command.operand_a, command.operand_b),
+            (command.operand_b, command.operand_a),
+        ):
+            if not isinstance(operand, Variable) or not self._is_invariant(factor, assigned):
+                continue
+            for induction_variable in induction_variables:
+                if operand.name not in (
+                    induction_variable.version.name,
+                    induction_variable.update.name,
+                ):
+                    continue
+                key = (
+                    induction_variable.version.name,
+                    factor if isinstance(factor, str) else factor.name,  # type: ignore
+                )
+                if key not in reduced:
+                    variable = self.ssa.make_variable("mul")
+                    reduced[key] = ReducedVariable(
+                        induction_variable=induction_variable,
+                        factor=factor,  # type: ignore
+                        version=variable,
+                        update=self.ssa.make_version(variable),
+                    )
+                if operand.name == induction_variable.update.name:
+                    return reduced[key].update
+                return reduced[key].version
+        return None
+
+    def _multiply(
+        self,
+        value: Variable | str,
+        factor: Variable | str,
+        commands: list[Command],
+        product: Variable | None = None,
+    ) -> Variable | str:
+        """Product of two invariants, computed by a command added to the list when not known"""
+        constant, constant_factor = self._get_constant(value), self._get_constant(factor)
+        if constant is not None and constant_factor is not None:
+            return str(to_signed(constant * constant_factor))
+        if constant == 0 or constant_factor == 0:
+            return "0"
+        if constant == 1:
+            return factor
+        if constant_factor == 1:
+            return value
+        if product is None:
+            product = self.ssa.make_variable("mul")
+        commands.append(
+            Command(operation=CommandType.MUL, target=product, operand_a=value, operand_b=factor)
+        )
+        return product
+
+    def _place_reduced_variables(self, loop: Loop, reduced_variables: list[ReducedVariable]):
+        """Compute the reduced variables in the preheader, the header and the updating blocks"""
+        cfg = self.ssa.cfg
+        header = cfg.blocks[loop.header]
+        initial_commands: list[Command] = []
+        updates: list[Variable] = []
+        for reduced in reduced_variables:
+            induction_variable = reduced.induction_variable
+            initial = self.ssa.make_version(reduced.version)
+            initial_value = self._multiply(
+                induction_variable.initial, reduced.factor, initial_commands, initial
+            )
+            if initial_value is not initial:
+                initial_commands.append(
+                    Command(operation=CommandType.STORE, target=initial, operand_a=initial_value)
+                )
+            step = self._multiply(
+                str(abs(induction_variable.step)), reduced.factor, initial_commands
+            )
+            constant_step = self._get_constant(step)
+            is_increased = induction_variable.step > 0
+            if constant_step is not None and constant_step < 0:
+                step, is_increased = str(-constant_step), not is_increased
+
+            phi = Phi(sources={loop.preheader: initial, loop.latches[0]: reduced.update})  # type: ignore
+            header.commands.insert(
+                len(get_phis(header)),
+                Command(operation=CommandType.PHI, target=reduced.version, operand_a=phi),
+            )
+            block = cfg.blocks[induction_variable.block]
+            position = next(
+                command_id + 1
+                for command_id, command in enumerate(block.commands)
+                if command is induction_variable.commands[-1]
+            )
+            # after the updates placed for the same variable before
+            while position < len(block.commands) and block.commands[position].target in updates:
+                position += 1
+            updates.append(reduced.update)
+            block.commands.insert(
+                position,
+                Command(
+                    operation=CommandType.SUM if is_increased else CommandType.SUB,
+                    target=reduced.update,
+                    operand_a=reduced.version,
+                    operand_b=step,
+                ),
+            )
+        append_to_block(cfg.blocks[loop.preheader], initial_commands)  # type: ignore
+
+    def _count_uses(self) -> Counter[str]:
+        uses: Counter[str] = Counter()
+        for block in self.ssa.cfg.blocks.values():
+            for command in block.commands:
+                operands: list[object] = [command.operand_a, command.operand_b]
+                if isinstance(command.operand_a, Phi):
+                    operands = list(command.operand_a.sources.values())
+                for operand in operands:
+                    if self.ssa.is_tracked(operand):
+                        uses[operand.name] += 1  # type: ignore
+        return uses
+
+    def _is_only_updated(self, induction_variable: InductionVariable, uses: Counter[str]) -> bool:
+        """Whether the variable is only read to update it, besides the test of the header"""
+        exit_versions = {version.name for version in self.ssa.exit_values.values()}
+        version, update = induction_variable.version, induction_variable.update
+        if version.name in exit_versions or update.name in exit_versions:
+            return False
+        if uses[update.name] != 1:
+            return False
+        chain = induction_variable.commands
+        reads = sum(
+            is_version(operand, version)
+            for command in chain
+            for operand in (command.operand_a, command.operand_b)
+        )
+        if uses[version.name] != reads:
+            return False
+        # the registers of the update have to be read by the update only
+        held: set[str] = set()
+        for command in self.ssa.cfg.blocks[induction_variable.block].commands:
+            if not any(command is chained for chained in chain):
+                if any(
+                    isinstance(operand, PseudoRegister) and operand.name in held
+                    for operand in (command.operand_a, command.operand_b)
+                ):
+                    return False
+                if isinstance(command.target, PseudoRegister):
+                    held.discard(command.target.name)
+            elif isinstance(command.target, PseudoRegister):
+                held.add(command.target.name)
+        return True
+
+    def _remove_induction_variables(
+        self,
+        loop: Loop,
+        induction_variables: list[InductionVariable],
+        reduced_variables: list[ReducedVariable],
+    ):
+        """Remove the variables read only by their updates, once the test of the header is not"""
+        header = self.ssa.cfg.blocks[loop.header]
+        comparison = next(
+            (command for command in header.commands if command.operation == CommandType.CMP), None
+        )
+        uses = self._count_uses()
+        for induction_variable in induction_variables:
+            version = induction_variable.version
+            tested = (
+                []
+                if comparison is None
+                else [
+                    operand_field
+                    for operand_field in ("operand_a", "operand_b")
+                    if is_version(getattr(comparison, operand_field), version)
+                ]
+            )
+            uses[version.name] -= len(tested)
+            if not self._is_only_updated(induction_variable, uses):
+                continue
+            if tested and not self._replace_test(
+                comparison, tested, induction_variable, reduced_variables  # type: ignore
+            ):
+                continue
+            header.commands = [
+                command
+                for command in header.commands
+                if not (
+                    command.operation == CommandType.PHI and is_version(command.target, version)
+                )
+            ]
+            block = self.ssa.cfg.blocks[induction_variable.block]
+            block.commands = [
+                command
+                for command in block.commands
+                if not any(command is chained for chained in induction_variable.commands)
+            ]
+
+    def _replace_test(
+        self,
+        comparison: Command,
+        tested: list[str],
+        induction_variable: InductionVariable,
+        reduced_variables: list[ReducedVariable],
+    ) -> bool:
+        """Compare a product of the variable instead of it, returning whether one could be"""
+        if len(tested) != 1:
+            return False
+        bound_field = "operand_b" if tested[0] == "operand_a" else "operand_a"
+        bound = self._get_constant(getattr(comparison, bound_field))
+        initial = self._get_constant(induction_variable.initial)
+        if bound is None or initial is None:
+            return False
+        for reduced in reduced_variables:
+            factor = self._get_constant(reduced.factor)
+            if reduced.induction_variable is not induction_variable or factor is None:
+                continue
+            extent = max(abs(initial), abs(bound)) + abs(induction_variable.step)
+            if factor <= 0 or extent * factor >= COMPARISON_LIMIT:
+                continue
+            setattr(comparison, tested[0], reduced.version)
+            setattr(comparison, bound_field, str(bound * factor))
+            return True
+        return False
@@ -0,0 +1,118 @@
+from pyro_compiler.compiler.optimization.constant_propagation import parse_constant
+from pyro_compiler.compiler.optimization.loops import (
+    append_to_block,
+    find_loops,
+    get_assigned_versions,
+    get_preheader,
+)
+from pyro_compiler.compiler.optimization.passes import SSAPass
+from pyro_compiler.compiler.optimization.ssa import SSAForm
+from pyro_compiler.compiler.optimization.value_numbering import (
+    DIVISION_RESULTS,
+    PURE_OPERATIONS,
+    SAME_OPERATIONS,
+)
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.variable import Variable, VarType
+
+
+class LoopInvariantCodeMotion(SSAPass):
+    """Moves the operations computing the same value on every iteration out of the loops.
+
+    An operation is invariant when its operands are constants, versions assigned outside of the
+    loop or results of invariant operations. It is computed once in the preheader of the loop,
+    into a new variable read by the loop instead of its register. Nested loops go first, for what
+    they move out to be moved further by the loops containing them.
+
+    Divisions are only moved when dividing by a constant other than zero, as the loop may not
+    run them at all. Stores to variables stay in the loop, reading the moved value.
+    """
+
+    name = "licm"
+    statistic = "hoisted"
+
+    def __call__(self, ssa: SSAForm) -> int:
+        self.ssa = ssa
+        loops = find_loops(ssa.cfg)
+        hoisted_count = 0
+        for loop in loops:
+            preheader = get_preheader(ssa, loop, loops)
+            if preheader is None:
+                continue
+            hoisted: list[Command] = []
+            assigned = get_assigned_versions(ssa, loop)
+            is_changed = True
+            while is_changed:
+                is_changed = False
+                for block_id in [
+                    block_id for block_id in ssa.cfg.blocks if block_id in loop.blocks
+                ]:
+                    moved = self._hoist_block(block_id, assigned)
+                    is_changed = is_changed or bool(moved)
+                    hoisted += moved
+            append_to_block(preheader, hoisted)
+            hoisted_count += len(hoisted)
+        return hoisted_count
+
+    def _is_invariant(self, operand: object, assigned: set[str]) -> bool:
+        if operand is None or isinstance(operand, VarType):
+            return True
+        if isinstance(operand, str):
+            return parse_constant(operand) is not None
+        if isinstance(operand, PseudoRegister):
+            # registers read by the loop are only invariant once replaced with moved values
+            return False
+        return self.ssa.is_tracked(operand) and operand.name not in assigned  # type: ignore
+
+    def _is_hoistable(self, command: Command, assigned: set[str]) -> bool:
+        operation = SAME_OPERATIONS.get(command.operation, command.operation)
+        if operation not in PURE_OPERATIONS:
+            return False
+        if not (isinstance(command.target, PseudoRegister) or self.ssa.is_tracked(command.target)):
+            return False
+        if operation in DIVISION_RESULTS and (
+            not isinstance(command.operand_b, str) or parse_constant(command.operand_b) in (None, 0)
+        ):
+            return False
+        return self._is_invariant(command.operand_a, assigned) and self._is_invariant(
+            command.operand_b, assigned
+        )
+
+    def _hoist_block(self, block_id: int, assigned: set[str]) -> list[Command]:
+        """Take the invariant operations out of the block, returning them in their order"""
+        block = self.ssa.cfg.blocks[block_id]
+        # registers of the block whose values were moved out, and the variables taking them
+        moved: dict[str, Variable] = {}
+        hoisted: list[Command] = []
+        commands: list[Command] = []
+        for command in block.commands:
+            if command.operation != CommandType.PHI:
+                for field in ("operand_a", "operand_b"):
+                    operand = getattr(command, field)
+                    if isinstance(operand, PseudoRegister) and operand.name in moved:
+                        setattr(command, field, moved[operand.name])
+            if isinstance(command.target, PseudoRegister):
+                moved.pop(command.target.name, None)
+            if not self._is_hoistable(command, assigned):
+                commands.append(command)
+                continue
+
+            target = command.target
+            if isinstance(target, PseudoRegister):
+                variable = self.ssa.make_variable(command.operation.name.lower())
+                moved[target.name] = variable
+                target = variable
+            else:
+                assigned.discard(target.name)  # type: ignore
+            # a new command, for the scopes not to follow it out of the loop
+            hoisted.append(
+                Command(
+                    operation=command.operation,
+                    target=target,
+                    operand_a=command.operand_a,
+                    operand_b=command.operand_b,
+                )
+            )
+        block.commands = commands
+        return hoisted
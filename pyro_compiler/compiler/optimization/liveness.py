@@ -0,0 +1,109 @@
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.label import Label
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.representation.struct_declaration import StructDeclaration
+from pyro_compiler.compiler.representation.structure import Structure
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+JUMP_COMMANDS: frozenset[CommandType] = frozenset(
+    (
+        CommandType.JMP,
+        CommandType.JE,
+        CommandType.JNE,
+        CommandType.JZ,
+        CommandType.JG,
+        CommandType.JGE,
+        CommandType.JL,
+        CommandType.JLE,
+    )
+)
+
+
+def get_jump_target(representation: Representation, command: Command) -> int | None:
+    """Position of the command a jump goes to, None for the commands that are not jumps"""
+    if command.operation not in JUMP_COMMANDS or not isinstance(command.operand_a, Label):
+        return None
+    # jumps may refer to a copy of the label, positions are kept on the registered one
+    label = representation.get_label(command.operand_a.name) or command.operand_a
+    return label.position
+
+
+def get_successors(representation: Representation) -> list[list[int]]:
+    """Positions of the commands that may run right after every command
+
+    The position one past the last command stands for the end of the program.
+    """
+    successors: list[list[int]] = []
+    for command_id, command in enumerate(representation.commands):
+        following = [] if command.operation == CommandType.JMP else [command_id + 1]
+        jump_target = get_jump_target(representation, command)
+        successors.append(following + ([jump_target] if jump_target is not None else []))
+    return successors
+
+
+def get_memory_bound_variables(representation: Representation) -> set[str]:
+    """Names of the variables that have to stay in memory, like structures and their fields"""
+    bound: set[str] = set()
+    for command in representation.commands:
+        for value in (command.target, command.operand_a, command.operand_b):
+            if isinstance(value, Variable) and isinstance(value.var_type, Structure):
+                bound.add(value.name)
+        if isinstance(command.operand_a, StructDeclaration):
+            if isinstance(command.target, Variable):
+                bound.add(command.target.name)
+            for field_value in command.operand_a.field_values:
+                if isinstance(field_value, Variable):
+                    bound.add(field_value.name)
+    return bound
+
+
+def get_value_key(value: object, bound_variables: set[str]) -> str | None:
+    """Name of a value tracked by the liveness analysis, None for the untracked ones
+
+    Pseudo registers are prefixed to not clash with variables. Memory bound variables are not
+    tracked, as they are read and written through pointers too.
+    """
+    if isinstance(value, PseudoRegister):
+        return f"%{value.name}"
+    if isinstance(value, Variable) and value.name not in bound_variables:
+        return value.name
+    return None
+
+
+def compute_liveness(
+    representation: Representation, bound_variables: set[str], live_out: set[str] | None = None
+) -> list[set[str]]:
+    """Keys of the values live after every command
+
+    Solved backwards over the command list, following the jumps to their labels, until nothing
+    changes. Values named in `live_out` are live at the end of the program.
+    """
+    commands = representation.commands
+    uses: list[set[str]] = []
+    definitions: list[str | None] = []
+    for command in commands:
+        operands = (command.operand_a, command.operand_b)
+        uses.append(
+            {key for key in (get_value_key(value, bound_variables) for value in operands) if key}
+        )
+        definitions.append(get_value_key(command.target, bound_variables))
+    successors = get_successors(representation)
+
+    exit_live = set(live_out or ())
+    live_in: list[set[str]] = [set() for _ in commands]
+    live_after: list[set[str]] = [set() for _ in commands]
+    is_changed = True
+    while is_changed:
+        is_changed = False
+        for command_id in reversed(range(len(commands))):
+            after: set[str] = set()
+            for successor in successors[command_id]:
+                after |= live_in[successor] if successor < len(commands) else exit_live
+            before = uses[command_id] | (after - {definitions[command_id]})
+            if after != live_after[command_id] or before != live_in[command_id]:
+                live_after[command_id] = after
+                live_in[command_id] = before
+                is_changed = True
+    return live_after
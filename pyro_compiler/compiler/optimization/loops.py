@@ -0,0 +1,135 @@
+from dataclasses import dataclass, field
+
+from pyro_compiler.compiler.optimization.cfg import BasicBlock, ControlFlowGraph
+from pyro_compiler.compiler.optimization.ssa import SSAForm, get_phis
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.phi import Phi
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+@dataclass
+class Loop:
+    """Natural loop of a control flow graph.
+
+    Fields:
+        - `header[int]`: block every iteration starts with, dominating the rest of the loop
+        - `blocks[set[int]]`: blocks of the loop, the header and the nested loops included
+        - `latches[list[int]]`: blocks jumping back to the header
+        - `preheader[int | None]`: block the loop is entered from, once `get_preheader` made it
+
+    """
+
+    header: int
+    blocks: set[int] = field(default_factory=set)
+    latches: list[int] = field(default_factory=list)
+    preheader: int | None = None
+
+    def get_entries(self, cfg: ControlFlowGraph) -> list[int]:
+        """Blocks outside of the loop control enters it from"""
+        return [
+            predecessor
+            for predecessor in cfg.blocks[self.header].predecessors
+            if predecessor not in self.blocks
+        ]
+
+
+def find_loops(cfg: ControlFlowGraph) -> list[Loop]:
+    """Natural loops of the graph, the nested ones placed before the loops containing them
+
+    Every edge going back to a block dominating its source closes a loop, made of the blocks
+    reaching the source without going through the header. Loops sharing a header are merged.
+    """
+    dominators = cfg.compute_dominators()
+    loops: dict[int, Loop] = {}
+    for block_id in cfg.reverse_postorder():
+        for successor in cfg.blocks[block_id].successors:
+            if successor not in dominators or not cfg.dominates(dominators, successor, block_id):
+                continue
+            loop = loops.setdefault(successor, Loop(header=successor, blocks={successor}))
+            loop.latches.append(block_id)
+            worklist = [block_id]
+            while worklist:
+                member = worklist.pop()
+                if member in loop.blocks:
+                    continue
+                loop.blocks.add(member)
+                worklist += [
+                    predecessor
+                    for predecessor in cfg.blocks[member].predecessors
+                    if predecessor in dominators
+                ]
+    return sorted(loops.values(), key=lambda loop: len(loop.blocks))
+
+
+def get_preheader(ssa: SSAForm, loop: Loop, loops: list[Loop]) -> BasicBlock | None:
+    """Block running right before the loop is entered, made when the loop has none
+
+    The block entering the loop is taken when it is the only one and goes nowhere else. Otherwise
+    a new block is placed before the header, the entries are pointed at it and the values the
+    phis of the header take from them are merged there. The new block is added to the loops
+    containing the header. None is returned for the loops that can not be entered.
+    """
+    if loop.preheader is not None:
+        return ssa.cfg.blocks[loop.preheader]
+    cfg = ssa.cfg
+    entries = loop.get_entries(cfg)
+    if not entries:
+        return None
+    if len(entries) == 1 and len(cfg.blocks[entries[0]].successors) == 1:
+        loop.preheader = entries[0]
+        return cfg.blocks[entries[0]]
+
+    header = cfg.blocks[loop.header]
+    preheader = cfg.add_block([], before=loop.header)
+    for entry in entries:
+        entry_block = cfg.blocks[entry]
+        if entry_block.fallthrough == loop.header:
+            entry_block.fallthrough = preheader.block_id
+        terminator = entry_block.terminator
+        if terminator is not None and cfg.get_jump_block(terminator) == loop.header:
+            entry_block.commands[-1] = Command(
+                operation=terminator.operation, operand_a=cfg.get_block_label(preheader.block_id)
+            )
+        entry_block.successors[entry_block.successors.index(loop.header)] = preheader.block_id
+        header.predecessors.remove(entry)
+        preheader.predecessors.append(entry)
+    header.predecessors.append(preheader.block_id)
+    preheader.successors = [loop.header]
+    preheader.fallthrough = loop.header
+
+    for phi_command in get_phis(header):
+        phi: Phi = phi_command.operand_a  # type: ignore
+        sources = {entry: phi.sources.pop(entry) for entry in entries}
+        value = next(iter(sources.values()))
+        if any(str(source) != str(value) for source in sources.values()):
+            value = ssa.make_version(phi_command.target)  # type: ignore
+            preheader.commands.append(
+                Command(operation=CommandType.PHI, target=value, operand_a=Phi(sources=sources))
+            )
+        phi.sources[preheader.block_id] = value
+    for other in loops:
+        if other is not loop and loop.header in other.blocks:
+            other.blocks.add(preheader.block_id)
+    loop.preheader = preheader.block_id
+    return preheader
+
+
+def get_assigned_versions(ssa: SSAForm, loop: Loop) -> set[str]:
+    """Names of the versions assigned within the loop, phis of the header included"""
+    return {
+        command.target.name
+        for block_id in loop.blocks
+        for command in ssa.cfg.blocks[block_id].commands
+        if isinstance(command.target, Variable)
+    }
+
+
+def append_to_block(block: BasicBlock, commands: list[Command]):
+    """Place commands at the end of a block, before the jump ending it"""
+    terminator = block.terminator
+    position = len(block.commands)
+    if terminator is not None:
+        position -= 1
+        if position > 0 and block.commands[position - 1].operation == CommandType.CMP:
+            position -= 1
+    block.commands[position:position] = commands
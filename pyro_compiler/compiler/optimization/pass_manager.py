@@ -0,0 +1,135 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from enum import Enum
+
+from pyro_compiler.compiler.optimization.constant_propagation import ConstantPropagation
+from pyro_compiler.compiler.optimization.dead_store_elimination import DeadStoreElimination
+from pyro_compiler.compiler.optimization.induction_variables import StrengthReduction
+from pyro_compiler.compiler.optimization.licm import LoopInvariantCodeMotion
+from pyro_compiler.compiler.optimization.passes import RepresentationPass, SSAPass
+from pyro_compiler.compiler.optimization.ssa import (
+    SSAConstruction,
+    SSADestruction,
+    SSAForm,
+    get_phis,
+)
+from pyro_compiler.compiler.optimization.unrolling import LoopUnrolling
+from pyro_compiler.compiler.optimization.value_numbering import ValueNumbering
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.stats import CompilationStats, PhaseStats
+
+
+class OptimizationLevel(Enum):
+    O0 = "0"
+    O1 = "1"
+    O2 = "2"
+
+
+AVAILABLE_PASSES: dict[str, type[RepresentationPass] | type[SSAPass]] = {
+    pass_type.name: pass_type
+    for pass_type in (
+        ConstantPropagation,
+        ValueNumbering,
+        LoopInvariantCodeMotion,
+        StrengthReduction,
+        LoopUnrolling,
+        DeadStoreElimination,
+    )
+}
+
+OPTIMIZATION_PIPELINES: dict[OptimizationLevel, tuple[str, ...]] = {
+    OptimizationLevel.O0: (),
+    OptimizationLevel.O1: ("sccp", "dse"),
+    OptimizationLevel.O2: ("sccp", "gvn", "licm", "lsr", "dse"),
+}
+
+# dumping after it shows the representation as `IRBuilder` made it, before any pass
+IR_DUMP_NAME = "ir"
+# dumping after it shows the representation after every pass
+ALL_DUMP_NAME = "all"
+DUMP_NAMES = (IR_DUMP_NAME, ALL_DUMP_NAME)
+
+
+class PassManager:
+    """Runs an ordered pipeline of passes over the representation.
+
+    The representation is converted into SSA form before the first SSA pass of a run of them, and
+    back before the next pass working on the flat representation or at the end. Every pass and
+    conversion is a phase of `stats`, when given.
+
+    Fields:
+        - `passes[list[RepresentationPass | SSAPass]]`: passes to run, in order
+        - `dump_after[set[str]]`: names of the passes to dump the representation after, `ir`
+          standing for the one `IRBuilder` made and `all` for every pass
+        - `pass_options[dict[str, dict[str, object]]]`: arguments of the passes, by their names
+        - `dumps[list[str]]`: dumps made by the last run
+
+    """
+
+    def __init__(
+        self,
+        passes: list[str],
+        stats: CompilationStats | None = None,
+        dump_after: list[str] | None = None,
+        pass_options: dict[str, dict[str, object]] | None = None,
+    ):
+        unknown = [name for name in passes if name not in AVAILABLE_PASSES]
+        if unknown:
+            raise Exception(
+                f"Unknown passes {', '.join(unknown)}, available: {', '.join(AVAILABLE_PASSES)}"
+            )
+        self.pass_options = pass_options or {}
+        self.passes: list[RepresentationPass | SSAPass] = [
+            AVAILABLE_PASSES[name](**self.pass_options.get(name, {}))  # type: ignore
+            for name in passes
+        ]
+        self.stats = stats
+        self.dump_after = set(dump_after or ())
+        self.dumps: list[str] = []
+        self.ssa_construction = SSAConstruction()
+        self.ssa_destruction = SSADestruction()
+
+    def __call__(self, representation: Representation):
+        self.dumps = []
+        self._dump(IR_DUMP_NAME, representation)
+        ssa: SSAForm | None = None
+        for optimization_pass in self.passes:
+            if isinstance(optimization_pass, SSAPass):
+                if ssa is None:
+                    ssa = self._construct_ssa(representation)
+                with self._phase(optimization_pass.name) as phase:
+                    changed_count = optimization_pass(ssa=ssa)
+                self._dump(optimization_pass.name, ssa)
+            else:
+                if ssa is not None:
+                    self._destruct_ssa(ssa)
+                    ssa = None
+                with self._phase(optimization_pass.name) as phase:
+                    changed_count = optimization_pass(representation=representation)
+                self._dump(optimization_pass.name, representation)
+            phase.count(optimization_pass.statistic, changed_count)
+        if ssa is not None:
+            self._destruct_ssa(ssa)
+
+    def _construct_ssa(self, representation: Representation) -> SSAForm:
+        with self._phase("ssa") as phase:
+            ssa = self.ssa_construction(representation=representation)
+        phase.count("phis", sum(len(get_phis(block)) for block in ssa.cfg.blocks.values()))
+        return ssa
+
+    def _destruct_ssa(self, ssa: SSAForm):
+        with self._phase("ssa_out") as phase:
+            self.ssa_destruction(ssa=ssa)
+        phase.count("commands", len(ssa.cfg.representation.commands))
+
+    def _dump(self, name: str, ir: Representation | SSAForm):
+        if name in self.dump_after or ALL_DUMP_NAME in self.dump_after:
+            self.dumps.append(f"; after {name}\n{ir.pprint()}")
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[PhaseStats]:
+        if self.stats is None:
+            yield PhaseStats(name=name)
+            return
+        with self.stats.phase(name) as phase:
+            yield phase
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+
+from pyro_compiler.compiler.optimization.ssa import SSAForm
+from pyro_compiler.compiler.representation.representation import Representation
+
+
+class RepresentationPass(ABC):
+    """Base of the passes transforming a flat representation.
+
+    Fields:
+        - `name[str]`: name the pass is selected by in the pipelines and in `--passes`
+        - `statistic[str]`: what the number returned by the pass counts, for `--time-passes`
+
+    """
+
+    name: str
+    statistic: str
+
+    @abstractmethod
+    def __call__(self, representation: Representation) -> int:
+        ...
+
+
+class SSAPass(ABC):
+    """Base of the passes transforming an SSA form.
+
+    Consecutive SSA passes share the form, the pass manager only leaves it for the passes working
+    on the flat representation and at the end of the pipeline.
+
+    Fields:
+        - `name[str]`: name the pass is selected by in the pipelines and in `--passes`
+        - `statistic[str]`: what the number returned by the pass counts, for `--time-passes`
+
+    """
+
+    name: str
+    statistic: str
+
+    @abstractmethod
+    def __call__(self, ssa: SSAForm) -> int:
+        ...
@@ -0,0 +1,570 @@
+from dataclasses import dataclass, field
+
+from pyro_compiler.compiler.optimization.cfg import BasicBlock, ControlFlowGraph
+from pyro_compiler.compiler.optimization.liveness import get_memory_bound_variables
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.phi import Phi
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+@dataclass
+class SSAForm:
+    """Control flow graph of a representation in static single assignment form.
+
+    Every version of a variable is assigned once, by a command or by a `PHI` placed at the
+    beginning of a block. Pseudo registers are left as they are, as `IRBuilder` only uses them
+    within a block.
+
+    Fields:
+        - `cfg[ControlFlowGraph]`: blocks of the representation
+        - `bound_variables[set[str]]`: variables kept out of SSA form, like structures
+        - `origins[dict[str, Variable]]`: variable every version was made from, by version name
+        - `exit_values[dict[str, Variable]]`: versions the variables of the outermost scope have
+          at the end of the program, by variable name
+
+    """
+
+    cfg: ControlFlowGraph
+    bound_variables: set[str] = field(default_factory=set)
+    origins: dict[str, Variable] = field(default_factory=dict)
+    exit_values: dict[str, Variable] = field(default_factory=dict)
+    _taken_names: set[str] = field(default_factory=set, repr=False)
+
+    def is_tracked(self, value: object) -> bool:
+        return isinstance(value, Variable) and value.name not in self.bound_variables
+
+    def get_origin(self, variable: Variable) -> Variable:
+        return self.origins.get(variable.name, variable)
+
+    def make_variable(self, prefix: str) -> Variable:
+        """New variable for a pass to assign once, named unlike any variable of the program"""
+        if not self._taken_names:
+            self._taken_names = set(self.origins) | {
+                origin.name for origin in self.origins.values()
+            }
+        count = 1
+        while f".{prefix}{count}" in self._taken_names:
+            count += 1
+        variable = Variable(name=f".{prefix}{count}")
+        self._taken_names.add(variable.name)
+        self.origins[variable.name] = variable
+        return variable
+
+    def make_version(self, variable: Variable) -> Variable:
+        """New version of a variable, for a pass to assign once"""
+        origin = self.get_origin(variable)
+        count = 1
+        while f"{origin.name}.{count}" in self.origins:
+            count += 1
+        version = Variable(
+            name=f"{origin.name}.{count}", value=origin.value, var_type=origin.var_type
+        )
+        self.origins[version.name] = origin
+        return version
+
+    def pprint(self) -> str:
+        return self.cfg.pprint()
+
+
+def get_phis(block: BasicBlock) -> list[Command]:
+    return [command for command in block.commands if command.operation == CommandType.PHI]
+
+
+class SSAConstruction:
+    """Converts a representation into SSA form.
+
+    Phis are placed on the dominance frontiers of the blocks assigning a variable, only where the
+    variable is live (pruned SSA), and the versions are named walking the dominator tree. Blocks
+    that can not be reached are removed first.
+    """
+
+    def __call__(self, representation: Representation) -> SSAForm:
+        cfg = ControlFlowGraph(representation)
+        cfg.remove_unreachable_blocks()
+        ssa = SSAForm(cfg=cfg, bound_variables=get_memory_bound_variables(representation))
+        live_out = set(representation.scopes[0].variable_table) if representation.scopes else set()
+        live_in = self._compute_live_in(ssa, live_out)
+        self._place_phis(ssa, live_in)
+        self._rename(ssa, live_out)
+        return ssa
+
+    def _compute_live_in(self, ssa: SSAForm, live_out: set[str]) -> dict[int, set[str]]:
+        uses: dict[int, set[str]] = {}
+        definitions: dict[int, set[str]] = {}
+        for block_id, block in ssa.cfg.blocks.items():
+            uses[block_id] = set()
+            definitions[block_id] = set()
+            for command in block.commands:
+                for value in (command.operand_a, command.operand_b):
+                    if ssa.is_tracked(value) and value.name not in definitions[block_id]:  # type: ignore
+                        uses[block_id].add(value.name)  # type: ignore
+                if ssa.is_tracked(command.target):
+                    definitions[block_id].add(command.target.name)  # type: ignore
+
+        order = ssa.cfg.reverse_postorder()
+        live_in: dict[int, set[str]] = {block_id: set() for block_id in order}
+        is_changed = True
+        while is_changed:
+            is_changed = False
+            for block_id in reversed(order):
+                successors = ssa.cfg.blocks[block_id].successors
+                after = set(live_out) if not successors else set()
+                for successor in successors:
+                    after |= live_in[successor]
+                before = uses[block_id] | (after - definitions[block_id])
+                if before != live_in[block_id]:
+                    live_in[block_id] = before
+                    is_changed = True
+        return live_in
+
+    def _place_phis(self, ssa: SSAForm, live_in: dict[int, set[str]]):
+        frontiers = ssa.cfg.compute_dominance_frontiers()
+        assigned_in: dict[str, list[int]] = {}
+        variables: dict[str, Variable] = {}
+        for block_id in frontiers:
+            for command in ssa.cfg.blocks[block_id].commands:
+                if ssa.is_tracked(command.target):
+                    variable: Variable = command.target  # type: ignore
+                    variables.setdefault(variable.name, variable)
+                    blocks = assigned_in.setdefault(variable.name, [])
+                    if block_id not in blocks:
+                        blocks.append(block_id)
+
+        for varname, blocks in assigned_in.items():
+            has_phi: set[int] = set()
+            worklist = list(blocks)
+            while worklist:
+                block_id = worklist.pop()
+                for frontier in frontiers[block_id]:
+                    if frontier in has_phi or varname not in live_in[frontier]:
+                        continue
+                    has_phi.add(frontier)
+                    block = ssa.cfg.blocks[frontier]
+                    phi = Phi(
+                        sources={
+                            predecessor: variables[varname] for predecessor in block.predecessors
+                        }
+                    )
+                    phi_command = Command(
+                        operation=CommandType.PHI, target=variables[varname], operand_a=phi
+                    )
+                    block.commands.insert(len(get_phis(block)), phi_command)
+                    if frontier not in blocks:
+                        worklist.append(frontier)
+
+    def _rename(self, ssa: SSAForm, live_out: set[str]):
+        stacks: dict[str, list[Variable]] = {}
+        counters: dict[str, int] = {}
+
+        def define(variable: Variable) -> Variable:
+            origin = ssa.get_origin(variable)
+            counters[origin.name] = counters.get(origin.name, 0) + 1
+            version = Variable(
+                name=f"{origin.name}.{counters[origin.name]}",
+                value=origin.value,
+                var_type=origin.var_type,
+            )
+            ssa.origins[version.name] = origin
+            stacks.setdefault(origin.name, []).append(version)
+            return version
+
+        def current(variable: Variable) -> Variable:
+            origin = ssa.get_origin(variable)
+            versions = stacks.get(origin.name)
+            return versions[-1] if versions else origin
+
+        tree = ssa.cfg.compute_dominator_tree()
+        # the tree is walked without recursion, as long programs make it deep
+        walk: list[tuple[int, list[str] | None]] = [(ssa.cfg.entry.block_id, None)]
+        while walk:
+            block_id, defined = walk.pop()
+            if defined is not None:
+                for varname in defined:
+                    stacks[varname].pop()
+                continue
+
+            block = ssa.cfg.blocks[block_id]
+            defined = []
+            for command in block.commands:
+                if command.operation != CommandType.PHI:
+                    if ssa.is_tracked(command.operand_a):
+                        command.operand_a = current(command.operand_a)  # type: ignore
+                    if ssa.is_tracked(command.operand_b):
+                        command.operand_b = current(command.operand_b)  # type: ignore
+                if ssa.is_tracked(command.target):
+                    command.target = define(command.target)  # type: ignore
+                    defined.append(ssa.get_origin(command.target).name)
+
+            for successor in block.successors:
+                for phi_command in get_phis(ssa.cfg.blocks[successor]):
+                    phi: Phi = phi_command.operand_a  # type: ignore
+                    phi.sources[block_id] = current(phi_command.target)  # type: ignore
+            if not block.successors:
+                for varname in live_out:
+                    if stacks.get(varname):
+                        ssa.exit_values[varname] = stacks[varname][-1]
+
+            walk.append((block_id, defined))
+            for child in reversed(tree[block_id]):
+                walk.append((child, None))
+
+
+class SSADestruction:
+    """Converts an SSA form back into a flat representation.
+
+    Versions of a variable that are never alive at once get the name of the variable back, the
+    ones that are get new names. Phis left with different names are replaced by copies at the end
+    of the blocks control comes from, new blocks being placed on the edges from blocks with
+    several successors.
+    """
+
+    def __call__(self, ssa: SSAForm):
+        names = self._assign_names(ssa)
+        variables: dict[str, Variable] = {}
+
+        def rename(value: object) -> object:
+            if not ssa.is_tracked(value):
+                return value
+            variable: Variable = value  # type: ignore
+            name = names.get(variable.name, variable.name)
+            if name not in variables:
+                origin = ssa.get_origin(variable)
+                variables[name] = Variable(name=name, value=origin.value, var_type=origin.var_type)
+            return variables[name]
+
+        for block in ssa.cfg.blocks.values():
+            for command in block.commands:
+                command.target = rename(command.target)  # type: ignore
+                command.operand_b = rename(command.operand_b)  # type: ignore
+                if isinstance(command.operand_a, Phi):
+                    for block_id, source in command.operand_a.sources.items():
+                        command.operand_a.sources[block_id] = rename(source)  # type: ignore
+                else:
+                    command.operand_a = rename(command.operand_a)  # type: ignore
+
+        self._eliminate_phis(ssa.cfg)
+        for block in ssa.cfg.blocks.values():
+            block.commands = [
+                command
+                for command in block.commands
+                if not (
+                    command.operation == CommandType.STORE
+                    and isinstance(command.target, Variable)
+                    and isinstance(command.operand_a, Variable)
+                    and command.target.name == command.operand_a.name
+                )
+            ]
+        ssa.cfg.linearize()
+        declare_variables(ssa.cfg.representation)
+
+    def _assign_names(self, ssa: SSAForm) -> dict[str, str]:
+        """Final name of every version, versions alive at the same time getting different ones"""
+        interference = self._build_interference(ssa)
+        exit_versions = {version.name for version in ssa.exit_values.values()}
+        groups: dict[str, list[str]] = {}
+        for block in ssa.cfg.blocks.values():
+            for command in block.commands:
+                for value in (command.target, command.operand_a, command.operand_b):
+                    if ssa.is_tracked(value):
+                        version: str = value.name  # type: ignore
+                        versions = groups.setdefault(ssa.get_origin(value).name, [])  # type: ignore
+                        if version not in versions:
+                            versions.append(version)
+
+        names: dict[str, str] = {}
+        for varname, versions in groups.items():
+            # the version left at the end of the program keeps the name the debug output prints
+            versions.sort(key=lambda version: version not in exit_versions)
+            colors: dict[str, int] = {}
+            for version in versions:
+                taken = {
+                    colors[other] for other in interference.get(version, ()) if other in colors
+                }
+                color = 0
+                while color in taken:
+                    color += 1
+                colors[version] = color
+                names[version] = varname if color == 0 else f"{varname}.{color}"
+        return names
+
+    def _build_interference(self, ssa: SSAForm) -> dict[str, set[str]]:
+        """Versions alive at the same time as every version of the same variable"""
+        cfg = ssa.cfg
+        uses: dict[int, set[str]] = {}
+        definitions: dict[int, set[str]] = {}
+        phi_sources: dict[int, set[str]] = {block_id: set() for block_id in cfg.blocks}
+        phi_targets: dict[int, set[str]] = {}
+        for block_id, block in cfg.blocks.items():
+            uses[block_id] = set()
+            definitions[block_id] = set()
+            phi_targets[block_id] = set()
+            for command in block.commands:
+                if isinstance(command.operand_a, Phi):
+                    phi_targets[block_id].add(command.target.name)  # type: ignore
+                    for predecessor, source in command.operand_a.sources.items():
+                        if ssa.is_tracked(source) and predecessor in phi_sources:
+                            phi_sources[predecessor].add(source.name)  # type: ignore
+                    continue
+                for value in (command.operand_a, command.operand_b):
+                    if ssa.is_tracked(value) and value.name not in definitions[block_id]:  # type: ignore
+                        uses[block_id].add(value.name)  # type: ignore
+                if ssa.is_tracked(command.target):
+                    definitions[block_id].add(command.target.name)  # type: ignore
+
+        exit_versions = {version.name for version in ssa.exit_values.values()}
+        live_in: dict[int, set[str]] = {block_id: set() for block_id in cfg.blocks}
+        live_out: dict[int, set[str]] = {block_id: set() for block_id in cfg.blocks}
+        order = list(cfg.blocks)
+        is_changed = True
+        while is_changed:
+            is_changed = False
+            for block_id in reversed(order):
+                block = cfg.blocks[block_id]
+                after = set(phi_sources[block_id])
+                if not block.successors:
+                    after |= exit_versions
+                for successor in block.successors:
+                    after |= live_in[successor] - phi_targets[successor]
+                before = uses[block_id] | (after - definitions[block_id])
+                if after != live_out[block_id] or before != live_in[block_id]:
+                    live_out[block_id] = after
+                    live_in[block_id] = before
+                    is_changed = True
+
+        interference: dict[str, set[str]] = {}
+
+        def get_origin_name(version: str) -> str:
+            return ssa.origins[version].name if version in ssa.origins else version
+
+        def interfere(version: str, others: set[str]):
+            for other in others:
+                if other != version and get_origin_name(other) == get_origin_name(version):
+                    interference.setdefault(version, set()).add(other)
+                    interference.setdefault(other, set()).add(version)
+
+        for block_id, block in cfg.blocks.items():
+            live = set(live_out[block_id])
+            for command in reversed(block.commands):
+                if command.operation == CommandType.PHI:
+                    continue
+                if ssa.is_tracked(command.target):
+                    target: str = command.target.name  # type: ignore
+                    copied = (
+                        {command.operand_a.name}
+                        if command.operation == CommandType.STORE
+                        and isinstance(command.operand_a, Variable)
+                        else set()
+                    )
+                    interfere(target, live - copied)
+                    live.discard(target)
+                for operand in (command.operand_a, command.operand_b):
+                    if ssa.is_tracked(operand):
+                        live.add(operand.name)  # type: ignore
+            for target in phi_targets[block_id]:
+                interfere(target, live | phi_targets[block_id])
+        return interference
+
+    def _eliminate_phis(self, cfg: ControlFlowGraph):
+        for block_id, block in list(cfg.blocks.items()):
+            phis = get_phis(block)
+            if not phis:
+                continue
+            block.commands = block.commands[len(phis) :]
+            for predecessor in list(block.predecessors):
+                copies = []
+                for phi_command in phis:
+                    target: Variable = phi_command.target  # type: ignore
+                    source = phi_command.operand_a.sources[predecessor]  # type: ignore
+                    if not (isinstance(source, Variable) and source.name == target.name):
+                        copies.append((target, source))
+                if not copies:
+                    continue
+                copy_block = cfg.blocks[predecessor]
+                if len(copy_block.successors) > 1:
+                    copy_block = cfg.split_edge(predecessor, block_id)
+                position = self._get_copy_position(copy_block)
+                copy_block.commands[position:position] = self._sequence_copies(copies)
+
+    def _get_copy_position(self, block: BasicBlock) -> int:
+        """Position in the block where copies run after everything but the jump ending it"""
+        terminator = block.terminator
+        if terminator is None:
+            return len(block.commands)
+        if terminator.operation == CommandType.JMP:
+            return len(block.commands) - 1
+        for command_id in reversed(range(len(block.commands))):
+            if block.commands[command_id].operation == CommandType.CMP:
+                return command_id
+        return len(block.commands) - 1
+
+    def _sequence_copies(
+        self, copies: list[tuple[Variable, PseudoRegister | Variable | str]]
+    ) -> list[Command]:
+        """Commands doing copies that happen at once, one after another
+
+        A copy is done once nothing is left to read the value it overwrites, copies reading each
+        other in a circle are broken by saving one of the values first.
+        """
+        commands: list[Command] = []
+        pending = list(copies)
+        while pending:
+            read = {source.name for _, source in pending if isinstance(source, Variable)}
+            ready = next((copy for copy in pending if copy[0].name not in read), None)
+            if ready is not None:
+                pending.remove(ready)
+                commands.append(
+                    Command(operation=CommandType.STORE, target=ready[0], operand_a=ready[1])
+                )
+                continue
+            target = pending[0][0]
+            saved = Variable(name=f"{target.name}.saved", var_type=target.var_type)
+            commands.append(Command(operation=CommandType.STORE, target=saved, operand_a=target))
+            pending = [
+                (
+                    destination,
+                    saved
+                    if isinstance(source, Variable) and source.name == target.name
+                    else source,
+                )
+                for destination, source in pending
+            ]
+        return commands
+
+
+class SSAVerifier:
+    """Checks the invariants of an SSA form, returning the broken ones.
+
+    Every version has to be assigned once, before each of its usages or in a block dominating
+    them, phis have to open their blocks and take a value from every predecessor, and pseudo
+    registers have to be assigned in the block using them.
+    """
+
+    def __call__(self, ssa: SSAForm) -> list[str]:
+        errors: list[str] = []
+        cfg = ssa.cfg
+        dominators = cfg.compute_dominators()
+        definitions: dict[str, tuple[int, int]] = {}
+        for block_id, block in cfg.blocks.items():
+            if block_id not in dominators:
+                errors.append(f"{block} can not be reached")
+            for command_id, command in enumerate(block.commands):
+                if ssa.is_tracked(command.target) and command.target.name in ssa.origins:  # type: ignore
+                    name: str = command.target.name  # type: ignore
+                    if name in definitions:
+                        errors.append(f"{name} is assigned more than once")
+                    definitions[name] = (block_id, command_id)
+
+        for block_id, block in cfg.blocks.items():
+            if block_id not in dominators:
+                continue
+            phis_closed = False
+            registers: set[str] = set()
+            for command_id, command in enumerate(block.commands):
+                if isinstance(command.operand_a, Phi):
+                    if phis_closed:
+                        errors.append(f"phi {command} is not at the beginning of {block}")
+                    if set(command.operand_a.sources) != set(block.predecessors):
+                        errors.append(f"phi {command} does not match the predecessors of {block}")
+                    for predecessor, source in command.operand_a.sources.items():
+                        if predecessor in dominators and not self._is_available(
+                            ssa, dominators, definitions, source, predecessor, None
+                        ):
+                            errors.append(
+                                f"{source} is not defined before the end of block {predecessor}"
+                            )
+                    continue
+                phis_closed = True
+                for value in (command.operand_a, command.operand_b):
+                    if isinstance(value, PseudoRegister) and value.name not in registers:
+                        errors.append(f"{value.name} is used in {block} without being set there")
+                    if not self._is_available(
+                        ssa, dominators, definitions, value, block_id, command_id
+                    ):
+                        errors.append(f"{value} is used in {block} before being defined")
+                if isinstance(command.target, PseudoRegister):
+                    registers.add(command.target.name)
+
+        for varname, version in ssa.exit_values.items():
+            if version.name not in definitions:
+                errors.append(f"{varname} ends the program as {version.name} that is never defined")
+        return errors
+
+    def _is_available(
+        self,
+        ssa: SSAForm,
+        dominators: dict[int, int],
+        definitions: dict[str, tuple[int, int]],
+        value: object,
+        block_id: int,
+        command_id: int | None,
+    ) -> bool:
+        """Whether a used value is defined before the command, or before the end of the block"""
+        if not ssa.is_tracked(value) or value.name not in ssa.origins:  # type: ignore
+            return True
+        definition = definitions.get(value.name)  # type: ignore
+        if definition is None:
+            return False
+        definition_block, definition_id = definition
+        if definition_block == block_id:
+            return command_id is None or definition_id < command_id
+        return ssa.cfg.dominates(dominators, definition_block, block_id)
+
+
+def declare_variables(representation: Representation) -> int:
+    """Make every variable stored before it is read, in a scope outliving all its usages
+
+    `Generation` takes the stack slot of a variable when going over its first store, and gives it
+    back at the end of the scope of that store. Variables not fitting that, like the ones created
+    when leaving SSA form, are declared at the beginning of the program. Returns how many were.
+    """
+    bound_variables = get_memory_bound_variables(representation)
+    parents: list[int | None] = []
+    open_scopes: list[int] = []
+    declared_in: dict[str, int | None] = {}
+    undeclared: dict[str, Variable] = {}
+
+    def is_open(scope_id: int | None) -> bool:
+        return scope_id is None or scope_id in open_scopes
+
+    for command in representation.commands:
+        if command.operation == CommandType.ESCALATE:
+            parents.append(open_scopes[-1] if open_scopes else None)
+            open_scopes.append(len(parents) - 1)
+            continue
+        if command.operation == CommandType.DEESCALATE:
+            if open_scopes:
+                open_scopes.pop()
+            continue
+        for value in (command.operand_a, command.operand_b):
+            if isinstance(value, Variable) and value.name not in bound_variables:
+                if value.name not in declared_in or not is_open(declared_in[value.name]):
+                    undeclared.setdefault(value.name, value)
+        target = command.target
+        if isinstance(target, Variable) and target.name not in bound_variables:
+            if target.name not in declared_in and command.operation == CommandType.STORE:
+                declared_in[target.name] = open_scopes[-1] if open_scopes else None
+            elif target.name not in declared_in or not is_open(declared_in[target.name]):
+                undeclared.setdefault(target.name, target)
+
+    if not undeclared:
+        return 0
+    position = next(
+        (
+            command_id + 1
+            for command_id, command in enumerate(representation.commands)
+            if command.operation == CommandType.ESCALATE
+        ),
+        0,
+    )
+    declarations = [
+        Command(
+            operation=CommandType.STORE,
+            target=Variable(name=variable.name, var_type=variable.var_type),
+            operand_a="0",
+        )
+        for variable in undeclared.values()
+    ]
+    representation.insert_commands(position, declarations)
+    return len(declarations)
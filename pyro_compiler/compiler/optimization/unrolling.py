@@ -0,0 +1,348 @@
+import copy
+from dataclasses import dataclass
+
+from pyro_compiler.compiler.optimization.cfg import ControlFlowGraph
+from pyro_compiler.compiler.optimization.constant_propagation import parse_constant, to_signed
+from pyro_compiler.compiler.optimization.induction_variables import get_offset
+from pyro_compiler.compiler.optimization.liveness import get_memory_bound_variables
+from pyro_compiler.compiler.optimization.loops import Loop, find_loops
+from pyro_compiler.compiler.optimization.passes import RepresentationPass
+from pyro_compiler.compiler.optimization.ssa import declare_variables
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+DEFAULT_UNROLL_FACTOR = 4
+DEFAULT_UNROLL_BUDGET = 96
+
+JUMP_CONDITIONS = {
+    CommandType.JE: lambda a, b: a == b,
+    CommandType.JZ: lambda a, b: a == b,
+    CommandType.JNE: lambda a, b: a != b,
+    CommandType.JG: lambda a, b: a > b,
+    CommandType.JGE: lambda a, b: a >= b,
+    CommandType.JL: lambda a, b: a < b,
+    CommandType.JLE: lambda a, b: a <= b,
+}
+# jumps taken when the ones they stand for are not
+NEGATED_JUMPS: dict[CommandType, CommandType] = {
+    CommandType.JE: CommandType.JNE,
+    CommandType.JZ: CommandType.JNE,
+    CommandType.JNE: CommandType.JE,
+    CommandType.JG: CommandType.JLE,
+    CommandType.JGE: CommandType.JL,
+    CommandType.JL: CommandType.JGE,
+    CommandType.JLE: CommandType.JG,
+}
+# jumps taken on the same comparison made with its operands swapped
+SWAPPED_JUMPS: dict[CommandType, CommandType] = {
+    CommandType.JE: CommandType.JE,
+    CommandType.JZ: CommandType.JZ,
+    CommandType.JNE: CommandType.JNE,
+    CommandType.JG: CommandType.JL,
+    CommandType.JGE: CommandType.JLE,
+    CommandType.JL: CommandType.JG,
+    CommandType.JLE: CommandType.JGE,
+}
+
+
+@dataclass
+class CountedLoop:
+    """Innermost loop comparing a counter changed by a constant step with a bound first thing.
+
+    Fields:
+        - `loop[Loop]`: loop of the control flow graph
+        - `counter[Variable]`: variable the header compares
+        - `step[int]`: value added to the counter on every iteration
+        - `bound[Variable | str]`: value the counter is compared with, the same on every iteration
+        - `exit_jump[CommandType]`: jump leaving the loop when comparing the counter to the bound
+        - `body[int]`: block every iteration starts with, right after the header
+        - `exit[int]`: block the header leaves the loop to
+        - `initial[int | None]`: value of the counter when entering the loop, when known
+        - `limit[int | None]`: value of the bound, when known
+
+    """
+
+    loop: Loop
+    counter: Variable
+    step: int
+    bound: Variable | str
+    exit_jump: CommandType
+    body: int
+    exit: int
+    initial: int | None = None
+    limit: int | None = None
+
+    def get_trip_count(self, max_count: int) -> int | None:
+        """Number of iterations the loop makes, None when not known or above `max_count`"""
+        if self.initial is None or self.limit is None:
+            return None
+        is_leaving = JUMP_CONDITIONS[self.exit_jump]
+        value = self.initial
+        for count in range(max_count + 1):
+            if is_leaving(value, self.limit):
+                return count
+            value = to_signed(value + self.step)
+        return None
+
+    def is_monotonic(self) -> bool:
+        """Whether the counter only gets closer to leaving the loop, iteration after iteration"""
+        if self.step > 0:
+            return self.exit_jump in (CommandType.JG, CommandType.JGE)
+        return self.exit_jump in (CommandType.JL, CommandType.JLE)
+
+
+def get_entry_value(commands: list[Command], variable: Variable) -> int | None:
+    """Constant the commands leave in the variable, None when they do not store one last"""
+    for command in reversed(commands):
+        if isinstance(command.target, Variable) and command.target.name == variable.name:
+            if command.operation != CommandType.STORE or not isinstance(command.operand_a, str):
+                return None
+            return parse_constant(command.operand_a)
+    return None
+
+
+def find_counted_loop(
+    cfg: ControlFlowGraph, loop: Loop, bound_variables: set[str]
+) -> CountedLoop | None:
+    """Counter, step and bound of a loop, None when it is not a counted one
+
+    The header has to be a comparison and a jump leaving the loop, the single latch has to jump
+    back to it and the counter has to be assigned once, in a block every iteration goes through.
+    """
+    header = cfg.blocks[loop.header]
+    entries = loop.get_entries(cfg)
+    if len(loop.latches) != 1 or len(entries) != 1 or len(header.commands) != 2:
+        return None
+    comparison, jump = header.commands
+    if comparison.operation != CommandType.CMP or jump.operation not in JUMP_CONDITIONS:
+        return None
+    latch = cfg.blocks[loop.latches[0]]
+    if latch.terminator is None or latch.terminator.operation != CommandType.JMP:
+        return None
+    if any(
+        successor not in loop.blocks
+        for block_id in loop.blocks - {loop.header}
+        for successor in cfg.blocks[block_id].successors
+    ):
+        return None
+
+    jump_block = cfg.get_jump_block(jump)
+    body_block, exit_block = header.fallthrough, jump_block
+    exit_jump = jump.operation
+    if jump_block in loop.blocks:
+        body_block, exit_block = jump_block, header.fallthrough
+        exit_jump = NEGATED_JUMPS[jump.operation]
+    if body_block is None or exit_block is None or body_block == loop.header:
+        return None
+    assignments: dict[str, list[tuple[int, Command]]] = {}
+    for block_id in loop.blocks:
+        for command in cfg.blocks[block_id].commands:
+            if isinstance(command.target, Variable):
+                assignments.setdefault(command.target.name, []).append((block_id, command))
+    counter: object = comparison.operand_a
+    bound: object = comparison.operand_b
+    if not isinstance(counter, Variable) or counter.name not in assignments:
+        counter, bound = bound, counter
+        exit_jump = SWAPPED_JUMPS[exit_jump]
+    if (
+        not isinstance(counter, Variable)
+        or counter.name in bound_variables
+        or len(assignments.get(counter.name, ())) != 1
+    ):
+        return None
+    if isinstance(bound, Variable):
+        if bound.name in bound_variables or bound.name in assignments:
+            return None
+    elif not isinstance(bound, str) or parse_constant(bound) is None:
+        return None
+
+    update_block, update = assignments[counter.name][0]
+    dominators = cfg.compute_dominators()
+    if not cfg.dominates(dominators, update_block, loop.latches[0]):
+        return None
+    offsets: dict[str, int] = {}
+    step: int | None = None
+    for command in cfg.blocks[update_block].commands:
+        offset = get_offset(command, counter, offsets)
+        if command is update:
+            step = offset
+            break
+        if isinstance(command.target, PseudoRegister):
+            if offset is None:
+                offsets.pop(command.target.name, None)
+            else:
+                offsets[command.target.name] = offset
+    if not step:
+        return None
+
+    entry_commands = cfg.blocks[entries[0]].commands
+    return CountedLoop(
+        loop=loop,
+        counter=counter,
+        step=step,
+        bound=bound,  # type: ignore
+        exit_jump=exit_jump,
+        body=body_block,
+        exit=exit_block,
+        initial=get_entry_value(entry_commands, counter),
+        limit=(
+            get_entry_value(entry_commands, bound)
+            if isinstance(bound, Variable)
+            else parse_constant(bound)  # type: ignore
+        ),
+    )
+
+
+class LoopUnrolling(RepresentationPass):
+    """Repeats the bodies of counted loops, for fewer comparisons and jumps to be made.
+
+    Innermost loops whose trip count is known at compile time are replaced by that many copies
+    of their body when they fit into `budget` commands. The others get a loop running `factor`
+    copies of the body per iteration, for as long as as many iterations are left, followed by the
+    original loop running the remaining ones. The factor is lowered for the copies to fit into the
+    budget, a factor of 1 leaving only the loops with a known trip count to be unrolled.
+
+    Fields:
+        - `factor[int]`: copies of the body made by partial unrolling
+        - `budget[int]`: number of commands the copies of a body may take
+
+    """
+
+    name = "unroll"
+    statistic = "unrolled"
+
+    def __init__(self, factor: int = DEFAULT_UNROLL_FACTOR, budget: int = DEFAULT_UNROLL_BUDGET):
+        if factor < 1:
+            raise Exception(f"The unroll factor has to be at least 1, got {factor}")
+        self.factor = factor
+        self.budget = budget
+
+    def __call__(self, representation: Representation) -> int:
+        cfg = ControlFlowGraph(representation)
+        bound_variables = get_memory_bound_variables(representation)
+        loops = find_loops(cfg)
+        unrolled_count = 0
+        for loop in loops:
+            if any(other is not loop and other.blocks < loop.blocks for other in loops):
+                continue
+            counted_loop = find_counted_loop(cfg, loop, bound_variables)
+            if counted_loop is None:
+                continue
+            size = sum(
+                len(cfg.blocks[block_id].commands) for block_id in loop.blocks - {loop.header}
+            )
+            trip_count = counted_loop.get_trip_count(max_count=self.budget // max(size, 1))
+            if trip_count is not None:
+                self._unroll_fully(cfg, counted_loop, trip_count)
+            else:
+                factor = min(self.factor, self.budget // max(size, 1))
+                if factor < 2 or not counted_loop.is_monotonic():
+                    continue
+                self._unroll_partially(cfg, counted_loop, factor)
+            unrolled_count += 1
+        if unrolled_count:
+            cfg.linearize()
+            declare_variables(representation)
+        return unrolled_count
+
+    def _copy_body(
+        self, cfg: ControlFlowGraph, counted_loop: CountedLoop, before: int
+    ) -> tuple[int, int]:
+        """Place a copy of the body before a block, returning the copies of its first block and of
+        the latch
+
+        The copy of the latch is left going nowhere, for the caller to point it at what follows.
+        """
+        loop = counted_loop.loop
+        copies: dict[int, int] = {}
+        for block_id in [block_id for block_id in cfg.blocks if block_id in loop.blocks]:
+            if block_id != loop.header:
+                commands = [copy.copy(command) for command in cfg.blocks[block_id].commands]
+                copies[block_id] = cfg.add_block(commands, before=before).block_id
+        latch = loop.latches[0]
+        for block_id, copy_id in copies.items():
+            block, block_copy = cfg.blocks[block_id], cfg.blocks[copy_id]
+            if block_id == latch:
+                block_copy.commands.pop()
+                continue
+            for successor in block.successors:
+                cfg.add_edge(copy_id, copies[successor])
+            if block.fallthrough is not None:
+                block_copy.fallthrough = copies[block.fallthrough]
+            terminator = block.terminator
+            if terminator is not None:
+                jump_block = copies[cfg.get_jump_block(terminator)]  # type: ignore
+                block_copy.commands[-1] = Command(
+                    operation=terminator.operation, operand_a=cfg.get_block_label(jump_block)
+                )
+        return copies[counted_loop.body], copies[latch]
+
+    def _link(self, cfg: ControlFlowGraph, latch_copy: int, target: int):
+        cfg.add_edge(latch_copy, target)
+        cfg.blocks[latch_copy].fallthrough = target
+
+    def _unroll_fully(self, cfg: ControlFlowGraph, counted_loop: CountedLoop, trip_count: int):
+        loop = counted_loop.loop
+        entry = loop.get_entries(cfg)[0]
+        previous: int | None = None
+        first = counted_loop.exit
+        for _ in range(trip_count):
+            body_copy, latch_copy = self._copy_body(cfg, counted_loop, before=loop.header)
+            if previous is None:
+                first = body_copy
+            else:
+                self._link(cfg, previous, body_copy)
+            previous = latch_copy
+        if previous is not None:
+            self._link(cfg, previous, counted_loop.exit)
+        cfg.redirect_edge(entry, loop.header, first)
+        for block_id in loop.blocks:
+            cfg.remove_block(block_id)
+
+    def _unroll_partially(self, cfg: ControlFlowGraph, counted_loop: CountedLoop, factor: int):
+        """Run the copies of the body while enough iterations are left, the loop running the rest"""
+        loop = counted_loop.loop
+        entry = loop.get_entries(cfg)[0]
+        # the last of the iterations the copies make has to be one the loop would make
+        offset = (factor - 1) * counted_loop.step
+        test: list[Command] = []
+        if counted_loop.limit is not None:
+            test.append(
+                Command(
+                    operation=CommandType.CMP,
+                    operand_a=counted_loop.counter,
+                    operand_b=str(counted_loop.limit - offset),
+                )
+            )
+        else:
+            register = PseudoRegister(order=8)
+            test += [
+                Command(
+                    operation=CommandType.SUM,
+                    target=register,
+                    operand_a=counted_loop.counter,
+                    operand_b=str(offset),
+                ),
+                Command(
+                    operation=CommandType.CMP, operand_a=register, operand_b=counted_loop.bound
+                ),
+            ]
+        header = cfg.add_block(test, before=loop.header)
+        header.commands.append(
+            Command(operation=counted_loop.exit_jump, operand_a=cfg.get_block_label(loop.header))
+        )
+        previous = header.block_id
+        for _ in range(factor):
+            body_copy, latch_copy = self._copy_body(cfg, counted_loop, before=loop.header)
+            if previous == header.block_id:
+                cfg.add_edge(header.block_id, body_copy)
+                header.fallthrough = body_copy
+            else:
+                self._link(cfg, previous, body_copy)
+            previous = latch_copy
+        self._link(cfg, previous, header.block_id)
+        cfg.add_edge(header.block_id, loop.header)
+        cfg.redirect_edge(entry, loop.header, header.block_id)
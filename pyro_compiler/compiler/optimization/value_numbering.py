@@ -0,0 +1,285 @@
+from pyro_compiler.compiler.optimization.cfg import BasicBlock
+from pyro_compiler.compiler.optimization.constant_propagation import parse_constant
+from pyro_compiler.compiler.optimization.passes import SSAPass
+from pyro_compiler.compiler.optimization.ssa import SSAForm
+from pyro_compiler.compiler.representation.command import Command, CommandType
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+# operations generated as the same instructions compute the same values
+SAME_OPERATIONS: dict[CommandType, CommandType] = {
+    CommandType.DIV: CommandType.FLOOR,
+    CommandType.NOT: CommandType.BIT_NOT,
+    CommandType.AND: CommandType.BIT_AND,
+    CommandType.OR: CommandType.BIT_OR,
+}
+SWAPPED_OPERATIONS: dict[CommandType, CommandType] = {
+    CommandType.LT: CommandType.GT,
+    CommandType.LTE: CommandType.GTE,
+}
+COMMUTATIVE_OPERATIONS = (
+    CommandType.SUM,
+    CommandType.MUL,
+    CommandType.BIT_AND,
+    CommandType.BIT_OR,
+    CommandType.BIT_XOR,
+    CommandType.EQ,
+    CommandType.NEQ,
+)
+PURE_OPERATIONS = (
+    CommandType.SUB,
+    CommandType.POV,
+    CommandType.FLOOR,
+    CommandType.REMAIN,
+    CommandType.GT,
+    CommandType.GTE,
+    CommandType.BIT_NOT,
+    CommandType.BIT_SHL,
+    CommandType.BIT_SHR,
+    CommandType.CONVERT,
+    *COMMUTATIVE_OPERATIONS,
+)
+# `div` leaves both the quotient and the remainder, one of them is kept for the other to reuse
+DIVISION_RESULTS: dict[CommandType, CommandType] = {
+    CommandType.FLOOR: CommandType.REMAIN,
+    CommandType.REMAIN: CommandType.FLOOR,
+}
+
+ExpressionT = tuple[str, int | str] | tuple[CommandType, int, int | None]
+LeaderT = PseudoRegister | Variable
+
+
+class ValueNumbering(SSAPass):
+    """Dominator scoped global value numbering over an SSA form.
+
+    Operands get numbers standing for the values they hold, versions of variables being assigned
+    once, and operations over the same numbers compute the same values. Blocks are visited
+    walking the dominator tree, an operation computed again is removed and its register replaced
+    with what holds the value: a version, a register of the same block not overwritten yet, or a
+    new variable the first operation is made to compute into.
+
+    `FLOOR` and `REMAIN` over the same operands are computed by the same `div`, so the second one
+    is moved right after the first one, into a new variable, for `Generation` to emit one `div`.
+    """
+
+    name = "gvn"
+    statistic = "reused"
+
+    def __call__(self, ssa: SSAForm) -> int:
+        self.ssa = ssa
+        self.numbers: dict[ExpressionT, int] = {}
+        self.variable_numbers: dict[str, int] = {}
+        # versions holding the values, and the commands computing them first, by number
+        self.leaders: dict[int, Variable] = {}
+        self.sites: dict[int, tuple[int, Command]] = {}
+        self.added: dict[int, list[tuple[dict, int]]] = {}
+        self.pending: dict[int, list[Command]] = {}
+
+        reused_count = 0
+        tree = ssa.cfg.compute_dominator_tree()
+        # the tree is walked without recursion, as long programs make it deep
+        walk: list[tuple[int, bool]] = [(ssa.cfg.entry.block_id, False)]
+        while walk:
+            block_id, is_left = walk.pop()
+            if is_left:
+                for table, number in self.added.pop(block_id):
+                    table.pop(number, None)
+                continue
+            self.added[block_id] = []
+            reused_count += self._number_block(ssa.cfg.blocks[block_id])
+            walk.append((block_id, True))
+            for child in reversed(tree[block_id]):
+                walk.append((child, False))
+        return reused_count
+
+    def _get_number(self, expression: ExpressionT) -> int:
+        return self.numbers.setdefault(expression, len(self.numbers))
+
+    def _add(self, block_id: int, table: dict, number: int, value: object):
+        """Make a value available in the blocks dominated by the block"""
+        table[number] = value
+        self.added[block_id].append((table, number))
+
+    def _number_operand(self, operand: object, registers: dict[str, int]) -> int | None:
+        if isinstance(operand, str):
+            constant = parse_constant(operand)
+            return None if constant is None else self._get_number(("constant", constant))
+        if isinstance(operand, PseudoRegister):
+            return registers.get(operand.name)
+        if self.ssa.is_tracked(operand):
+            variable: Variable = operand  # type: ignore
+            if variable.name not in self.variable_numbers:
+                number = self._get_number(("version", variable.name))
+                self.variable_numbers[variable.name] = number
+            return self.variable_numbers[variable.name]
+        return None
+
+    def _get_expression(self, command: Command, registers: dict[str, int]) -> ExpressionT | None:
+        operation = SAME_OPERATIONS.get(command.operation, command.operation)
+        if operation not in PURE_OPERATIONS:
+            return None
+        operand_a = self._number_operand(command.operand_a, registers)
+        operand_b = (
+            None
+            if command.operand_b is None
+            else self._number_operand(command.operand_b, registers)
+        )
+        if operand_a is None or (command.operand_b is not None and operand_b is None):
+            return None
+        if operation in SWAPPED_OPERATIONS:
+            operation = SWAPPED_OPERATIONS[operation]
+            operand_a, operand_b = operand_b, operand_a  # type: ignore
+        if operation in COMMUTATIVE_OPERATIONS and operand_a > operand_b:  # type: ignore
+            operand_a, operand_b = operand_b, operand_a  # type: ignore
+        return (operation, operand_a, operand_b)  # type: ignore
+
+    def _number_block(self, block: BasicBlock) -> int:
+        """Remove the operations of the block computing available values, returning how many"""
+        # numbers of the values the registers stand for, and of the ones they actually hold
+        registers: dict[str, int] = {}
+        held: dict[str, int] = {}
+        replaced: dict[str, LeaderT] = {}
+        local_leaders: dict[int, PseudoRegister] = {}
+        commands: list[Command] = []
+        self.pending[block.block_id] = commands
+        reused_count = 0
+        for command_id, command in enumerate(block.commands):
+            target = command.target
+            if command.operation == CommandType.PHI:
+                self._number_operand(target, registers)
+                commands.append(command)
+                continue
+            for field in ("operand_a", "operand_b"):
+                operand = getattr(command, field)
+                if isinstance(operand, PseudoRegister) and operand.name in replaced:
+                    setattr(command, field, replaced[operand.name])
+            if target is None:
+                commands.append(command)
+                continue
+
+            expression: ExpressionT | None = None
+            number: int | None
+            if command.operation == CommandType.STORE:
+                number = self._number_operand(command.operand_a, registers)
+            else:
+                expression = self._get_expression(command, registers)
+                number = None if expression is None else self._get_number(expression)
+            if isinstance(target, PseudoRegister):
+                replaced.pop(target.name, None)
+
+            leader: LeaderT | None = None
+            if expression is not None and number is not None:
+                leader = self.leaders.get(number)
+                local_leader = local_leaders.get(number)
+                if (
+                    leader is None
+                    and local_leader is not None
+                    and held.get(local_leader.name) == number
+                    and isinstance(target, PseudoRegister)
+                    and self._outlives(block.commands[command_id + 1 :], target, local_leader)
+                ):
+                    leader = local_leader
+                if leader is None:
+                    leader = self._promote(block.block_id, number, held)
+                if leader is None:
+                    leader = self._share_division(expression)
+            if leader is not None:
+                reused_count += 1
+                if isinstance(target, PseudoRegister):
+                    replaced[target.name] = leader
+                    registers[target.name] = number  # type: ignore
+                    continue
+                command = Command(operation=CommandType.STORE, target=target, operand_a=leader)
+
+            if number is None:
+                number = self._get_number(("unknown", len(self.numbers)))
+            if leader is None and expression is not None and number not in self.sites:
+                self._add(block.block_id, self.sites, number, (block.block_id, command))
+            if isinstance(target, PseudoRegister):
+                registers[target.name] = number
+                held[target.name] = number
+                local_leader = local_leaders.get(number)
+                if local_leader is None or held.get(local_leader.name) != number:
+                    local_leaders[number] = target
+            elif self.ssa.is_tracked(target):
+                self.variable_numbers[target.name] = number
+                if number not in self.leaders:
+                    self._add(block.block_id, self.leaders, number, target)
+            commands.append(command)
+
+        block.commands = commands
+        del self.pending[block.block_id]
+        return reused_count
+
+    def _outlives(
+        self, commands: list[Command], register: PseudoRegister, leader: PseudoRegister
+    ) -> bool:
+        """Whether the leader keeps its value for as long as the register is read"""
+        is_overwritten = False
+        for command in commands:
+            if register in (command.operand_a, command.operand_b) and is_overwritten:
+                return False
+            if command.target == register:
+                return True
+            if command.target == leader:
+                is_overwritten = True
+        return True
+
+    def _make_variable(self, site_block: int, operation: CommandType, number: int) -> Variable:
+        variable = self.ssa.make_variable(operation.name.lower())
+        self.variable_numbers[variable.name] = number
+        self._add(site_block, self.leaders, number, variable)
+        return variable
+
+    def _get_position(self, block_id: int, site: Command) -> tuple[list[Command], int]:
+        commands = self.pending.get(block_id, self.ssa.cfg.blocks[block_id].commands)
+        return commands, next(
+            command_id for command_id, command in enumerate(commands) if command is site
+        )
+
+    def _promote(self, block_id: int, number: int, held: dict[str, int]) -> Variable | None:
+        """Keep the value of the command computing it first in a variable, for later reads"""
+        if number not in self.sites:
+            return None
+        site_block, site = self.sites[number]
+        register = site.target
+        if not isinstance(register, PseudoRegister) or (
+            site_block == block_id and held.get(register.name) == number
+        ):
+            return None
+        variable = self._make_variable(site_block, site.operation, number)
+        site.target = variable
+        commands, position = self._get_position(site_block, site)
+        for command in commands[position + 1 :]:
+            if command.operand_a == register:
+                command.operand_a = variable
+            if command.operand_b == register:
+                command.operand_b = variable
+            if command.target == register:
+                break
+        return variable
+
+    def _share_division(self, expression: ExpressionT) -> Variable | None:
+        """Compute the result of a division right after the one leaving it, into a variable"""
+        operation, operand_a, operand_b = expression  # type: ignore
+        if operation not in DIVISION_RESULTS:
+            return None
+        paired = self.numbers.get((DIVISION_RESULTS[operation], operand_a, operand_b))
+        if paired is None or paired not in self.sites:
+            return None
+        site_block, division = self.sites[paired]
+        if division.target in (division.operand_a, division.operand_b):
+            return None
+        variable = self._make_variable(site_block, operation, self._get_number(expression))
+        commands, position = self._get_position(site_block, division)
+        commands.insert(
+            position + 1,
+            Command(
+                operation=operation,
+                target=variable,
+                operand_a=division.operand_a,
+                operand_b=division.operand_b,
+            ),
+        )
+        return variable
@@ -1,2 +1,4 @@
 from .parsing import Node, NodeType, Parser  # noqa F403
+from .stream import IndexedTokenStream, StoredTokenStream, TokenStream  # noqa F403
 from .utils import Pattern, PatternMatcher, Union  # noqa F403
+from .arena import NodeArena  # noqa F403
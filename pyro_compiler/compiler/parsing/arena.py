@@ -0,0 +1,136 @@
+from array import array
+from collections import deque
+
+from pyro_compiler.compiler.parsing.parsing import Node, NodeType
+from pyro_compiler.compiler.tokens import TOKEN_TYPES_BY_CODE, Token
+
+
+NODE_TYPES_BY_CODE: dict[int, NodeType] = {node_type.value: node_type for node_type in NodeType}
+
+
+class NodeArena:
+    """Flat storage of an AST, indexed by node id
+
+    Every attribute of the nodes is kept in its own array, one entry per node. Nodes are
+    numbered breadth first starting with the root at id 0, so the children of a node always
+    have consecutive ids and are described by the id of the first child and their count.
+    Values are interned in the value table, and of the node tokens only the type, line and
+    position are kept. Missing values are stored as 0.
+
+    Fields:
+        - `node_types[array[int]]`: `NodeType` value of every node
+        - `term_types[array[int]]`: `NodeType` value of the term type of NODE_TERM nodes
+        - `values[array[int]]`: index of the node value in the value table
+        - `token_types[array[int]]`: `TokenType` value of the node token
+        - `token_lines[array[int]]`: line of the node token
+        - `token_positions[array[int]]`: position in line of the node token
+        - `first_children[array[int]]`: id of the first child of every node
+        - `child_counts[array[int]]`: number of children of every node
+        - `value_table[list[str | None]]`: distinct node values
+
+    """
+
+    def __init__(self, root: Node):
+        self.node_types: array[int] = array("B")
+        self.term_types: array[int] = array("B")
+        self.values: array[int] = array("I")
+        self.token_types: array[int] = array("B")
+        self.token_lines: array[int] = array("I")
+        self.token_positions: array[int] = array("I")
+        self.first_children: array[int] = array("I")
+        self.child_counts: array[int] = array("I")
+        self.value_table: list[str | None] = [None]
+        self.value_indexes: dict[str, int] = {}
+        self._store(root)
+
+    def __len__(self) -> int:
+        return len(self.node_types)
+
+    def node_type(self, node_id: int) -> NodeType:
+        return NODE_TYPES_BY_CODE[self.node_types[node_id]]
+
+    def value(self, node_id: int) -> str | None:
+        return self.value_table[self.values[node_id]]
+
+    def children(self, node_id: int) -> range:
+        first_child = self.first_children[node_id]
+        return range(first_child, first_child + self.child_counts[node_id])
+
+    def to_node(self, node_id: int = 0) -> Node:
+        """Rebuild the `Node` tree rooted at `node_id`, for code that works with `Node` trees"""
+        root = self._make_node(node_id)
+        pending: deque[tuple[int, Node]] = deque([(node_id, root)])
+        while pending:
+            parent_id, parent = pending.popleft()
+            for child_id in self.children(parent_id):
+                child = self._make_node(child_id)
+                parent.children.append(child)
+                pending.append((child_id, child))
+        return root
+
+    def nbytes(self) -> int:
+        return sum(
+            column.itemsize * len(column)
+            for column in (
+                self.node_types,
+                self.term_types,
+                self.values,
+                self.token_types,
+                self.token_lines,
+                self.token_positions,
+                self.first_children,
+                self.child_counts,
+            )
+        )
+
+    def _store(self, root: Node):
+        self._append(root)
+        pending: deque[Node] = deque([root])
+        node_id = 0
+        while pending:
+            node = pending.popleft()
+            self.first_children[node_id] = len(self.node_types)
+            self.child_counts[node_id] = len(node.children)
+            for child in node.children:
+                self._append(child)
+                pending.append(child)
+            node_id += 1
+
+    def _append(self, node: Node):
+        self.node_types.append(node.node_type.value)
+        self.term_types.append(node.term_type.value if node.term_type is not None else 0)
+        self.values.append(self._intern(node.value))
+        token = node.token
+        self.token_types.append(token.token_type.value if token is not None else 0)
+        self.token_lines.append((token.line or 0) if token is not None else 0)
+        self.token_positions.append((token.pos or 0) if token is not None else 0)
+        self.first_children.append(0)
+        self.child_counts.append(0)
+
+    def _make_node(self, node_id: int) -> Node:
+        token: Token | None = None
+        if self.token_types[node_id]:
+            token = Token(
+                token_type=TOKEN_TYPES_BY_CODE[self.token_types[node_id]],
+                line=self.token_lines[node_id] or None,
+                pos=self.token_positions[node_id] or None,
+                content=self.value(node_id) if self.term_types[node_id] else None,
+            )
+        return Node(
+            node_type=self.node_type(node_id),
+            value=self.value(node_id),
+            token=token,
+            term_type=NODE_TYPES_BY_CODE[self.term_types[node_id]]
+            if self.term_types[node_id]
+            else None,
+        )
+
+    def _intern(self, value: str | None) -> int:
+        if value is None:
+            return 0
+        index = self.value_indexes.get(value)
+        if index is None:
+            index = len(self.value_table)
+            self.value_table.append(value)
+            self.value_indexes[value] = index
+        return index
@@ -1,11 +1,13 @@
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from typing import Optional
 
 from pyro_compiler.compiler.errors.error_type import ErrorType
 from pyro_compiler.compiler.errors.message_registry import MessageRegistry
+from pyro_compiler.compiler.parsing.stream import IndexedTokenStream, StoredTokenStream, TokenStream
 from pyro_compiler.compiler.parsing.utils import StopExecution
-from pyro_compiler.compiler.tokens import Token, TokenType
+from pyro_compiler.compiler.tokens import Token, TokenStore, TokenType
 
 
 class NodeType(Enum):
@@ -47,26 +49,37 @@ class NodeType(Enum):
     NODE_BIT_SHR = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
+    """Node of the AST
+
+    Terms are leaves: instead of wrapping a separate NODE_IDENT / NODE_VALUE node, a NODE_TERM
+    node carries the identifier or the literal in `value`, its token in `token` and whether
+    it is an identifier or a literal in `term_type`.
+    """
+
     node_type: NodeType
     children: list["Node"] = field(default_factory=list)
     value: Optional[str] = None
     token: Token | None = None
+    term_type: NodeType | None = None
 
     def __repr__(self) -> str:
         return f"{self.node_type}: {self.value if self.value is not None else self.children}"
 
     def pprint(self, depth: int = 0) -> str:
-        if self.value is not None:
+        if self.value is not None and self.term_type is None:
             data = f"{''.join(' ' for _ in range(depth * 4))}{self.node_type}: {self.value} "
         else:
             data = f"{''.join(' ' for _ in range(depth * 4))}{self.node_type} "
         data += "{"
         children_pprints: list[str] = []
-        if self.children:
+        children = self.children
+        if self.term_type is not None:
+            children = [Node(node_type=self.term_type, value=self.value)]
+        if children:
             data += "\n"
-            for child in self.children:
+            for child in children:
                 children_pprints.append(child.pprint(depth=depth + 1))
             data += "\n".join(children_pprints)
             data += "".join(" " for _ in range(depth * 4)) + "}\n"
@@ -74,22 +87,43 @@ class Node:
             data += "}\n"
         return data
 
+    def count(self) -> int:
+        """Number of nodes in the tree rooted at this node"""
+        count = 0
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            count += 1
+            pending += node.children
+        return count
+
+
+@dataclass(slots=True)
+class ExprFrame:
+    min_prec: int
+    left: Node | None
+    operator: Node | None = None
+    in_parens: bool = False
+
 
 class Parser:
     def __init__(
-        self, message_registry: MessageRegistry | None = None, tokens: list[Token] | None = None
+        self,
+        message_registry: MessageRegistry | None = None,
+        tokens: Iterable[Token] | TokenStore | None = None,
     ):
         if tokens is None:
             tokens = []
-        self.tokens: list[Token] = tokens
+        self.tokens: TokenStream | IndexedTokenStream = self._make_stream(tokens)
         self.core_node = Node(node_type=NodeType.NODE_PROG, children=[])
         self.parens: int = 0
+        self.indentation: list[int] = [0]
         self.registry = (
             message_registry if message_registry is not None else MessageRegistry(code="")
         )
 
-    def __call__(self, tokens: list[Token]) -> Node:
-        self.tokens = tokens
+    def __call__(self, tokens: Iterable[Token] | TokenStore) -> Node:
+        self.tokens = self._make_stream(tokens)
         try:
             self._traverse_tokens()
         except StopExecution:
@@ -97,8 +131,8 @@ class Parser:
         return self.core_node
 
     def _traverse_tokens(self):
-        while len(self.tokens) != 0:
-            if self.tokens[0].token_type == TokenType.NEWLINE:
+        while not self.tokens.is_exhausted():
+            if self._peek_type(0) == TokenType.NEWLINE:
                 self._consume()
                 continue
             stmt = self._parse_scope(depth=0)
@@ -107,30 +141,28 @@ class Parser:
     def _parse_scope(self, depth: int = 0) -> Node:
         node_scope = Node(node_type=NodeType.NODE_SCOPE)
         if_started = False
-        while len(self.tokens) != 0:
-            if self._peek(0).token_type == TokenType.NEWLINE:
+        while not self.tokens.is_exhausted():
+            if self._peek_type(0) == TokenType.NEWLINE:
                 self._consume()
                 continue
-            if self._peek(0).token_type == TokenType.INDENT:
-                indent_level = self._count_indentation()
-                if indent_level > depth:
-                    self.registry.register_message(
-                        line=self._peek(0).line,  # type: ignore
-                        pos=self._peek(0).pos,  # type: ignore
-                        message_type=ErrorType.MISMATCHING_INDENT,
-                        required=str(depth * 4),
-                        got=str(indent_level * 4),
-                    )
-                if indent_level < depth:
-                    return node_scope
-
-                self._skip(indent_level)
-            elif self._peek(0).token_type != TokenType.INDENT and depth > 0:
+            if self._peek_type(0) == TokenType.DEDENT:
+                self._consume()
                 return node_scope
+            if self._peek_type(0) == TokenType.INDENT:
+                token = self._peek(0)
+                self.registry.register_message(
+                    line=token.line,  # type: ignore
+                    pos=token.pos,  # type: ignore
+                    message_type=ErrorType.MISMATCHING_INDENT,
+                    required=str(self.indentation[-1]),
+                    got=str(len(token.content or "")),
+                )
+                node_scope.children += self._parse_block(depth=depth + 1).children
+                continue
 
             stmts = self._parse_stmts()
             if isinstance(stmts, Node) and stmts.node_type == NodeType.NODE_IF:
-                subscope = self._parse_scope(depth=depth + 1)
+                subscope = self._parse_block(depth=depth + 1)
                 if len(subscope.children) == 0:
                     self.registry.register_message(
                         line=stmts.token.line,  # type: ignore
@@ -149,7 +181,7 @@ class Parser:
                         message_type=ErrorType.ILLEGAL_IF_CONSTRUCT,
                         reason="elif statement declared without if",
                     )
-                subscope = self._parse_scope(depth=depth + 1)
+                subscope = self._parse_block(depth=depth + 1)
                 if len(subscope.children) == 0:
                     self.registry.register_message(
                         line=stmts.token.line,  # type: ignore
@@ -168,7 +200,7 @@ class Parser:
                     )
                 node_if.children.append(stmts)
             elif isinstance(stmts, Node) and stmts.node_type == NodeType.NODE_ELSE:
-                subscope = self._parse_scope(depth=depth + 1)
+                subscope = self._parse_block(depth=depth + 1)
                 if len(subscope.children) == 0:
                     self.registry.register_message(
                         line=stmts.token.line,  # type: ignore
@@ -187,7 +219,7 @@ class Parser:
                 node_if.children.append(subscope)
                 if_started = False
             elif isinstance(stmts, Node) and stmts.node_type == NodeType.NODE_WHILE:
-                subscope = self._parse_scope(depth=depth + 1)
+                subscope = self._parse_block(depth=depth + 1)
                 if len(subscope.children) == 0:
                     self.registry.register_message(
                         line=stmts.token.line,  # type: ignore
@@ -207,8 +239,20 @@ class Parser:
 
         return node_scope
 
+    def _parse_block(self, depth: int) -> Node:
+        while not self.tokens.is_exhausted() and self._peek_type(0) == TokenType.NEWLINE:
+            self._consume()
+        if self.tokens.is_exhausted() or self._peek_type(0) != TokenType.INDENT:
+            return Node(node_type=NodeType.NODE_SCOPE)
+
+        indent = self._consume()
+        self.indentation.append(len(indent.content or ""))
+        node_scope = self._parse_scope(depth=depth)
+        self.indentation.pop()
+        return node_scope
+
     def _parse_stmts(self) -> list[Node] | Node:
-        match self._peek(0).token_type:
+        match self._peek_type(0):
             case TokenType.IDENT:
                 return self._parse_assignment_stmts()
             case TokenType.IF:
@@ -253,7 +297,7 @@ class Parser:
         token = self._consume()
         node_if = Node(node_type=NodeType.NODE_IF, token=token)
         condition = self._parse_expr(expected_final=(TokenType.COLON,))
-        if self._peek(0).token_type != TokenType.COLON:
+        if self._peek_type(0) != TokenType.COLON:
             self.registry.register_message(
                 line=token.line,  # type: ignore
                 pos=token.pos,  # type: ignore
@@ -270,7 +314,7 @@ class Parser:
         token = self._consume()
         node_elif = Node(node_type=NodeType.NODE_ELIF, token=token)
         condition = self._parse_expr(expected_final=(TokenType.COLON,))
-        if self._peek(0).token_type != TokenType.COLON:
+        if self._peek_type(0) != TokenType.COLON:
             self.registry.register_message(
                 line=token.line,  # type: ignore
                 pos=token.pos,  # type: ignore
@@ -286,7 +330,7 @@ class Parser:
     def _parse_else_stmt(self) -> Node:
         token = self._consume()
         node_else = Node(node_type=NodeType.NODE_ELSE, token=token)
-        if self._peek(0).token_type != TokenType.COLON:
+        if self._peek_type(0) != TokenType.COLON:
             self.registry.register_message(
                 line=token.line,  # type: ignore
                 pos=token.pos,  # type: ignore
@@ -301,7 +345,7 @@ class Parser:
         token = self._consume()
         node_while = Node(node_type=NodeType.NODE_WHILE, token=token)
         condition = self._parse_expr(expected_final=(TokenType.COLON,))
-        if self._peek(0).token_type != TokenType.COLON:
+        if self._peek_type(0) != TokenType.COLON:
             self.registry.register_message(
                 line=token.line,  # type: ignore
                 pos=token.pos,  # type: ignore
@@ -331,16 +375,10 @@ class Parser:
 
         if self._is_assignment(self._peek(0)):
             assign = self._consume()
-            return [
-                Node(
-                    node_type=NodeType.NODE_TERM,
-                    children=[Node(node_type=NodeType.NODE_IDENT, value=token_ident.content)],
-                    token=token_ident,
-                )
-            ], Node(
+            return [self._make_term(token_ident)], Node(
                 node_type=self._get_argument_assign_operator(token=assign), token=assign
             ) if assign.token_type != TokenType.EQ else None
-        elif self._peek(0).token_type == TokenType.COMMA:
+        elif self._peek_type(0) == TokenType.COMMA:
             self._consume()
             idents, assign_op = self._parse_idents()
             if assign_op is not None:
@@ -352,11 +390,7 @@ class Parser:
                 )
             idents.insert(
                 0,
-                Node(
-                    node_type=NodeType.NODE_TERM,
-                    children=[Node(node_type=NodeType.NODE_IDENT, value=token_ident.content)],
-                    token=token_ident,
-                ),
+                self._make_term(token_ident),
             )
             return idents, None
         else:
@@ -371,12 +405,12 @@ class Parser:
 
     def _parse_exprs(self, assign_op: Node | None = None, ident: Node | None = None) -> list[Node]:
         node_expr = self._parse_expr()
-        if self._peek(0).token_type == TokenType.NEWLINE:
+        if self._peek_type(0) == TokenType.NEWLINE:
             self._consume()
             if assign_op is not None:
                 return [self._make_binary(node_expr, assign_op, ident)]
             return [node_expr]
-        elif self._peek(0).token_type == TokenType.COMMA:
+        elif self._peek_type(0) == TokenType.COMMA:
             if assign_op is not None:
                 raise Exception("Unreachable")
             self._consume()
@@ -396,7 +430,7 @@ class Parser:
     def _parse_expr(
         self, expected_final: tuple[TokenType, ...] = (TokenType.NEWLINE, TokenType.COMMA)
     ) -> Node:
-        if self._peek(1).token_type in expected_final:
+        if self._peek_type(1) in expected_final:
             node = self._parse_leaf()
             if node is None:
                 raise Exception("Unreachable")
@@ -413,73 +447,92 @@ class Parser:
             )
         return result
 
-    def _parse_bin_expr(self, min_prec: int = -1) -> Node | None:
-        left_operand: Node | None = self._parse_leaf()
-
+    def _parse_bin_expr(self) -> Node | None:
+        """Precedence climbing with an explicit stack instead of recursion
+
+        Every frame on the stack stands for an operand that is being parsed: the minimal
+        precedence an operator needs to extend it, the operand parsed so far and what the
+        frame is waiting for (the right hand side of `operator` or the contents of a pair of
+        parens). Once a frame can not be extended anymore, its operand is handed over to the
+        frame below it. The resulting trees are the same as with recursive descent, but the
+        nesting of the expression is not limited by the Python call stack.
+        """
+        stack: list[ExprFrame] = [ExprFrame(min_prec=-1, left=self._parse_leaf())]
         while True:
-            node = self._parse_increasing_precedence(left_operand, min_prec)
-            if node == left_operand:
-                break
-            left_operand = node
-
-        return left_operand
-
-    def _parse_increasing_precedence(self, left_operand: Node | None, min_prec: int) -> Node | None:
-        next = self._peek(0)
-        if self._is_open_paren(next):
-            self.parens += 1
-            self._consume()
-            return self._parse_bin_expr()
-        if self._is_closed_paren(next):
-            self.parens -= 1
-            if self.parens < 0:
-                self.registry.register_message(
-                    line=self._peek(0).line,  # type: ignore
-                    pos=self._peek(0).pos,  # type: ignore
-                    message_type=ErrorType.MISSMATCH_PARENS_MORE,
+            frame = stack[-1]
+            next = self._peek(0)
+            if self._is_open_paren(next):
+                self.parens += 1
+                self._consume()
+                frame.in_parens = True
+                stack.append(ExprFrame(min_prec=-1, left=self._parse_leaf()))
+                continue
+            if self._is_closed_paren(next):
+                self.parens -= 1
+                if self.parens < 0:
+                    self.registry.register_message(
+                        line=self._peek(0).line,  # type: ignore
+                        pos=self._peek(0).pos,  # type: ignore
+                        message_type=ErrorType.MISSMATCH_PARENS_MORE,
+                    )
+                self._consume()
+            elif self._is_binop(next) and self._get_precedence(next) > frame.min_prec:
+                self._consume()
+                frame.operator = self._to_operator(next)
+                stack.append(
+                    ExprFrame(min_prec=self._get_precedence(next), left=self._parse_leaf())
                 )
-            self._consume()
-            return left_operand
-        if not self._is_binop(next):
-            return left_operand
+                continue
 
-        next_prec = self._get_precedence(next)
-        if next_prec <= min_prec:
-            return left_operand
-        self._consume()
-        right_operand = self._parse_bin_expr(next_prec)
-        if left_operand is None:
-            return self._make_unary(self._to_operator(next), right_operand)
-        return self._make_binary(left_operand, self._to_operator(next), right_operand)
+            result = stack.pop().left
+            while stack:
+                frame = stack[-1]
+                if frame.in_parens:
+                    frame.in_parens = False
+                    if result == frame.left:
+                        result = stack.pop().left
+                        continue
+                    frame.left = result
+                elif frame.left is None:
+                    frame.left = self._make_unary(frame.operator, result)  # type: ignore
+                else:
+                    frame.left = self._make_binary(frame.left, frame.operator, result)  # type: ignore
+                break
+            else:
+                return result
 
     def _parse_leaf(self) -> Node | None:
-        if self._peek(0).token_type not in [TokenType.IDENT, TokenType.NUMBER]:
+        if self._peek_type(0) not in [TokenType.IDENT, TokenType.NUMBER]:
             return None
-        token = self._consume()
-
-        return Node(
-            node_type=NodeType.NODE_TERM,
-            children=[
-                Node(
-                    node_type=NodeType.NODE_VALUE
-                    if token.token_type == TokenType.NUMBER
-                    else NodeType.NODE_IDENT,
-                    children=[],
-                    value=token.content,
-                    token=token,
-                )
-            ],
-        )
+        return self._make_term(self._consume())
 
     def _consume(self) -> Token:
-        return self.tokens.pop(0)
+        return self.tokens.consume()
 
     def _peek(self, distance: int = 1) -> Token:
-        return self.tokens[distance]
+        return self.tokens.peek(distance)
 
-    def _skip(self, distance: int = 1):
-        for _ in range(distance):
-            self._consume()
+    def _peek_type(self, distance: int = 1) -> TokenType:
+        return self.tokens.peek_type(distance)
+
+    @staticmethod
+    def _make_stream(tokens: Iterable[Token] | TokenStore) -> TokenStream | IndexedTokenStream:
+        if isinstance(tokens, TokenStore):
+            return StoredTokenStream(tokens)
+        if isinstance(tokens, list):
+            return IndexedTokenStream(tokens)
+        return TokenStream(tokens)
+
+    @staticmethod
+    def _make_term(token: Token) -> Node:
+        return Node(
+            node_type=NodeType.NODE_TERM,
+            value=token.content,
+            token=token,
+            term_type=NodeType.NODE_VALUE
+            if token.token_type == TokenType.NUMBER
+            else NodeType.NODE_IDENT,
+        )
 
     @staticmethod
     def _make_binary(left_operand: Node, operator: Node, right_operand: Node | None) -> Node:
@@ -687,10 +740,3 @@ class Parser:
                 raise Exception("Unreachable")
 
         return node_type
-
-    def _count_indentation(self) -> int:
-        indent_counter: int = 0
-        while self._peek(indent_counter).token_type == TokenType.INDENT:
-            indent_counter += 1
-
-        return indent_counter
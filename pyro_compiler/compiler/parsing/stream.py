@@ -0,0 +1,97 @@
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+
+from pyro_compiler.compiler.tokens import TOKEN_TYPES_BY_CODE, Token, TokenStore, TokenType
+
+
+class TokenStream:
+    """Lookahead buffer over a (possibly lazy) sequence of tokens
+
+    Tokens are pulled from the underlying iterator only when the parser peeks at or consumes
+    them, and are dropped from the buffer as soon as they are consumed. This way the number of
+    tokens held at once is bounded by the parser lookahead (the next token, the one after it and
+    a run of indentation tokens), not by the size of the source file.
+
+    Fields:
+        - `tokens[Iterator[Token]]`: source of the tokens that were not buffered yet
+        - `lookahead[deque[Token]]`: tokens that were peeked at, but not consumed yet
+
+    """
+
+    def __init__(self, tokens: Iterable[Token]):
+        self.tokens: Iterator[Token] = iter(tokens)
+        self.lookahead: deque[Token] = deque()
+
+    def peek(self, distance: int = 0) -> Token:
+        while len(self.lookahead) <= distance:
+            if not self._fill():
+                raise IndexError("token stream index out of range")
+        return self.lookahead[distance]
+
+    def peek_type(self, distance: int = 0) -> TokenType:
+        return self.peek(distance).token_type
+
+    def consume(self) -> Token:
+        if not self.lookahead and not self._fill():
+            raise IndexError("consume from an exhausted token stream")
+        return self.lookahead.popleft()
+
+    def is_exhausted(self) -> bool:
+        return not self.lookahead and not self._fill()
+
+    def _fill(self) -> bool:
+        token = next(self.tokens, None)
+        if token is None:
+            return False
+        self.lookahead.append(token)
+        return True
+
+
+class IndexedTokenStream:
+    """Cursor over tokens that are already in memory
+
+    Supports the same operations as `TokenStream`, but peeking and consuming only move an
+    index into the sequence, so every operation is O(1) and nothing is copied or removed.
+
+    Fields:
+        - `tokens[Sequence[Token]]`: tokens to read from
+        - `index[int]`: index of the next token to consume
+
+    """
+
+    def __init__(self, tokens: Sequence[Token]):
+        self.tokens = tokens
+        self.index: int = 0
+
+    def peek(self, distance: int = 0) -> Token:
+        return self.tokens[self._check_index(self.index + distance)]
+
+    def peek_type(self, distance: int = 0) -> TokenType:
+        return self.peek(distance).token_type
+
+    def consume(self) -> Token:
+        token = self.tokens[self._check_index(self.index)]
+        self.index += 1
+        return token
+
+    def is_exhausted(self) -> bool:
+        return self.index >= len(self.tokens)
+
+    def _check_index(self, index: int) -> int:
+        if index >= len(self.tokens):
+            raise IndexError("token stream index out of range")
+        return index
+
+
+class StoredTokenStream(IndexedTokenStream):
+    """Cursor over the tokens of a `TokenStore`
+
+    `peek_type` reads the type code straight from the store, without creating a token view.
+    """
+
+    def __init__(self, tokens: TokenStore):
+        super().__init__(tokens)  # type: ignore
+        self.types = tokens.types
+
+    def peek_type(self, distance: int = 0) -> TokenType:
+        return TOKEN_TYPES_BY_CODE[self.types[self._check_index(self.index + distance)]]
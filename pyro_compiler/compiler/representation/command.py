@@ -3,6 +3,7 @@ from enum import Enum, auto
 
 from pyro_compiler.compiler.parsing import Node
 from pyro_compiler.compiler.representation.label import Label
+from pyro_compiler.compiler.representation.phi import Phi
 from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
 from pyro_compiler.compiler.representation.struct_declaration import StructDeclaration
 from pyro_compiler.compiler.representation.variable import Variable, VarType
@@ -44,20 +45,21 @@ class CommandType(Enum):
     ESCALATE = auto()
     DEESCALATE = auto()
     STORE = auto()
+    PHI = auto()
 
 
 @dataclass
 class Command:
     operation: CommandType
     target: PseudoRegister | Variable | None
-    operand_a: PseudoRegister | str | Variable | Label | StructDeclaration
+    operand_a: PseudoRegister | str | Variable | Label | StructDeclaration | Phi
     operand_b: PseudoRegister | str | Variable | VarType | None = None
     node: Node | None = None
 
     def __init__(
         self,
         operation: CommandType,
-        operand_a: PseudoRegister | str | Variable | Label | StructDeclaration,
+        operand_a: PseudoRegister | str | Variable | Label | StructDeclaration | Phi,
         target: PseudoRegister | Variable | None = None,
         operand_b: PseudoRegister | str | Variable | VarType | None = None,
         node: Node | None = None,
@@ -84,6 +86,9 @@ class Command:
         if isinstance(operand_a, StructDeclaration) and operation != CommandType.STORE:
             raise Exception("Cannot use structure declaration aside command STORE")
 
+        if isinstance(operand_a, Phi) != (operation == CommandType.PHI):
+            raise Exception("Command PHI takes a phi and only it")
+
         if isinstance(operand_b, VarType) and operation != CommandType.CONVERT:
             raise Exception("Cannot use type as operand in not CONVERT command")
 
@@ -97,7 +102,7 @@ class Command:
         operand_a_text: str
         if isinstance(self.operand_a, str):
             operand_a_text = self.operand_a
-        elif isinstance(self.operand_a, StructDeclaration):
+        elif isinstance(self.operand_a, StructDeclaration | Phi):
             operand_a_text = self.operand_a.pprint()
         elif isinstance(self.operand_a, Variable | PseudoRegister | Label):
             operand_a_text = self.operand_a.name
@@ -1,6 +1,8 @@
+from dataclasses import dataclass, field
+
 from pyro_compiler.compiler.errors.error_type import ErrorType
 from pyro_compiler.compiler.errors.message_registry import MessageRegistry
-from pyro_compiler.compiler.parsing import Node, NodeType
+from pyro_compiler.compiler.parsing import Node, NodeArena, NodeType
 from pyro_compiler.compiler.representation.command import Command, CommandType
 from pyro_compiler.compiler.representation.label import Label
 from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
@@ -9,17 +11,26 @@ from pyro_compiler.compiler.representation.utils import get_variable_type, optyp
 from pyro_compiler.compiler.representation.variable import Variable, VarType
 
 
+@dataclass(slots=True)
+class BinExprFrame:
+    node: Node
+    operator: Node
+    operands: list[Node]
+    commands: list[Command | None] = field(default_factory=list)
+    values: list[str | PseudoRegister | Variable | None] = field(default_factory=list)
+
+
 class IRBuilder:
     def __init__(self, registry: MessageRegistry | None = None, ast: Node | None = None):
         self.ast: Node | None = ast
         self.commands: Representation = Representation(block_name="main")
-        self.label_names: list[str] = []
+        self.label_enumerations: dict[str, int] = {}
         self.used_register_count: int = 8
         self.registry = registry if registry is not None else MessageRegistry(code="")
 
-    def __call__(self, ast: Node) -> Representation:
+    def __call__(self, ast: Node | NodeArena) -> Representation:
         if self.ast is None:
-            self.ast = ast
+            self.ast = ast.to_node() if isinstance(ast, NodeArena) else ast
         self._parse_prog(self.ast)
         self.commands.clear_labels()
         return self.commands
@@ -82,13 +93,13 @@ class IRBuilder:
                 command_expr = self._parse_bin_expr(node_dec)
                 self.used_register_count = 8
                 self.commands.append(command_expr)
-                if node_term.children[0].value is None:
+                if node_term.value is None:
                     raise Exception("Unreachable")
                 var_type: VarType | None = get_variable_type(operation_type=command_expr.operation)
                 if var_type is None:
                     raise Exception("Unreachable")
                 var = self.commands.register_var(
-                    varname=node_term.children[0].value, var_type=var_type
+                    varname=node_term.value, var_type=var_type
                 )
                 command_declare = Command(
                     operation=CommandType.STORE,
@@ -98,20 +109,20 @@ class IRBuilder:
                 )
                 self.commands.append(command_declare)
             case NodeType.NODE_TERM:
-                if node_term.children[0].value is None:
+                if node_term.value is None:
                     raise Exception("Unreachable")
-                if node_dec.children[0].value is None:
+                if node_dec.value is None:
                     raise Exception("Unreachable")
                 operand_a: str | Variable | None
-                if node_dec.children[0].node_type == NodeType.NODE_IDENT:
-                    operand_a = self.commands.get_var(node_dec.children[0].value)
+                if node_dec.term_type == NodeType.NODE_IDENT:
+                    operand_a = self.commands.get_var(node_dec.value)
                     if operand_a is None:
                         raise Exception("Unreachable")
-                elif node_dec.children[0].node_type == NodeType.NODE_VALUE:
-                    operand_a = node_dec.children[0].value
+                elif node_dec.term_type == NodeType.NODE_VALUE:
+                    operand_a = node_dec.value
                 else:
                     raise Exception("Unreachable")
-                var = self.commands.register_var(varname=node_term.children[0].value)
+                var = self.commands.register_var(varname=node_term.value)
                 command_declare = Command(
                     operation=CommandType.STORE, target=var, operand_a=operand_a, node=node
                 )
@@ -219,24 +230,23 @@ class IRBuilder:
         jump_type: CommandType
         if condition.node_type == NodeType.NODE_TERM:
             comparison_target: str | Variable
-            comparison_target_node = condition.children[0]
-            if comparison_target_node.node_type == NodeType.NODE_IDENT:
-                if comparison_target_node.value is None:
+            if condition.term_type == NodeType.NODE_IDENT:
+                if condition.value is None:
                     raise Exception("Unreachable")
-                var = self.commands.get_var(comparison_target_node.value)
+                var = self.commands.get_var(condition.value)
                 if var is None:
                     self.registry.register_message(
-                        line=comparison_target_node.children[0].token.line,  # type: ignore
-                        pos=comparison_target_node.children[0].token.pos,  # type: ignore
+                        line=condition.token.line,  # type: ignore
+                        pos=condition.token.pos,  # type: ignore
                         message_type=ErrorType.UNKNOWN_VARIABLE,
-                        varname=comparison_target_node.children[0].value,  # type: ignore
+                        varname=condition.value,  # type: ignore
                     )
                     var = Variable("NOVAR")
                 comparison_target = var
-            elif comparison_target_node.node_type == NodeType.NODE_VALUE:
-                if comparison_target_node.value is None:
+            elif condition.term_type == NodeType.NODE_VALUE:
+                if condition.value is None:
                     raise Exception("Unreachable")
-                comparison_target = comparison_target_node.value
+                comparison_target = condition.value
             else:
                 raise Exception("Unreachable")
             if comparison_target is None:
@@ -278,55 +288,63 @@ class IRBuilder:
         return jump_type
 
     def _parse_bin_expr(self, node: Node) -> Command:
-        node_term_a: Node = node.children[0]
-        if node_term_a.node_type not in [NodeType.NODE_TERM, NodeType.NODE_BIN_EXPR]:
-            return self._make_unary(node)
-        command_a: Command | None = None
-        operand_a: str | PseudoRegister | Variable | None = None
-        match node_term_a.node_type:
-            case NodeType.NODE_BIN_EXPR:
-                command_a = self._parse_bin_expr(node_term_a)
-                operand_a = command_a.target
-            case NodeType.NODE_TERM:
-                if node_term_a.children[0].node_type == NodeType.NODE_IDENT:
-                    var = self.commands.get_var(node_term_a.children[0].value)  # type: ignore
-                    if var is None:
-                        self.registry.register_message(
-                            line=node_term_a.children[0].token.line,  # type: ignore
-                            pos=node_term_a.children[0].token.pos,  # type: ignore
-                            message_type=ErrorType.UNKNOWN_VARIABLE,
-                            varname=node_term_a.children[0].value,  # type: ignore
-                        )
-                        var = Variable("NOVAR")
-                    operand_a = var
-                else:
-                    operand_a = node_term_a.children[0].value
-            case _:
-                raise Exception("Unreachable")
-        node_op: Node = node.children[1]
-        node_term_b: Node = node.children[2]
-        command_b: Command | None = None
-        operand_b: str | PseudoRegister | Variable | None = None
-        match node_term_b.node_type:
-            case NodeType.NODE_BIN_EXPR:
-                command_b = self._parse_bin_expr(node_term_b)
-                operand_b = command_b.target
-            case NodeType.NODE_TERM:
-                if node_term_b.children[0].node_type == NodeType.NODE_IDENT:
-                    var = self.commands.get_var(node_term_b.children[0].value)  # type: ignore
-                    if var is None:
-                        self.registry.register_message(
-                            line=node_term_b.children[0].token.line,  # type: ignore
-                            pos=node_term_b.children[0].token.pos,  # type: ignore
-                            message_type=ErrorType.UNKNOWN_VARIABLE,
-                            varname=node_term_b.children[0].value,  # type: ignore
-                        )
-                        var = Variable("NOVAR")
-                    operand_b = var
-                else:
-                    operand_b = node_term_b.children[0].value
-            case _:
-                raise Exception("Unreachable")
+        """Post-order lowering of an expression tree with an explicit stack instead of recursion
+
+        Every frame on the stack stands for an expression whose operands are being lowered. An
+        operand that is an expression itself gets a frame of its own, and once all of its operands
+        are there, the command it lowers to is handed over to the frame below it. The commands are
+        the same as with recursive descent, but the nesting of the expression is not limited by
+        the Python call stack.
+        """
+        stack: list[BinExprFrame] = [self._make_frame(node)]
+        while True:
+            frame = stack[-1]
+            if len(frame.commands) < len(frame.operands):
+                node_term = frame.operands[len(frame.commands)]
+                match node_term.node_type:
+                    case NodeType.NODE_BIN_EXPR:
+                        stack.append(self._make_frame(node_term))
+                    case NodeType.NODE_TERM:
+                        frame.commands.append(None)
+                        frame.values.append(self._parse_term(node_term))
+                    case _:
+                        raise Exception("Unreachable")
+                continue
+            stack.pop()
+            if len(frame.operands) == 1:
+                command = self._make_unary(frame)
+            else:
+                command = self._make_binary(frame)
+            if not stack:
+                return command
+            stack[-1].commands.append(command)
+            stack[-1].values.append(command.target)
+
+    def _make_frame(self, node: Node) -> BinExprFrame:
+        if node.children[0].node_type not in [NodeType.NODE_TERM, NodeType.NODE_BIN_EXPR]:
+            return BinExprFrame(node=node, operator=node.children[0], operands=[node.children[1]])
+        return BinExprFrame(
+            node=node, operator=node.children[1], operands=[node.children[0], node.children[2]]
+        )
+
+    def _parse_term(self, node_term: Node) -> str | Variable | None:
+        if node_term.term_type != NodeType.NODE_IDENT:
+            return node_term.value
+        var = self.commands.get_var(node_term.value)  # type: ignore
+        if var is None:
+            self.registry.register_message(
+                line=node_term.token.line,  # type: ignore
+                pos=node_term.token.pos,  # type: ignore
+                message_type=ErrorType.UNKNOWN_VARIABLE,
+                varname=node_term.value,  # type: ignore
+            )
+            var = Variable("NOVAR")
+        return var
+
+    def _make_binary(self, frame: BinExprFrame) -> Command:
+        command_a, command_b = frame.commands
+        operand_a, operand_b = frame.values
+        node_op = frame.operator
 
         if command_a is not None:
             self.commands.append(command_a)
@@ -340,11 +358,11 @@ class IRBuilder:
                 operand_a=operand_a, operand_b=operand_b
             )
 
-        target: str | PseudoRegister | None
+        target: str | PseudoRegister | Variable | None
         if command_a is not None:
-            target = operand_a  # type: ignore
+            target = operand_a
         elif command_b is not None:
-            target = operand_b  # type: ignore
+            target = operand_b
         else:
             target = PseudoRegister(order=self.used_register_count)
 
@@ -355,7 +373,7 @@ class IRBuilder:
             target=target,  # type: ignore
             operand_a=operand_a,
             operand_b=operand_b,
-            node=node,
+            node=frame.node,
         )
         if command_a is None and command_b is None:
             self.used_register_count += 1
@@ -364,37 +382,23 @@ class IRBuilder:
             self.used_register_count -= 1
         return command_expr
 
-    def _make_unary(self, node: Node) -> Command:
-        operation = self._parse_operand(node.children[0])
-        node_term = node.children[1]
-        match node_term.node_type:
-            case NodeType.NODE_BIN_EXPR:
-                command = self._parse_bin_expr(node_term)
-                self.commands.append(command)
-                operand = command.target
-            case NodeType.NODE_TERM:
-                if node_term.children[0].node_type == NodeType.NODE_IDENT:
-                    var = self.commands.get_var(node_term.children[0].value)  # type: ignore
-                    if var is None:
-                        self.registry.register_message(
-                            line=node_term.children[0].token.line,  # type: ignore
-                            pos=node_term.children[0].token.pos,  # type: ignore
-                            message_type=ErrorType.UNKNOWN_VARIABLE,
-                            varname=node_term.children[0].value,  # type: ignore
-                        )
-                        var = Variable("NOVAR")
-                    operand = var
-                else:
-                    operand = node_term.children[0].value  # type: ignore
-            case _:
-                raise Exception("Unreachable")
+    def _make_unary(self, frame: BinExprFrame) -> Command:
+        command = frame.commands[0]
+        operand = frame.values[0]
+        if command is not None:
+            self.commands.append(command)
         target = (
             operand
             if isinstance(operand, PseudoRegister)
             else PseudoRegister(order=self.used_register_count)
         )
         self.used_register_count += 1
-        return Command(target=target, operation=operation, operand_a=operand, node=node)  # type: ignore
+        return Command(
+            target=target,
+            operation=self._parse_operand(frame.operator),
+            operand_a=operand,  # type: ignore
+            node=frame.node,
+        )
 
     def _process_operands_for_boolean_only_operations(
         self, operand_a: PseudoRegister | Variable | str, operand_b: PseudoRegister | Variable | str
@@ -486,20 +490,13 @@ class IRBuilder:
 
     def _generate_label_name(self, optype: str, scope_depth: int) -> str:
         label_name = f"{self.commands.block_name}_{optype}_{scope_depth}"
-        label_exists = True
-        while label_exists:
-            if label_name in self.label_names:
-                label_enumeration = label_name.split("_")[-1]
-                if not label_enumeration.isdigit():
-                    label_name += "_1"
-                else:
-                    label_enum = int(label_enumeration)
-                    label_enum += 1
-                    label_name += f"_{label_enum}"
-                continue
-            label_exists = False
-        self.label_names.append(label_name)
-        return label_name
+        label_enum = self.label_enumerations.get(label_name)
+        if label_enum is None:
+            self.label_enumerations[label_name] = scope_depth
+            return label_name
+        label_enum += 1
+        self.label_enumerations[label_name] = label_enum
+        return f"{label_name}_{label_enum}"
 
     def _get_scope_name_from_depth(self, scope_depth: int, scope_type: str) -> str:
         return f"scope_{scope_type}_{scope_depth}"
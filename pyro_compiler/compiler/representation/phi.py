@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+from pyro_compiler.compiler.representation.pseudo_register import PseudoRegister
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+@dataclass
+class Phi:
+    """Merge of the values a variable has in the blocks control comes from, used in SSA form
+
+    Fields:
+        - `sources[dict[int, PseudoRegister | Variable | str]]`: value coming from every
+          predecessor block, by the number of the block
+
+    """
+
+    sources: dict[int, PseudoRegister | Variable | str]
+
+    def pprint(self) -> str:
+        sources = ", ".join(
+            f"{block_id}: {source if isinstance(source, str) else source.name}"
+            for block_id, source in self.sources.items()
+        )
+        return f"[{sources}]"
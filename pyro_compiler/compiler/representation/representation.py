@@ -1,4 +1,4 @@
-from builtins import StopIteration
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 
 from pyro_compiler.compiler.representation.command import Command
@@ -15,21 +15,17 @@ class Representation:
     labels: dict[str, Label] = field(default_factory=dict)
     scopes: list[Scope] = field(default_factory=list)
     current_scope_id: int = -1
-    current_iteration_id: int = 0
     variable_table: dict[str, Variable] = field(default_factory=dict)
     declarations: dict[str, Structure] = field(default_factory=dict)
 
-    def __iter__(self) -> "Representation":
-        return self
-
-    def __next__(self) -> tuple[Command, Scope, Label | None]:
-        if self.current_iteration_id >= len(self.commands):
-            raise StopIteration()
-        command = self.commands[self.current_iteration_id]
-        label = self.take_label_by_id(self.current_iteration_id)
-        scope = self._get_scope_by_line(self.current_iteration_id)
-        self.current_iteration_id += 1
-        return command, scope, label
+    def __iter__(self) -> Iterator[tuple[Command, Scope, Label | None]]:
+        labels_by_position = self.get_labels_by_position()
+        scopes_by_line = self.get_scopes_by_line()
+        for line_id, command in enumerate(self.commands):
+            scope = scopes_by_line[line_id]
+            if scope is None:
+                raise Exception("Unreachable")
+            yield command, scope, labels_by_position.get(line_id)
 
     def append(self, command: Command):
         if isinstance(command.operand_a, Label):
@@ -76,18 +72,19 @@ class Representation:
         self.current_scope_id -= 1
 
     def clear_labels(self):
-        existing_positions: set[int] = set()
-        labels_to_delete: list[tuple[str, Label]] = []
-        for label_name, label in self.labels.items():
-            old_positions = len(existing_positions)
-            existing_positions.add(label.position)
-            if len(existing_positions) == old_positions:
-                labels_to_delete.append((label_name, label))
-
-        for label_name, label in labels_to_delete:
-            del self.labels[label_name]
-            existing_label = self._get_label_by_id(label.position)
-            self.replace_label_in_commands(old_label=label, new_label=existing_label)
+        existing_labels: dict[int, Label] = {}
+        replacements: dict[str, Label] = {}
+        for label_name, label in list(self.labels.items()):
+            existing_label = existing_labels.setdefault(label.position, label)
+            if existing_label is not label:
+                del self.labels[label_name]
+                replacements[label_name] = existing_label
+
+        if not replacements:
+            return
+        for command in self.commands:
+            if isinstance(command.operand_a, Label):
+                command.operand_a = replacements.get(command.operand_a.name, command.operand_a)
 
     def get_var(self, varname: str) -> Variable | None:
         checked_scope = self.current_scope_id
@@ -114,14 +111,15 @@ class Representation:
         header = f"{self.block_name}: " + "\n"
         if decl_block != "":
             header = decl_block + "\n" + header
+        labels_by_position = self.get_labels_by_position()
         for i, command in enumerate(self.commands):
-            label = self.take_label_by_id(i)
+            label = labels_by_position.get(i)
             if label is not None:
                 header += str(label) + "\n"
             header += "   " + str(command) + "\n"
-        if len(self.labels) != 0:
-            last_label: Label = list(self.labels.items())[-1][1]
-            header += str(last_label) + "\n"
+        trailing_labels = self.get_trailing_labels()
+        if len(trailing_labels) != 0:
+            header += str(trailing_labels[-1]) + "\n"
 
         return header
 
@@ -133,43 +131,99 @@ class Representation:
 
         return header
 
-    def take_label_by_id(self, label_id: int) -> Label | None:
-        label_to_remove: tuple[str, Label] | None = None
-        for label_name, label in self.labels.items():
-            if label.position == label_id:
-                label_to_remove = label_name, label
-                break
+    def get_labels_by_position(self) -> dict[int, Label]:
+        """Label to be placed before each command, indexed by the command position
 
-        if label_to_remove is None:
-            return None
-
-        label_name, label = label_to_remove
-        del self.labels[label_name]
-        return label
+        When several labels share a position, the first one registered is used.
+        """
+        labels_by_position: dict[int, Label] = {}
+        for label in self.labels.values():
+            if 0 <= label.position < len(self.commands):
+                labels_by_position.setdefault(label.position, label)
+        return labels_by_position
+
+    def get_trailing_labels(self) -> list[Label]:
+        """Labels that are not placed before any command, like the ones after the last one"""
+        labels_by_position = self.get_labels_by_position()
+        return [
+            label
+            for label in self.labels.values()
+            if labels_by_position.get(label.position) is not label
+        ]
+
+    def get_scopes_by_line(self) -> list[Scope | None]:
+        """Innermost scope of every command, indexed by the command position
+
+        Scopes are registered in the order they begin, and nested scopes are registered after
+        the scopes that contain them, so sweeping over the commands with a stack of open scopes
+        finds the last registered scope containing each command.
+        """
+        scopes_by_line: list[Scope | None] = []
+        open_scopes: list[Scope] = []
+        scope_id = 0
+        for line_id in range(len(self.commands)):
+            while scope_id < len(self.scopes) and self.scopes[scope_id].beginning_line <= line_id:
+                open_scopes.append(self.scopes[scope_id])
+                scope_id += 1
+            while open_scopes and open_scopes[-1].ending_line < line_id:
+                open_scopes.pop()
+            scopes_by_line.append(open_scopes[-1] if open_scopes else None)
+        return scopes_by_line
 
     def replace_label_in_commands(self, old_label: Label, new_label: Label):
         for command in self.commands:
             if command.operand_a == old_label:
                 command.operand_a = new_label
 
-    def is_last_command(self, command: Command) -> bool:
-        return command is self.commands[-1]
+    def remove_commands(self, command_ids: set[int]):
+        """Delete the commands at the given positions
 
-    def _get_label_by_id(self, label_id: int) -> Label | None:
-        for label in self.labels.values():
-            if label.position == label_id:
-                return label
+        Labels and scope boundaries are moved along with the commands that are kept, a label of
+        a removed command ending up on the command following it. Labels meeting on a command are
+        merged into one.
+        """
+        if not command_ids:
+            return
+        new_positions: list[int] = []
+        removed_count = 0
+        for command_id in range(len(self.commands) + 1):
+            new_positions.append(command_id - removed_count)
+            if command_id in command_ids:
+                removed_count += 1
 
-        return None
+        def move(position: int) -> int:
+            return new_positions[min(max(position, 0), len(self.commands))]
 
-    def _get_scope_by_line(self, line_id: int) -> Scope:
-        for scope in self.scopes[::-1]:
-            if scope.is_line_in_scope(line_id=line_id):
-                return scope
-            else:
-                continue
+        for label in self.labels.values():
+            if label.position >= 0:
+                label.position = move(label.position)
+        for scope in self.scopes:
+            scope.beginning_line = move(scope.beginning_line)
+            scope.ending_line = move(scope.ending_line + 1) - 1
+        self.commands = [
+            command
+            for command_id, command in enumerate(self.commands)
+            if command_id not in command_ids
+        ]
+        self.clear_labels()
+
+    def insert_commands(self, position: int, commands: list[Command]):
+        """Place the commands before the command at the given position
+
+        A label of that command is moved past the inserted commands, so jumping to it skips them.
+        """
+        for label in self.labels.values():
+            if label.position >= position:
+                label.position += len(commands)
+        for scope in self.scopes:
+            if scope.beginning_line >= position:
+                scope.beginning_line += len(commands)
+            if scope.ending_line >= position:
+                scope.ending_line += len(commands)
+        self.commands[position:position] = commands
 
-        raise Exception("Unreachable")
+    def is_last_command(self, command: Command) -> bool:
+        return command is self.commands[-1]
 
     def _add_label_intrinsic(self, label: Label):
         if self.get_label(label_name=label.name) is not None:
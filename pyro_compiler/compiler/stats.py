@@ -0,0 +1,102 @@
+import json
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class PhaseStats:
+    """Resources used by a single compilation phase
+
+    Fields:
+        - `name[str]`: name of the phase
+        - `wall_time[float]`: elapsed wall clock time, in seconds
+        - `cpu_time[float]`: CPU time used by the process, in seconds
+        - `peak_memory[int | None]`: peak memory traced by `tracemalloc` during the phase, in
+          bytes, or None when memory was not tracked
+        - `items[dict[str, int]]`: sizes of what the phase produced, like the number of tokens
+
+    """
+
+    name: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_memory: int | None = None
+    items: dict[str, int] = field(default_factory=dict)
+
+    def count(self, item: str, amount: int):
+        self.items[item] = amount
+
+
+@dataclass
+class CompilationStats:
+    """Per-phase statistics of a compilation
+
+    Memory is measured with `tracemalloc`, which slows the compilation down noticeably, so it
+    is only tracked when `track_memory` is set.
+    """
+
+    track_memory: bool = False
+    phases: list[PhaseStats] = field(default_factory=list)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseStats]:
+        stats = PhaseStats(name=name)
+        started_tracing = False
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall_time = time.perf_counter() - wall_start
+            stats.cpu_time = time.process_time() - cpu_start
+            if self.track_memory:
+                _, stats.peak_memory = tracemalloc.get_traced_memory()
+                if started_tracing:
+                    tracemalloc.stop()
+            self.phases.append(stats)
+
+    def total(self) -> PhaseStats:
+        total = PhaseStats(name="total")
+        for phase in self.phases:
+            total.wall_time += phase.wall_time
+            total.cpu_time += phase.cpu_time
+            if phase.peak_memory is not None:
+                total.peak_memory = max(total.peak_memory or 0, phase.peak_memory)
+        return total
+
+    def report(self) -> str:
+        header = ["phase", "wall ms", "cpu ms"]
+        if self.track_memory:
+            header.append("peak KB")
+        header.append("items")
+        rows: list[list[str]] = []
+        for phase in [*self.phases, self.total()]:
+            row = [phase.name, f"{phase.wall_time * 1000:.2f}", f"{phase.cpu_time * 1000:.2f}"]
+            if self.track_memory:
+                row.append(f"{(phase.peak_memory or 0) / 1024:.1f}")
+            row.append(", ".join(f"{amount} {item}" for item, amount in phase.items.items()))
+            rows.append(row)
+        widths = [max(len(cell) for cell in column) for column in zip(header, *rows)]
+        lines = []
+        for row in [header, *rows]:
+            cells = [row[0].ljust(widths[0])]
+            cells += [cell.rjust(width) for cell, width in zip(row[1:-1], widths[1:-1])]
+            cells.append(row[-1])
+            lines.append("  ".join(cells).rstrip())
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "phases": [asdict(phase) for phase in self.phases],
+                "total": asdict(self.total()),
+            }
+        )
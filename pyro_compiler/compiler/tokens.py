@@ -1,3 +1,6 @@
+import re
+from array import array
+from collections.abc import Iterable, Iterator
 from enum import Enum, auto
 from typing import Optional
 
@@ -54,10 +57,18 @@ class TokenType(Enum):
     CONTINUE = auto()
     COLON = auto()
     INDENT = auto()
+    DEDENT = auto()
     NEWLINE = auto()
 
 
+class LexerMode(Enum):
+    HANDWRITTEN = "handwritten"
+    REGEX = "regex"
+
+
 class Token:
+    __slots__ = ("token_type", "line", "pos", "content")
+
     def __init__(
         self,
         token_type: TokenType,
@@ -74,13 +85,122 @@ class Token:
         return f"{self.token_type} - {self.line}:{self.pos} [{self.content if self.content is not None else ''}]"
 
 
+TOKEN_TYPES_BY_CODE: dict[int, TokenType] = {
+    token_type.value: token_type for token_type in TokenType
+}
+
+
+class TokenStore:
+    """Columnar storage for a sequence of tokens
+
+    Instead of keeping a `Token` object per lexeme, every attribute is kept in its own flat
+    array, one entry per token, so a token costs a handful of bytes. Lexeme contents are
+    interned: each distinct string is stored once in the content table and tokens only refer
+    to it by index. Missing lines, positions and contents are stored as 0 (the content table
+    keeps `None` at index 0, and real lines and positions always start at 1).
+
+    Fields:
+        - `types[array[int]]`: `TokenType` value of every token
+        - `lines[array[int]]`: line of every token
+        - `positions[array[int]]`: position in line of every token
+        - `contents[array[int]]`: index of the token content in the content table
+        - `content_table[list[str | None]]`: distinct token contents
+
+    """
+
+    def __init__(self, tokens: Iterable[Token] | None = None):
+        self.types: array[int] = array("B")
+        self.lines: array[int] = array("I")
+        self.positions: array[int] = array("I")
+        self.contents: array[int] = array("I")
+        self.content_table: list[str | None] = [None]
+        self.content_indexes: dict[str, int] = {}
+        if tokens is not None:
+            self.extend(tokens)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> "TokenView":
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError("token store index out of range")
+        return TokenView(self, index)
+
+    def __iter__(self) -> Iterator["TokenView"]:
+        for index in range(len(self.types)):
+            yield TokenView(self, index)
+
+    def append(self, token: Token):
+        self.types.append(token.token_type.value)
+        self.lines.append(token.line or 0)
+        self.positions.append(token.pos or 0)
+        self.contents.append(self._intern(token.content))
+
+    def extend(self, tokens: Iterable[Token]):
+        for token in tokens:
+            self.append(token)
+
+    def token_type(self, index: int) -> TokenType:
+        return TOKEN_TYPES_BY_CODE[self.types[index]]
+
+    def nbytes(self) -> int:
+        return sum(
+            column.itemsize * len(column)
+            for column in (self.types, self.lines, self.positions, self.contents)
+        )
+
+    def _intern(self, content: str | None) -> int:
+        if content is None:
+            return 0
+        index = self.content_indexes.get(content)
+        if index is None:
+            index = len(self.content_table)
+            self.content_table.append(content)
+            self.content_indexes[content] = index
+        return index
+
+
+class TokenView(Token):
+    """Read-only view of a single token kept in a `TokenStore`
+
+    Behaves like a `Token`, but only holds a reference to the store and its index there,
+    reading the attributes from the store columns on access.
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: TokenStore, index: int):
+        self.store = store
+        self.index = index
+
+    @property  # type: ignore
+    def token_type(self) -> TokenType:  # type: ignore
+        return TOKEN_TYPES_BY_CODE[self.store.types[self.index]]
+
+    @property  # type: ignore
+    def line(self) -> int | None:  # type: ignore
+        return self.store.lines[self.index] or None
+
+    @property  # type: ignore
+    def pos(self) -> int | None:  # type: ignore
+        return self.store.positions[self.index] or None
+
+    @property  # type: ignore
+    def content(self) -> str | None:  # type: ignore
+        return self.store.content_table[self.store.contents[self.index]]
+
+
 class Tokenizer:
     def __init__(self, message_registry: MessageRegistry | None = None, code: str = ""):
         self.code = code
+        self.cursor: int = 0
         self.tokens: list[Token] = []
+        self.pending: list[Token] = []
         self.line: int = 1
         self.pos: int = 1
-        self.indent: bool = False
+        self.indent_stack: list[int] = [0]
         self.registry = message_registry
         self._build_in_ops: dict[str, TokenType] = {
             "if": TokenType.IF,
@@ -95,12 +215,22 @@ class Tokenizer:
         }
 
     def __call__(self, code: str) -> list[Token]:
-        self.code = code
-
-        self._process_code()
+        self.tokens += self.tokenize(code=code)
         return self.tokens
 
-    def _process_code(self):
+    def tokenize(self, code: str) -> Iterator[Token]:
+        """Lazily produce the tokens of `code`
+
+        Tokens are yielded as soon as their lexeme is processed, so a consumer (like the
+        `Parser`) can start working before the whole source is lexed. Unlike `__call__`,
+        the produced tokens are not stored in `self.tokens`.
+        """
+        self.code = code
+        self.cursor = 0
+        self.indent_stack = [0]
+        return self._process_code()
+
+    def _process_code(self) -> Iterator[Token]:
         while self._peek(0) is not None:
             self._trim_whitespace()
             current_char: str | None = self._peek(0)
@@ -144,67 +274,68 @@ class Tokenizer:
                 self._process_exclam()
             if current_char == ":":
                 self._process_colon()
-        self.tokens.append(Token(token_type=TokenType.NEWLINE))
+            yield from self._flush()
+        self._close_indentation()
+        self._emit(Token(token_type=TokenType.NEWLINE))
+        yield from self._flush()
 
     def _process_alnum(self):
-        char_buff: list[str] = []
         pos, line = self.pos, self.line
-        while self._peek(0) is not None and self._peek(0).isalnum() or self._peek(0) == "_":
-            current_char = self._consume()
-            char_buff.append(current_char)
-        value = "".join(char_buff)
+        end = self.cursor
+        while end < len(self.code) and (self.code[end].isalnum() or self.code[end] == "_"):
+            end += 1
+        value = self._consume_until(end)
         is_buildin = self._process_build_ins(value=value)
         if not is_buildin:
             token = Token(token_type=TokenType.IDENT, content=value, line=line, pos=pos)
-            self.tokens.append(token)
+            self._emit(token)
 
     def _process_build_ins(self, value: str) -> bool:
         build_in = self._build_in_ops.get(value, None)
         if build_in is not None:
             token = Token(token_type=build_in, line=self.line, pos=self.pos)
-            self.tokens.append(token)
+            self._emit(token)
             return True
         return False
 
     def _process_digit(self):
-        char_buff: list[str] = []
         pos, line = self.pos, self.line
-        while self._peek(0) is not None and self._peek(0).isdigit():
-            current_char = self._consume()
-            char_buff.append(current_char)
+        end = self.cursor
+        while end < len(self.code) and self.code[end].isdigit():
+            end += 1
+        value = self._consume_until(end)
 
         if self._peek(0) is not None and self._peek(0).isalpha():
             self.registry.register_message(
                 line=line, pos=pos, message_type=ErrorType.ILLEGAL_VARIABLE_NAME
             )
 
-        value = "".join(char_buff)
         token = Token(token_type=TokenType.NUMBER, content=value, line=line, pos=pos)
-        self.tokens.append(token)
+        self._emit(token)
 
     def _process_eq(self):
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQUALS, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQUALS, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.EQ, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ, line=self.line, pos=self.pos))
 
     def _process_plus(self):
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQ_PLUS, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ_PLUS, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.PLUS, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.PLUS, line=self.line, pos=self.pos))
 
     def _process_minus(self):
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQ_MINUS, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ_MINUS, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.MINUS, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.MINUS, line=self.line, pos=self.pos))
 
     def _process_mul(self):
         self._consume()
@@ -214,7 +345,7 @@ class Tokenizer:
             is_pov = True
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(
+            self._emit(
                 Token(
                     token_type=TokenType.EQ_POV if is_pov else TokenType.EQ_MUL,
                     line=self.line,
@@ -222,7 +353,7 @@ class Tokenizer:
                 )
             )
         else:
-            self.tokens.append(
+            self._emit(
                 Token(
                     token_type=TokenType.POV if is_pov else TokenType.MUL,
                     line=self.line,
@@ -238,7 +369,7 @@ class Tokenizer:
             is_floor = True
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(
+            self._emit(
                 Token(
                     token_type=TokenType.EQ_DIV_FLOOR if is_floor else TokenType.EQ_DIV,
                     line=self.line,
@@ -246,7 +377,7 @@ class Tokenizer:
                 )
             )
         else:
-            self.tokens.append(
+            self._emit(
                 Token(
                     token_type=TokenType.DIV_FLOOR if is_floor else TokenType.DIV,
                     line=self.line,
@@ -258,41 +389,41 @@ class Tokenizer:
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQ_REMAIN, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ_REMAIN, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.REMAIN, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.REMAIN, line=self.line, pos=self.pos))
 
     def _process_comma(self):
         self._consume()
-        self.tokens.append(Token(token_type=TokenType.COMMA, line=self.line, pos=self.pos))
+        self._emit(Token(token_type=TokenType.COMMA, line=self.line, pos=self.pos))
 
     def _process_bit_and(self):
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQ_BIT_AND, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ_BIT_AND, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.BIT_AND, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.BIT_AND, line=self.line, pos=self.pos))
 
     def _process_bit_or(self):
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQ_BIT_OR, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ_BIT_OR, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.BIT_OR, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.BIT_OR, line=self.line, pos=self.pos))
 
     def _process_bit_xor(self):
         self._consume()
         if self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.EQ_BIT_XOR, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.EQ_BIT_XOR, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.BIT_XOR, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.BIT_XOR, line=self.line, pos=self.pos))
 
     def _process_bit_not(self):
         self._consume()
-        self.tokens.append(Token(token_type=TokenType.BIT_NOT, line=self.line, pos=self.pos))
+        self._emit(Token(token_type=TokenType.BIT_NOT, line=self.line, pos=self.pos))
 
     def _process_bit_shl(self):
         self._consume()
@@ -300,18 +431,14 @@ class Tokenizer:
             self._consume()
             if self._peek(0) == "=":
                 self._consume()
-                self.tokens.append(
-                    Token(token_type=TokenType.EQ_BIT_SHL, line=self.line, pos=self.pos)
-                )
+                self._emit(Token(token_type=TokenType.EQ_BIT_SHL, line=self.line, pos=self.pos))
             else:
-                self.tokens.append(
-                    Token(token_type=TokenType.BIT_SHL, line=self.line, pos=self.pos)
-                )
+                self._emit(Token(token_type=TokenType.BIT_SHL, line=self.line, pos=self.pos))
         elif self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.LTE, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.LTE, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.LT, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.LT, line=self.line, pos=self.pos))
 
     def _process_bit_shr(self):
         self._consume()
@@ -319,30 +446,26 @@ class Tokenizer:
             self._consume()
             if self._peek(0) == "=":
                 self._consume()
-                self.tokens.append(
-                    Token(token_type=TokenType.EQ_BIT_SHR, line=self.line, pos=self.pos)
-                )
+                self._emit(Token(token_type=TokenType.EQ_BIT_SHR, line=self.line, pos=self.pos))
             else:
-                self.tokens.append(
-                    Token(token_type=TokenType.BIT_SHR, line=self.line, pos=self.pos)
-                )
+                self._emit(Token(token_type=TokenType.BIT_SHR, line=self.line, pos=self.pos))
         elif self._peek(0) == "=":
             self._consume()
-            self.tokens.append(Token(token_type=TokenType.GTE, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.GTE, line=self.line, pos=self.pos))
         else:
-            self.tokens.append(Token(token_type=TokenType.GT, line=self.line, pos=self.pos))
+            self._emit(Token(token_type=TokenType.GT, line=self.line, pos=self.pos))
 
     def _process_open_paren(self):
         self._consume()
-        self.tokens.append(Token(token_type=TokenType.OPEN_PAREN, line=self.line, pos=self.pos))
+        self._emit(Token(token_type=TokenType.OPEN_PAREN, line=self.line, pos=self.pos))
 
     def _process_closed_paren(self):
         self._consume()
-        self.tokens.append(Token(token_type=TokenType.CLOSED_PAREN, line=self.line, pos=self.pos))
+        self._emit(Token(token_type=TokenType.CLOSED_PAREN, line=self.line, pos=self.pos))
 
     def _process_colon(self):
         self._consume()
-        self.tokens.append(Token(token_type=TokenType.COLON, line=self.line, pos=self.pos))
+        self._emit(Token(token_type=TokenType.COLON, line=self.line, pos=self.pos))
 
     def _process_exclam(self):
         self._consume()
@@ -355,34 +478,210 @@ class Tokenizer:
             )
             return
         self._consume()
-        self.tokens.append(Token(token_type=TokenType.NOT_EQUALS, line=self.line, pos=self.pos))
+        self._emit(Token(token_type=TokenType.NOT_EQUALS, line=self.line, pos=self.pos))
+
+    def _emit(self, token: Token):
+        self.pending.append(token)
+
+    def _flush(self) -> list[Token]:
+        flushed, self.pending = self.pending, []
+        return flushed
 
     def _peek(self, position: int) -> str | None:
-        if self.code:
-            return self.code[position]
+        index = self.cursor + position
+        if index < len(self.code):
+            return self.code[index]
         return None
 
     def _consume(self) -> str:
-        result = self.code[0]
-        self.code = self.code[1:]
+        result = self.code[self.cursor]
+        self.cursor += 1
         self.pos += 1
         return result
 
+    def _consume_until(self, end: int) -> str:
+        result = self.code[self.cursor : end]
+        self.pos += end - self.cursor
+        self.cursor = end
+        return result
+
     def _trim_whitespace(self):
+        line_start: int | None = 0 if self.cursor == 0 else None
         while self._peek(0) is not None and self._peek(0).isspace():
             if self._peek(0) == "\n":
                 old_line = self.line
                 old_pos = self.pos
                 self.line += 1
                 self.pos = 1
-                self.tokens.append(Token(token_type=TokenType.NEWLINE, line=old_line, pos=old_pos))
-            if self.pos == 1:
-                self.indent = True
-            if self.indent and self.pos % 4 == 0:
-                self.tokens.append(Token(token_type=TokenType.INDENT, line=self.line, pos=self.pos))
+                self._emit(Token(token_type=TokenType.NEWLINE, line=old_line, pos=old_pos))
+                line_start = self.cursor + 1
             self._consume()
-        self.indent = False
+        if line_start is not None and self._peek(0) is not None:
+            self._process_indentation(self.code[line_start : self.cursor])
+
+    def _process_indentation(self, indentation: str):
+        """Compare the indentation of a new line with the indentation stack
+
+        Emits a single INDENT token when the line is indented deeper than the current block,
+        and one DEDENT token for every block the line closes, so the parser never has to count
+        the indentation itself.
+        """
+        width = len(indentation)
+        if width > self.indent_stack[-1]:
+            self.indent_stack.append(width)
+            self._emit(
+                Token(
+                    token_type=TokenType.INDENT, line=self.line, pos=self.pos, content=indentation
+                )
+            )
+            return
+        while width < self.indent_stack[-1]:
+            self.indent_stack.pop()
+            self._emit(Token(token_type=TokenType.DEDENT, line=self.line, pos=self.pos))
+        if width != self.indent_stack[-1]:
+            self.registry.register_message(  # type: ignore
+                line=self.line,
+                pos=self.pos,
+                message_type=ErrorType.MISMATCHING_INDENT,
+                required=str(self.indent_stack[-1]),
+                got=str(width),
+            )
+
+    def _close_indentation(self):
+        while self.indent_stack[-1] > 0:
+            self.indent_stack.pop()
+            self._emit(Token(token_type=TokenType.DEDENT, line=self.line, pos=self.pos))
 
     def pprint(self) -> str:
         result = [str(token) for token in self.tokens]
         return "\n".join(result)
+
+
+OPERATOR_TOKENS: dict[str, TokenType] = {
+    "**=": TokenType.EQ_POV,
+    "//=": TokenType.EQ_DIV_FLOOR,
+    "<<=": TokenType.EQ_BIT_SHL,
+    ">>=": TokenType.EQ_BIT_SHR,
+    "**": TokenType.POV,
+    "//": TokenType.DIV_FLOOR,
+    "<<": TokenType.BIT_SHL,
+    ">>": TokenType.BIT_SHR,
+    "==": TokenType.EQUALS,
+    "!=": TokenType.NOT_EQUALS,
+    "<=": TokenType.LTE,
+    ">=": TokenType.GTE,
+    "+=": TokenType.EQ_PLUS,
+    "-=": TokenType.EQ_MINUS,
+    "*=": TokenType.EQ_MUL,
+    "/=": TokenType.EQ_DIV,
+    "%=": TokenType.EQ_REMAIN,
+    "&=": TokenType.EQ_BIT_AND,
+    "|=": TokenType.EQ_BIT_OR,
+    "^=": TokenType.EQ_BIT_XOR,
+    "=": TokenType.EQ,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.MUL,
+    "/": TokenType.DIV,
+    "%": TokenType.REMAIN,
+    "&": TokenType.BIT_AND,
+    "|": TokenType.BIT_OR,
+    "^": TokenType.BIT_XOR,
+    "~": TokenType.BIT_NOT,
+    "<": TokenType.LT,
+    ">": TokenType.GT,
+    ",": TokenType.COMMA,
+    "(": TokenType.OPEN_PAREN,
+    ")": TokenType.CLOSED_PAREN,
+    ":": TokenType.COLON,
+}
+
+
+class RegexTokenizer(Tokenizer):
+    """Tokenizer that recognizes every lexeme with a single compiled master pattern
+
+    Produces exactly the same token stream (including token positions and reported errors)
+    as `Tokenizer`, but instead of testing the current character against every lexeme kind
+    it lets the regex engine pick the lexeme and dispatches on the name of the matched group.
+    Operators are ordered longest first so that `**=` wins over `**` and `*`.
+
+    Characters that do not start any lexeme are reported as `UNKNOWN_TOKEN` and skipped.
+    """
+
+    master_pattern = re.compile(
+        "|".join(
+            [
+                r"(?P<WHITESPACE>\s+)",
+                r"(?P<NAME>[^\W\d_]\w*)",
+                r"(?P<NUMBER>\d+)",
+                "(?P<OPERATOR>" + "|".join(re.escape(op) for op in OPERATOR_TOKENS) + ")",
+                r"(?P<EXCLAM>!)",
+                r"(?P<UNKNOWN>.)",
+            ]
+        )
+    )
+
+    def _process_code(self) -> Iterator[Token]:
+        for match in self.master_pattern.finditer(self.code, self.cursor):
+            kind = match.lastgroup
+            lexeme = match.group()
+            if kind == "WHITESPACE":
+                self._process_whitespace(lexeme, start=match.start(), end=match.end())
+            elif kind == "NAME":
+                self._process_name(lexeme)
+            elif kind == "NUMBER":
+                self._process_number(lexeme, end=match.end())
+            elif kind == "OPERATOR":
+                self.pos += len(lexeme)
+                self._emit(Token(token_type=OPERATOR_TOKENS[lexeme], line=self.line, pos=self.pos))
+            elif kind == "EXCLAM":
+                self.pos += 1
+                self.registry.register_message(  # type: ignore
+                    line=self.line,
+                    pos=self.pos,
+                    message_type=ErrorType.UNKNOWN_TOKEN,
+                    token=f"!{self._peek_at(match.end())}",
+                )
+            else:
+                self.registry.register_message(  # type: ignore
+                    line=self.line, pos=self.pos, message_type=ErrorType.UNKNOWN_TOKEN, token=lexeme
+                )
+                self.pos += 1
+            yield from self._flush()
+        self.cursor = len(self.code)
+        self._close_indentation()
+        self._emit(Token(token_type=TokenType.NEWLINE))
+        yield from self._flush()
+
+    def _process_whitespace(self, whitespace: str, start: int, end: int):
+        line_start = start == 0
+        for i, segment in enumerate(whitespace.split("\n")):
+            if i > 0:
+                self._emit(Token(token_type=TokenType.NEWLINE, line=self.line, pos=self.pos))
+                self.line += 1
+                self.pos = 2
+                line_start = True
+            self.pos += len(segment)
+        if line_start and self._peek_at(end) is not None:
+            self._process_indentation(segment)
+
+    def _process_name(self, name: str):
+        pos = self.pos
+        self.pos += len(name)
+        if not self._process_build_ins(value=name):
+            self._emit(Token(token_type=TokenType.IDENT, content=name, line=self.line, pos=pos))
+
+    def _process_number(self, number: str, end: int):
+        pos = self.pos
+        self.pos += len(number)
+        next_char = self._peek_at(end)
+        if next_char is not None and next_char.isalpha():
+            self.registry.register_message(  # type: ignore
+                line=self.line, pos=pos, message_type=ErrorType.ILLEGAL_VARIABLE_NAME
+            )
+        self._emit(Token(token_type=TokenType.NUMBER, content=number, line=self.line, pos=pos))
+
+    def _peek_at(self, index: int) -> str | None:
+        if index < len(self.code):
+            return self.code[index]
+        return None
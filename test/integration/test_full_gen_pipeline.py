@@ -1,6 +1,9 @@
+import json
+
 import pytest
 
 from pyro_compiler.compiler.compiler import Compiler
+from pyro_compiler.compiler.optimization import OptimizationLevel
 
 
 @pytest.mark.integration
@@ -36,3 +39,55 @@ def test_multiple_declaration(snapshot):
     compiler = Compiler()
     asm = compiler(code=code)
     snapshot.assert_match(asm, "test_multiline_declaration_codegen")
+
+
+@pytest.mark.integration
+def test_compilation_stats():
+    code = "x = 1\n" "while x < 10:\n" "    x *= 2\n"
+    compiler = Compiler(time_passes=True, mem_report=True)
+    asm = compiler(code=code)
+
+    assert asm == Compiler()(code=code)
+    stats = compiler.stats
+    assert stats is not None
+    assert [phase.name for phase in stats.phases] == [
+        "tokenize",
+        "parse",
+        "ir",
+        "ssa",
+        "sccp",
+        "ssa_out",
+        "dse",
+        "regalloc",
+        "codegen",
+    ]
+    assert [phase.items for phase in stats.phases] == [
+        {"tokens": 17},
+        {"nodes": 17},
+        {"commands": 10},
+        {"phis": 1},
+        {"folded": 0},
+        {"commands": 10},
+        {"removed": 0},
+        {"values": 2, "spills": 0, "coalesced": 0},
+        {"instructions": compiler.generation.instruction_count},
+    ]
+    assert all(phase.peak_memory is not None for phase in stats.phases)
+    report = json.loads(stats.to_json())
+    assert report["total"]["wall_time"] == pytest.approx(
+        sum(phase["wall_time"] for phase in report["phases"])
+    )
+    assert stats.report().splitlines()[-1].startswith("total")
+
+
+@pytest.mark.integration
+def test_long_expressions_codegen():
+    terms = 5000
+    sum_code = "x = " + " + ".join(["1"] * terms)
+    parens_code = "y = 1\nx = " + "(y + " * 1000 + "y" + ")" * 1000
+
+    assert "mov r12, 5000" in Compiler()(code=sum_code)
+    assert "mov r12, 1001" in Compiler()(code=parens_code)
+    for code, additions in [(sum_code, terms - 1), (parens_code, 1000)]:
+        asm = Compiler(optimization_level=OptimizationLevel.O0)(code=code)
+        assert sum(line.strip().startswith("add") for line in asm.splitlines()) == additions
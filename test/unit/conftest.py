@@ -0,0 +1,38 @@
+from collections.abc import Callable
+
+import pytest
+
+from pyro_compiler.compiler.optimization.passes import SSAPass
+from pyro_compiler.compiler.optimization.ssa import SSAConstruction, SSADestruction, SSAVerifier
+from pyro_compiler.compiler.parsing import Parser
+from pyro_compiler.compiler.representation import IRBuilder
+from pyro_compiler.compiler.representation.representation import Representation
+from pyro_compiler.compiler.tokens import Tokenizer
+
+
+@pytest.fixture
+def build_representation() -> Callable[[str], Representation]:
+    """Representation `IRBuilder` makes out of some code"""
+
+    def build(code: str) -> Representation:
+        return IRBuilder()(ast=Parser()(tokens=Tokenizer()(code=code)))
+
+    return build
+
+
+@pytest.fixture
+def run_ssa_pass(
+    build_representation: Callable[[str], Representation]
+) -> Callable[[str, SSAPass], tuple[list[str], int]]:
+    """Commands an SSA pass leaves out of some code and the number of changes it reports, the SSA
+    form it leaves being checked before going back to the flat representation"""
+
+    def run(code: str, ssa_pass: SSAPass) -> tuple[list[str], int]:
+        representation = build_representation(code)
+        ssa = SSAConstruction()(representation)
+        changed_count = ssa_pass(ssa)
+        assert SSAVerifier()(ssa) == []
+        SSADestruction()(ssa)
+        return [str(command) for command in representation.commands], changed_count
+
+    return run
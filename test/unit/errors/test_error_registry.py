@@ -22,3 +22,29 @@ def test_warning_registry(snapshot):
     registry.register_message(line=3, pos=5, message_type=WarningType.TEST_WARNING)
     result = registry.display_messages()
     snapshot.assert_match(result, "test_registry_warning_functionality")
+
+
+@pytest.mark.errors
+def test_registry_code_lines():
+    code = "x = 1\n" "\n" "y = 2"
+    registry = MessageRegistry(code=code)
+
+    assert [registry.get_code_line(line) for line in (1, 2, 3)] == ["x = 1", "", "y = 2"]
+    registry.code = "z = 3\n"
+    assert registry.get_code_line(1) == "z = 3"
+
+
+@pytest.mark.errors
+def test_registry_error_limit():
+    code = "".join(f"{i}x = {i}\n" for i in range(100))
+    registry = MessageRegistry(code=code, error_limit=3)
+    for line in range(1, 101):
+        registry.register_message(line=line, pos=1, message_type=ErrorType.TEST_ERROR)
+    result = registry.display_messages()
+
+    assert registry.is_blocking_compilation
+    assert len(registry.messages) == 3
+    assert registry.dropped_messages == 97
+    assert "2x = 2" in result
+    assert "3x = 3" not in result
+    assert result.endswith("... and 97 more messages\n")
@@ -0,0 +1,73 @@
+import pytest
+
+from pyro_compiler.compiler.generation.allocation import (
+    GraphColoringAllocator,
+    LinearScanAllocator,
+    compute_live_intervals,
+    rename_registers,
+)
+
+
+FIBONACCI = """a, b = 0, 1
+count = 0
+while a <= 10:
+    c = a + b
+    a, b = b, c
+    count += 1
+"""
+
+
+@pytest.mark.gen
+def test_live_intervals_span_loops(build_representation):
+    representation = build_representation(FIBONACCI)
+    rename_registers(representation)
+    intervals = {
+        interval.value.name: interval for interval in compute_live_intervals(representation)
+    }
+    loop_jump = 2 * (len(representation.commands) - 2) + 1
+
+    assert intervals["a"].end == loop_jump
+    assert intervals["b"].end == loop_jump
+    assert intervals["count"].end == loop_jump
+    assert intervals["c"].end < loop_jump
+
+
+@pytest.mark.gen
+def test_renamed_registers_are_unique_per_definition(build_representation):
+    representation = build_representation("x = 1 + 2 + 3\ny = 4 * 5\n")
+    rename_registers(representation)
+    targets = [
+        command.target.name
+        for command in representation.commands
+        if command.target is not None and command.target.name.startswith("r")
+    ]
+
+    assert len(targets) == len(set(targets)) == 3
+
+
+@pytest.mark.gen
+def test_linear_scan_keeps_loop_variables_in_registers(build_representation):
+    allocation = LinearScanAllocator()(build_representation(FIBONACCI))
+
+    assert allocation.spill_count == 0
+    assert set(allocation.variables) == {"a", "b", "c", "count"}
+    assert allocation.variables["a"] != allocation.variables["b"] != allocation.variables["count"]
+
+
+@pytest.mark.gen
+def test_linear_scan_spills_the_longest_living_values(build_representation):
+    allocation = LinearScanAllocator(registers=("r12", "r13"))(build_representation(FIBONACCI))
+
+    assert allocation.spill_count == 2
+    assert allocation.spilled_variables == ["count", "a"]
+    assert allocation.report() == "register allocation: 6 values, 2 spilled"
+
+
+@pytest.mark.gen
+def test_graph_coloring_coalesces_copies_into_variables(build_representation):
+    allocation = GraphColoringAllocator()(build_representation(FIBONACCI))
+
+    assert allocation.spill_count == 0
+    assert allocation.coalesced_count == 2
+    assert set(allocation.registers.values()) <= set(allocation.variables.values())
+    assert allocation.report() == "register allocation: 6 values, 0 spilled, 2 copies coalesced"
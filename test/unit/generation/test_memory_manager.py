@@ -0,0 +1,46 @@
+import pytest
+
+from pyro_compiler.compiler.generation.memory import MemoryManager
+from pyro_compiler.compiler.representation.variable import Variable
+
+
+@pytest.mark.gen
+def test_memory_manager_slot_lookup_across_scopes():
+    manager = MemoryManager()
+    manager.store_region(name="a", val="1")
+    manager.store_region(name="b", val="2")
+    manager.escalate()
+    manager.store_region(name="c", val=Variable(name="a"))
+
+    assert manager.get_region_index("a") == 0
+    assert manager.get_region_index("c") == 2
+    assert [manager.calculate_region_offset(i) for i in range(3)] == [8, 16, 24]
+
+    manager.deescalate()
+
+    assert manager.get_region_index("c") is None
+    assert [manager.calculate_region_offset(i) for i in range(2)] == [8, 16]
+
+    manager.store_region(name="c", val="3")
+
+    assert manager.get_region_index("c") == 2
+    assert manager.calculate_region_offset(0) == 8
+
+
+@pytest.mark.gen
+def test_memory_manager_reuses_frame_slots_between_scopes():
+    manager = MemoryManager()
+    manager.store_region(name="a", val="1")
+    for name in ("b", "c"):
+        manager.escalate()
+        instructions = manager.store_region(name=name, val="2")
+        manager.deescalate()
+
+        assert instructions[-1].to_asm() == "    mov QWORD [rbp - 16], rax"
+
+    assert manager.frame_size == 2
+    assert [instruction.to_asm() for instruction in manager.allocate_frame()] == [
+        "    push rbp",
+        "    mov rbp, rsp",
+        "    sub rsp, 16",
+    ]
@@ -0,0 +1,72 @@
+import pytest
+
+from pyro_compiler.compiler.compiler import Compiler
+from pyro_compiler.compiler.generation.power import (
+    CHAIN_SLOTS,
+    MAX_CHAIN_EXPONENT,
+    count_stored_powers,
+    find_multiplication_chain,
+    get_binary_chain,
+)
+
+
+def get_powers(exponent: int) -> list[int]:
+    powers = [1]
+    for first, second in find_multiplication_chain(exponent):
+        powers.append(powers[first] + powers[second])
+    return powers
+
+
+def generate(code: str) -> list[str]:
+    compiler = Compiler(constant_propagation=False)
+    compiler(code=code)
+    return [chunk.to_asm().strip() for chunk in compiler.generation.code_chunks]
+
+
+@pytest.mark.gen
+def test_chains_reach_their_exponents_with_fewest_multiplications():
+    assert get_powers(15) == [1, 2, 4, 5, 10, 15]
+    assert get_powers(23) == [1, 2, 4, 5, 9, 18, 23]
+    assert [len(find_multiplication_chain(exponent)) for exponent in (1, 2, 31, 127)] == [
+        0,
+        1,
+        7,
+        10,
+    ]
+    for exponent in range(1, MAX_CHAIN_EXPONENT + 1):
+        chain = find_multiplication_chain(exponent)
+        assert get_powers(exponent)[-1] == exponent
+        assert len(chain) <= len(get_binary_chain(exponent))
+        assert count_stored_powers(chain) <= CHAIN_SLOTS
+
+
+@pytest.mark.gen
+def test_large_exponents_go_over_their_binary_digits():
+    exponent = MAX_CHAIN_EXPONENT * 4 + 3
+
+    assert find_multiplication_chain(exponent) == get_binary_chain(exponent)
+    assert get_powers(exponent) == [1, 2, 4, 8, 16, 32, 64, 128, 256, 257, 514, 515]
+
+
+@pytest.mark.gen
+def test_constant_exponents_are_raised_by_chains_of_multiplications():
+    instructions = generate("x = 7\ny = x ** 15\nz = x ** 1\nw = x ** 0\n")
+
+    assert [instruction for instruction in instructions if instruction.startswith("mul")] == [
+        "mul rax",
+        "mul rax",
+        "mul rbx",
+        "mul rax",
+        "mul rcx",
+    ]
+    assert not any(instruction.startswith("pov_") for instruction in instructions)
+
+
+@pytest.mark.gen
+def test_exponents_known_at_run_time_are_raised_by_squaring():
+    instructions = generate("x = 7\nn = 9\ny = x ** n\nz = y ** n\n")
+
+    assert instructions.count("shr rcx, 1") == 2
+    assert instructions.count("mul rbx") == 4
+    for label in ("pov_loop_1:", "pov_square_1:", "pov_end_1:", "pov_loop_2:", "pov_end_2:"):
+        assert label in instructions
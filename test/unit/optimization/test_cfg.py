@@ -0,0 +1,62 @@
+import pytest
+
+from pyro_compiler.compiler.optimization.cfg import ControlFlowGraph
+
+
+IF_ELSE = "x = 1\ny = 0\nif x > 0:\n    y = 1\nelse:\n    y = 2\nz = y + 1\n"
+WHILE = "i = 0\nwhile i < 3:\n    i += 1\nj = i + 1\n"
+
+
+@pytest.mark.opt
+def test_blocks_split_at_labels_and_jumps(build_representation):
+    cfg = ControlFlowGraph(build_representation(IF_ELSE))
+
+    assert [block.successors for block in cfg.blocks.values()] == [[1, 2], [3], [3], []]
+    assert [block.predecessors for block in cfg.blocks.values()] == [[], [0], [0], [1, 2]]
+    assert cfg.get_block(0).fallthrough == 1
+    assert cfg.get_block(1).fallthrough is None
+    assert cfg.get_block(1).terminator is not None
+
+
+@pytest.mark.opt
+def test_loop_header_dominates_its_body_and_exit(build_representation):
+    cfg = ControlFlowGraph(build_representation(WHILE))
+    dominators = cfg.compute_dominators()
+
+    assert cfg.get_block(2).successors == [1]
+    assert dominators == {0: 0, 1: 0, 2: 1, 3: 1}
+    assert cfg.compute_dominator_tree() == {0: [1], 1: [3, 2], 2: [], 3: []}
+    assert cfg.dominates(dominators, 1, 2)
+    assert not cfg.dominates(dominators, 2, 3)
+
+
+@pytest.mark.opt
+def test_reverse_postorder_places_blocks_before_their_successors(build_representation):
+    cfg = ControlFlowGraph(build_representation(IF_ELSE))
+    order = cfg.reverse_postorder()
+
+    assert order[0] == 0
+    assert order[-1] == 3
+    assert cfg.compute_dominators()[3] == 0
+
+
+@pytest.mark.opt
+def test_linearize_keeps_the_representation(build_representation):
+    original = build_representation(IF_ELSE)
+    representation = build_representation(IF_ELSE)
+    ControlFlowGraph(representation).linearize()
+
+    assert representation.pprint() == original.pprint()
+    assert str(representation.scopes) == str(original.scopes)
+
+
+@pytest.mark.opt
+def test_linearize_jumps_to_moved_fallthrough_blocks(build_representation):
+    representation = build_representation(WHILE)
+    cfg = ControlFlowGraph(representation)
+    cfg.add_block([], before=2)
+    cfg.linearize()
+    commands = [str(command) for command in representation.commands]
+
+    assert commands[3:6] == ["JGE main_while_end_0", "JMP main_block_2", "ESCALATE "]
+    assert representation.get_label("main_block_2").position == 5
@@ -0,0 +1,53 @@
+import pytest
+
+from pyro_compiler.compiler.optimization.constant_propagation import (
+    ConstantPropagation,
+    fold,
+    to_signed,
+)
+from pyro_compiler.compiler.representation.command import CommandType
+
+
+@pytest.mark.opt
+def test_arithmetic_over_constants_is_folded(run_ssa_pass):
+    commands, _ = run_ssa_pass("x = 2 * 3 + 4\ny = x * x\nz = ~x >> 62\n", ConstantPropagation())
+
+    assert commands == [
+        "ESCALATE ",
+        "x = STORE 10",
+        "y = STORE 100",
+        "z = STORE 3",
+        "DEESCALATE ",
+    ]
+
+
+@pytest.mark.opt
+def test_constant_branches_keep_only_the_path_taken(run_ssa_pass):
+    code = "x = 1\ny = 0\nif x > 0:\n    y = 1\nelse:\n    y = 2\nz = y + 1\n"
+    commands, _ = run_ssa_pass(code, ConstantPropagation())
+
+    assert "y = STORE 2" not in commands
+    assert not any(command.startswith(("CMP", "J")) for command in commands)
+    assert commands[-2] == "z = STORE 2"
+
+
+@pytest.mark.opt
+def test_values_changing_in_loops_are_left_to_run(run_ssa_pass):
+    code = "i = 0\nk = 3\nwhile i < k:\n    i += 1\nj = i * k\nn = 0\nwhile n > 0:\n    n += 1\n"
+    commands, _ = run_ssa_pass(code, ConstantPropagation())
+
+    assert "CMP i, 3" in commands
+    assert "r8 = MUL i, 3" in commands
+    assert "r8 = SUM 1, n" not in commands
+
+
+@pytest.mark.opt
+def test_folding_follows_the_generated_instructions():
+    assert fold(CommandType.FLOOR, -2, 2) == 2**63 - 1
+    assert fold(CommandType.FLOOR, 1, 0) is None
+    assert fold(CommandType.GT, -1, 0) == 0
+    assert fold(CommandType.BIT_SHL, 1, 65) == 2
+    assert fold(CommandType.MUL, 2**62, 4) == 0
+    assert fold(CommandType.POV, 2, 3) == 8
+    assert fold(CommandType.POV, 3, 64) == to_signed(3**64)
+    assert fold(CommandType.POV, 2, -1) == 0
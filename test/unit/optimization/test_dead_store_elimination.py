@@ -0,0 +1,60 @@
+import pytest
+
+from pyro_compiler.compiler.optimization import DeadStoreElimination
+from pyro_compiler.compiler.optimization.liveness import compute_liveness
+from pyro_compiler.compiler.representation.command import CommandType
+
+
+FIBONACCI = """a, b = 0, 1
+count = 0
+while a <= 10:
+    c = a + b
+    a, b = b, c
+    count += 1
+"""
+
+
+@pytest.mark.opt
+def test_liveness_follows_loop_back_edges(build_representation):
+    representation = build_representation(FIBONACCI)
+    live_after = compute_liveness(representation, bound_variables=set())
+    loop_jump = len(representation.commands) - 2
+
+    assert representation.commands[loop_jump].operation == CommandType.JMP
+    assert {"a", "b", "count"} <= live_after[loop_jump]
+    assert "c" not in live_after[loop_jump]
+
+
+@pytest.mark.opt
+def test_overwritten_stores_are_removed_with_their_arithmetic(build_representation):
+    representation = build_representation("x = 0\nx = 1 + 2\nx = 5\n")
+    removed_count = DeadStoreElimination()(representation)
+
+    assert removed_count == 2
+    assert [str(command) for command in representation.commands[1:-1]] == [
+        "x = STORE 0",
+        "x = STORE 5",
+    ]
+
+
+@pytest.mark.opt
+def test_loop_carried_values_are_kept(build_representation):
+    representation = build_representation(FIBONACCI)
+    command_count = len(representation.commands)
+
+    assert DeadStoreElimination()(representation) == 0
+    assert len(representation.commands) == command_count
+
+
+@pytest.mark.opt
+def test_labels_and_scopes_follow_removed_commands(build_representation):
+    representation = build_representation("i = 0\nwhile i < 3:\n    t = i * 2\n    i += 1\n")
+    removed_count = DeadStoreElimination()(representation)
+    loop_end = representation.get_label("main_while_end_0")
+    loop_scope = representation.scopes[1]
+
+    assert removed_count == 2
+    assert loop_end is not None
+    assert representation.commands[loop_end.position - 1].operation == CommandType.JMP
+    assert representation.commands[loop_scope.beginning_line].operation == CommandType.ESCALATE
+    assert loop_scope.ending_line == loop_end.position - 1
@@ -0,0 +1,71 @@
+import pytest
+
+from pyro_compiler.compiler.optimization.induction_variables import (
+    StrengthReduction,
+    find_induction_variables,
+)
+from pyro_compiler.compiler.optimization.loops import find_loops, get_preheader
+from pyro_compiler.compiler.optimization.ssa import SSAConstruction
+
+
+NESTED = (
+    "total = 0\ni = 0\n"
+    "while i < 10:\n"
+    "    j = 0\n"
+    "    while j < 8:\n"
+    "        total += i * 8 + j * 4\n"
+    "        j += 2\n"
+    "    i += 1\n"
+)
+
+
+@pytest.mark.opt
+def test_induction_variables_are_found_with_their_steps(build_representation):
+    ssa = SSAConstruction()(build_representation(NESTED))
+    loops = find_loops(ssa.cfg)
+    found = []
+    for loop in loops:
+        get_preheader(ssa, loop, loops)
+        found += [
+            (variable.version.name, variable.update.name, variable.step)
+            for variable in find_induction_variables(ssa, loop)
+        ]
+
+    assert found == [("j.2", "j.3", 2), ("i.2", "i.3", 1)]
+
+
+@pytest.mark.opt
+def test_multiplications_become_additions(run_ssa_pass):
+    code = (
+        "n = 7\ntotal = 0\nif total < 1:\n    n = 9\ni = 1\n"
+        "while i < n:\n    total += i * n\n    i += 3\n"
+    )
+    commands, reduced_count = run_ssa_pass(code, StrengthReduction())
+
+    assert reduced_count == 1
+    assert commands.index(".mul1 = STORE n") < commands.index("CMP i, n")
+    assert commands.index(".mul2 = MUL 3, n") < commands.index("CMP i, n")
+    assert "r10 = SUM .mul1, total" in commands
+    assert commands.index("i = STORE r8") + 1 == commands.index(".mul1 = SUM .mul1, .mul2")
+
+
+@pytest.mark.opt
+def test_exit_tests_are_replaced_and_counters_removed(run_ssa_pass):
+    commands, reduced_count = run_ssa_pass(NESTED, StrengthReduction())
+
+    assert reduced_count == 2
+    assert "CMP .mul1, 32" in commands
+    assert ".mul1 = SUM .mul1, 8" in commands
+    assert "r10 = SUM .mul2, .mul1" in commands
+    # the inner counter is gone, the outer one is printed at the end of the program
+    assert [command for command in commands if "j" in command] == ["j = STORE 0"]
+    assert "CMP i, 10" in commands
+
+
+@pytest.mark.opt
+def test_variables_changing_otherwise_are_not_reduced(run_ssa_pass):
+    code = "i = 1\nx = 0\nwhile i < 100:\n    x += i * 5\n    i = i * 2\n"
+    commands, reduced_count = run_ssa_pass(code, StrengthReduction())
+
+    assert reduced_count == 0
+    assert "r9 = MUL i, 5" in commands
@@ -0,0 +1,68 @@
+import pytest
+
+from pyro_compiler.compiler.optimization.cfg import ControlFlowGraph
+from pyro_compiler.compiler.optimization.licm import LoopInvariantCodeMotion
+from pyro_compiler.compiler.optimization.loops import find_loops, get_preheader
+from pyro_compiler.compiler.optimization.ssa import SSAConstruction, SSAVerifier
+
+
+NESTED = (
+    "n = 5\nm = 3\ntotal = 0\ni = 0\n"
+    "while i < n:\n"
+    "    j = 0\n"
+    "    while j < m:\n"
+    "        total += n * m + i * 4 + j\n"
+    "        j += 1\n"
+    "    i += 1\n"
+)
+
+
+@pytest.mark.opt
+def test_nested_loops_are_found_inside_out(build_representation):
+    cfg = ControlFlowGraph(build_representation(NESTED))
+    loops = find_loops(cfg)
+
+    assert [loop.header for loop in loops] == [3, 1]
+    assert loops[0].blocks < loops[1].blocks
+    assert loops[0].latches == [4]
+    assert loops[1].get_entries(cfg) == [0]
+
+
+@pytest.mark.opt
+def test_preheaders_merge_the_values_loops_are_entered_with(build_representation):
+    code = "i = 0\nif i < 2:\n    i = 1\nwhile i < 3:\n    i += 1\n"
+    ssa = SSAConstruction()(build_representation(code))
+    loops = find_loops(ssa.cfg)
+    entries = loops[0].get_entries(ssa.cfg)
+    preheader = get_preheader(ssa, loops[0], loops)
+
+    assert preheader is not None
+    assert sorted(preheader.predecessors) == sorted(entries)
+    assert loops[0].get_entries(ssa.cfg) == [preheader.block_id]
+    assert [str(command) for command in preheader.commands] == [
+        f"i.5 = PHI [{entries[0]}: i.1, {entries[1]}: i.2]"
+    ]
+    assert SSAVerifier()(ssa) == []
+
+
+@pytest.mark.opt
+def test_invariant_operations_leave_every_loop_they_do_not_depend_on(run_ssa_pass):
+    commands, hoisted_count = run_ssa_pass(NESTED, LoopInvariantCodeMotion())
+
+    assert hoisted_count == 4
+    outer = commands.index("CMP i, n")
+    inner = commands.index("CMP j, m")
+    assert commands.index(".mul1 = MUL n, m") < outer
+    assert outer < commands.index(".mul2 = MUL i, 4") < inner
+    assert outer < commands.index(".sum1 = SUM .mul1, .mul2") < inner
+    assert "r10 = SUM .sum1, j" in commands[inner:]
+
+
+@pytest.mark.opt
+def test_divisions_and_stores_stay_in_the_loop(run_ssa_pass):
+    code = "d = 0\nx = 9\ni = 0\nwhile i < 3:\n    if d > 0:\n        x = x // d\n    y = 7\n    i += 1\n"
+    commands, hoisted_count = run_ssa_pass(code, LoopInvariantCodeMotion())
+
+    assert hoisted_count == 0
+    assert commands.index("r10 = FLOOR x, d") > commands.index("CMP i, 3")
+    assert commands.index("y = STORE 7") > commands.index("CMP i, 3")
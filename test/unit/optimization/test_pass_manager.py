@@ -0,0 +1,71 @@
+from argparse import ArgumentTypeError
+
+import pytest
+
+from pyro_compiler.cli.args import get_pass_names_type
+from pyro_compiler.compiler.optimization import OptimizationLevel, PassManager
+from pyro_compiler.compiler.optimization.pass_manager import OPTIMIZATION_PIPELINES
+from pyro_compiler.compiler.stats import CompilationStats
+
+
+CODE = "x = 2 * 3\ny = 1\ny = x + 1\ny = x * 2\n"
+
+
+@pytest.mark.opt
+def test_no_passes_leave_the_representation_as_is(build_representation):
+    representation = build_representation(CODE)
+    commands = [str(command) for command in representation.commands]
+    stats = CompilationStats()
+
+    PassManager(passes=list(OPTIMIZATION_PIPELINES[OptimizationLevel.O0]), stats=stats)(
+        representation=representation
+    )
+
+    assert [str(command) for command in representation.commands] == commands
+    assert stats.phases == []
+
+
+@pytest.mark.opt
+def test_passes_run_in_the_given_order(build_representation):
+    representation = build_representation(CODE)
+    stats = CompilationStats()
+
+    PassManager(passes=["dse", "sccp"], stats=stats)(representation=representation)
+
+    assert [phase.name for phase in stats.phases] == ["dse", "ssa", "sccp", "ssa_out"]
+    assert stats.phases[0].items == {"removed": 2}
+    assert [str(command) for command in representation.commands] == [
+        "ESCALATE ",
+        "x = STORE 6",
+        "y = STORE 1",
+        "y = STORE 12",
+        "DEESCALATE ",
+    ]
+
+
+@pytest.mark.opt
+def test_representation_is_dumped_after_the_chosen_passes(build_representation):
+    manager = PassManager(passes=["sccp", "dse"], dump_after=["ir", "dse"])
+
+    manager(representation=build_representation(CODE))
+
+    assert len(manager.dumps) == 2
+    assert manager.dumps[0].startswith("; after ir\n")
+    assert "r8 = MUL 2, 3" in manager.dumps[0]
+    assert manager.dumps[1].startswith("; after dse\n")
+    assert "MUL" not in manager.dumps[1]
+
+
+@pytest.mark.opt
+def test_unknown_passes_are_rejected():
+    with pytest.raises(Exception, match="Unknown passes inline"):
+        PassManager(passes=["sccp", "inline"])
+
+
+@pytest.mark.opt
+def test_unknown_pass_arguments_are_rejected():
+    parse_pass_names = get_pass_names_type(["sccp", "dse"])
+
+    assert parse_pass_names("sccp,,dse") == ["sccp", "dse"]
+    with pytest.raises(ArgumentTypeError, match="unknown passes inline, available: sccp, dse"):
+        parse_pass_names("sccp,inline")
@@ -0,0 +1,66 @@
+import pytest
+
+from pyro_compiler.compiler.optimization.ssa import (
+    SSAConstruction,
+    SSADestruction,
+    SSAVerifier,
+    get_phis,
+)
+from pyro_compiler.compiler.representation.command import CommandType
+
+
+IF_ELSE = "x = 1\ny = 0\nif x > 0:\n    y = 1\nelse:\n    y = 2\nz = y + 1\n"
+WHILE = "i = 0\nk = 5\nwhile i < 3:\n    i += 1\nj = i + k\n"
+OVERLAP = "x = 1\ny = x\nx = 2\nz = x + y\n"
+
+
+@pytest.mark.opt
+def test_phis_are_placed_where_assignments_meet(build_representation):
+    ssa = SSAConstruction()(build_representation(WHILE))
+    header_phis = get_phis(ssa.cfg.get_block(1))
+
+    assert [str(command) for command in header_phis] == ["i.2 = PHI [0: i.1, 2: i.3]"]
+    assert get_phis(ssa.cfg.get_block(3)) == []
+    assert ssa.exit_values["i"].name == "i.2"
+    assert ssa.exit_values["k"].name == "k.1"
+
+
+@pytest.mark.opt
+def test_verifier_accepts_constructed_form_and_reports_reassignments(build_representation):
+    ssa = SSAConstruction()(build_representation(IF_ELSE))
+
+    assert SSAVerifier()(ssa) == []
+    merge_phis = get_phis(ssa.cfg.get_block(3))
+    assert [command.target.name for command in merge_phis] == ["y.4"]  # type: ignore
+
+    first_block = ssa.cfg.get_block(0)
+    first_block.commands.insert(2, first_block.commands[1])
+    assert SSAVerifier()(ssa) == ["x.1 is assigned more than once"]
+
+
+@pytest.mark.opt
+def test_round_trip_keeps_the_representation(build_representation):
+    for code in (IF_ELSE, WHILE):
+        original = build_representation(code)
+        representation = build_representation(code)
+        SSADestruction()(SSAConstruction()(representation))
+
+        assert representation.pprint() == original.pprint()
+        assert str(representation.scopes) == str(original.scopes)
+
+
+@pytest.mark.opt
+def test_versions_alive_at_once_get_different_names(build_representation):
+    representation = build_representation(OVERLAP)
+    ssa = SSAConstruction()(representation)
+    commands = ssa.cfg.entry.commands
+    sum_command = next(command for command in commands if command.operation == CommandType.SUM)
+    # reading the first x where y is read, as copy propagation would
+    sum_command.operand_b = commands[1].target
+    SSADestruction()(ssa)
+    lines = [str(command) for command in representation.commands]
+
+    assert "x.1 = STORE 1" in lines
+    assert "y = STORE x.1" in lines
+    assert "x = STORE 2" in lines
+    assert "r8 = SUM x, x.1" in lines
@@ -0,0 +1,91 @@
+from argparse import ArgumentTypeError
+
+import pytest
+
+from pyro_compiler import Compiler
+from pyro_compiler.cli.utils import positive_int
+from pyro_compiler.compiler.optimization.unrolling import LoopUnrolling
+from pyro_compiler.compiler.representation.representation import Representation
+
+
+def unroll(representation: Representation, **options) -> tuple[list[str], int]:
+    unrolled_count = LoopUnrolling(**options)(representation)
+    return [str(command) for command in representation.commands], unrolled_count
+
+
+@pytest.mark.opt
+def test_loops_with_known_trip_counts_are_unrolled_fully(build_representation):
+    code = "total = 0\ni = 0\nwhile i < 5:\n    total += i * 3\n    i += 1\n"
+    commands, unrolled_count = unroll(build_representation(code))
+
+    assert unrolled_count == 1
+    assert not any(command.startswith(("CMP", "J")) for command in commands)
+    assert commands.count("r9 = MUL i, 3") == 5
+    assert commands.count("i = STORE r8") == 5
+
+
+@pytest.mark.opt
+def test_other_loops_run_copies_of_their_body_before_the_remaining_iterations(build_representation):
+    # the bound is not known without propagating the constants first
+    code = (
+        "n = 10\nif n > 3:\n    n = 20\ntotal = 0\ni = 0\n"
+        "while i < n:\n    total += i\n    i += 2\n"
+    )
+    commands, unrolled_count = unroll(build_representation(code), factor=3)
+
+    assert unrolled_count == 1
+    # three iterations are left as long as the last of them would run
+    assert commands[commands.index("r8 = SUM i, 4") + 1] == "CMP r8, n"
+    assert commands.count("r10 = SUM i, total") == 4
+    assert commands.count("CMP i, n") == 1
+    assert commands[-2] == "JMP main_while_begin_0"
+
+
+@pytest.mark.opt
+def test_the_budget_limits_the_copies(build_representation):
+    code = "n = 9\ntotal = 0\ni = 0\nwhile i < 1000:\n    total += i * n\n    i += 1\n"
+
+    commands, unrolled_count = unroll(build_representation(code), factor=8, budget=24)
+    assert unrolled_count == 1
+    assert commands.count("r9 = MUL i, n") == 4
+
+    commands, unrolled_count = unroll(build_representation(code), factor=8, budget=15)
+    assert unrolled_count == 0
+    assert commands.count("r9 = MUL i, n") == 1
+
+
+@pytest.mark.opt
+def test_unrolling_is_added_to_the_pipeline_by_its_factor():
+    compiler = Compiler(unroll_factor=2, unroll_budget=50)
+    names = [optimization_pass.name for optimization_pass in compiler.pass_manager.passes]
+    unrolling = compiler.pass_manager.passes[names.index("unroll")]
+
+    assert names == ["sccp", "unroll", "dse"]
+    assert (unrolling.factor, unrolling.budget) == (2, 50)  # type: ignore
+    assert "unroll" not in [
+        optimization_pass.name for optimization_pass in Compiler().pass_manager.passes
+    ]
+
+
+@pytest.mark.opt
+def test_a_factor_of_one_only_unrolls_loops_with_known_trip_counts(build_representation):
+    known = "total = 0\ni = 0\nwhile i < 5:\n    total += i\n    i += 1\n"
+    unknown = (
+        "n = 9\nif n > 3:\n    n = 20\ntotal = 0\ni = 0\nwhile i < n:\n    total += i\n    i += 1\n"
+    )
+
+    assert unroll(build_representation(known), factor=1)[1] == 1
+    commands, unrolled_count = unroll(build_representation(unknown), factor=1)
+    assert unrolled_count == 0
+    assert commands.count("CMP i, n") == 1
+    for factor in (0, -3):
+        with pytest.raises(Exception, match="at least 1"):
+            Compiler(unroll_factor=factor)
+
+
+@pytest.mark.opt
+def test_unrolling_arguments_have_to_be_positive():
+    assert positive_int("4") == 4
+    for value in ("0", "-3", "x"):
+        with pytest.raises(ArgumentTypeError):
+            positive_int(value)
@@ -0,0 +1,55 @@
+import pytest
+
+from pyro_compiler.compiler.compiler import Compiler
+from pyro_compiler.compiler.optimization.value_numbering import ValueNumbering
+
+
+@pytest.mark.opt
+def test_repeated_operations_reuse_the_first_result(run_ssa_pass):
+    commands, reused_count = run_ssa_pass(
+        "a = 7\nb = 3\nx = a + b\ny = b + a\nz = x * (a + b)\n", ValueNumbering()
+    )
+
+    assert reused_count == 2
+    assert commands[3:] == [
+        "r8 = SUM a, b",
+        "x = STORE r8",
+        "y = STORE x",
+        "r8 = MUL x, x",
+        "z = STORE r8",
+        "DEESCALATE ",
+    ]
+
+
+@pytest.mark.opt
+def test_overwritten_registers_are_kept_in_a_variable(run_ssa_pass):
+    code = "a = 7\nb = 3\nx = a * b + 1\ny = a * b - 1\n"
+    commands, reused_count = run_ssa_pass(code, ValueNumbering())
+
+    assert reused_count == 1
+    assert ".mul1 = MUL a, b" in commands
+    assert "r8 = SUB .mul1, 1" in commands
+    assert sum(command.startswith("r8 = MUL") for command in commands) == 0
+
+
+@pytest.mark.opt
+def test_values_are_only_reused_in_dominated_blocks(run_ssa_pass):
+    code = "a = 7\nb = 0\nif a > 3:\n    b = a * a\nelse:\n    b = a + 1\nc = a * a\nd = a + 1\n"
+    commands, reused_count = run_ssa_pass(code, ValueNumbering())
+
+    assert reused_count == 0
+    assert sum(" = MUL a, a" in command for command in commands) == 2
+
+
+@pytest.mark.opt
+def test_floor_and_remain_share_a_division(run_ssa_pass):
+    code = "pov = 10\nval = pov % 2\nhalf = 0\nif val == 0:\n    half = pov // 2\n"
+    commands, reused_count = run_ssa_pass(code, ValueNumbering())
+
+    assert reused_count == 1
+    division = commands.index("r8 = REMAIN pov, 2")
+    assert commands[division + 1] == ".floor1 = FLOOR pov, 2"
+    assert "half = STORE .floor1" in commands
+
+    asm = Compiler(passes=["gvn"])(code=code)
+    assert asm.count("div ") == 1
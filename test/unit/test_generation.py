@@ -14,7 +14,7 @@ def test_new_gen(snapshot):
 @pytest.mark.gen
 def test_new_gen_math(snapshot):
     code = """x = 1 + 2"""
-    compiler = Compiler()
+    compiler = Compiler(constant_propagation=False)
     asm = compiler(code=code)
     snapshot.assert_match(asm, "simple_asm_new_gen_math")
 
@@ -22,7 +22,7 @@ def test_new_gen_math(snapshot):
 @pytest.mark.gen
 def test_new_gen_precedence(snapshot):
     code = """x = 1 + 2 * 3 - 4 * 5"""
-    compiler = Compiler()
+    compiler = Compiler(constant_propagation=False)
     asm = compiler(code=code)
     snapshot.assert_match(asm, "simple_asm_new_gen_precedence")
 
@@ -30,7 +30,7 @@ def test_new_gen_precedence(snapshot):
 @pytest.mark.gen
 def test_new_gen_var_usage(snapshot):
     code = "x, y = 34 + 35, x + 5 * 7 * 10 + 1"
-    compiler = Compiler()
+    compiler = Compiler(constant_propagation=False)
     asm = compiler(code=code)
     snapshot.assert_match(asm, "simple_asm_new_gen_var_usage")
 
@@ -46,7 +46,7 @@ def test_new_gen_var_reassignment(snapshot):
 @pytest.mark.gen
 def test_new_bitwise_ops_generation(snapshot):
     code = "x = 5 * 6 - 1 & 2 | 3 + 4 ^ 2 / ~ 1"
-    compiler = Compiler()
+    compiler = Compiler(constant_propagation=False)
     asm = compiler(code=code)
     snapshot.assert_match(asm, "simple_asm_new_gen_var_bitwise_ops")
 
@@ -71,6 +71,6 @@ def test_generate_asm_with_logical_instructions(snapshot):
         "if comp3:\n"
         "    a -= 1\n"
     )
-    compiler = Compiler()
+    compiler = Compiler(constant_propagation=False)
     asm = compiler(code=code)
     snapshot.assert_match(asm, "simple_asm_new_gen_logical_instructions")
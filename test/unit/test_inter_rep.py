@@ -1,6 +1,6 @@
 import pytest
 
-from pyro_compiler.compiler.parsing import Parser
+from pyro_compiler.compiler.parsing import NodeArena, Parser
 from pyro_compiler.compiler.representation import IRBuilder
 from pyro_compiler.compiler.tokens import Tokenizer
 
@@ -195,3 +195,39 @@ def test_while_statement_inter_rep(snapshot):
     rep = int_rep(ast=node)
     snapshot.assert_match(rep.pprint(), "while_statement_inter_rep")
     snapshot.assert_match(rep.pprint_vars(), "while_statement_vardump")
+
+
+@pytest.mark.int_rep
+def test_int_rep_from_node_arena():
+    code = "x = 1\n" "while x < 10:\n" "    if x == 4:\n" "        break\n" "    x += 1\n"
+    node = Parser()(tokens=Tokenizer()(code=code))
+
+    rep_from_arena = IRBuilder()(ast=NodeArena(node))
+
+    assert rep_from_arena.pprint() == IRBuilder()(ast=node).pprint()
+
+
+@pytest.mark.int_rep
+def test_int_rep_iteration_is_repeatable():
+    code = "x = 1\n" "while x < 10:\n" "    if x == 4:\n" "        break\n" "    x += 1\n"
+    rep = IRBuilder()(ast=Parser()(tokens=Tokenizer()(code=code)))
+    label_count = len(rep.labels)
+
+    first_walk = [(str(command), scope.scope_name, str(label)) for command, scope, label in rep]
+    second_walk = [(str(command), scope.scope_name, str(label)) for command, scope, label in rep]
+
+    assert first_walk == second_walk
+    assert rep.pprint() == rep.pprint()
+    assert len(rep.labels) == label_count
+    assert rep.get_trailing_labels() == []
+    assert [label for _, _, label in first_walk if label != "None"] == [
+        "main_while_begin_0:",
+        "main_if_end_1:",
+        "main_while_end_0:",
+    ]
+    assert first_walk[-1][1] == "scope_main_0"
+    assert {scope for _, scope, _ in first_walk} == {
+        "scope_main_0",
+        "scope_while_1",
+        "scope_if_2",
+    }
@@ -1,7 +1,7 @@
 import pytest
 
-from pyro_compiler.compiler.parsing import Parser
-from pyro_compiler.compiler.tokens import Token, Tokenizer, TokenType
+from pyro_compiler.compiler.parsing import NodeArena, NodeType, Parser
+from pyro_compiler.compiler.tokens import Token, Tokenizer, TokenStore, TokenType
 
 
 @pytest.mark.parser
@@ -349,3 +349,117 @@ def test_parse_while_statement(snapshot):
     core_node = parser(tokens=tokens)
 
     snapshot.assert_match(core_node.pprint(), "parse_while_statement")
+
+
+@pytest.mark.parser
+def test_parse_token_stream():
+    code = (
+        "x = 0\n"
+        "y = 10\n"
+        "while x < y:\n"
+        "    if x == 0:\n"
+        "        x += 1\n"
+        "        continue\n"
+        "    x *= 2\n"
+    )
+    expected = Parser()(tokens=Tokenizer()(code=code)).pprint()
+
+    max_lookahead = 0
+
+    def track_lookahead(tokens):
+        nonlocal max_lookahead
+        for token in tokens:
+            max_lookahead = max(max_lookahead, len(parser.tokens.lookahead))
+            yield token
+
+    parser = Parser()
+    core_node = parser(tokens=track_lookahead(Tokenizer().tokenize(code=code)))
+
+    assert core_node.pprint() == expected
+    assert max_lookahead <= 3
+
+
+@pytest.mark.parser
+def test_parse_token_store():
+    code = (
+        "x = 0\n"
+        "y = 10\n"
+        "while x < y:\n"
+        "    if x == 0:\n"
+        "        x += 1\n"
+        "        continue\n"
+        "    x *= 2\n"
+    )
+    expected = Parser()(tokens=Tokenizer()(code=code)).pprint()
+
+    core_node = Parser()(tokens=TokenStore(Tokenizer().tokenize(code=code)))
+
+    assert core_node.pprint() == expected
+
+
+@pytest.mark.parser
+def test_parse_keeps_token_list():
+    code = "x = 1\n" "while x < 10:\n" "    x *= 2\n"
+    tokens = Tokenizer()(code=code)
+    token_reprs = [str(token) for token in tokens]
+
+    parser = Parser()
+    parser(tokens=tokens)
+
+    assert [str(token) for token in tokens] == token_reprs
+    assert parser.tokens.is_exhausted()
+
+
+@pytest.mark.parser
+def test_parse_deeply_nested_scopes():
+    depth = 50
+    code = "".join(f"{' ' * 4 * level}while x:\n" for level in range(depth))
+    code += " " * 4 * depth + "x = 0\n" + "y = 1\n"
+    core_node = Parser()(tokens=Tokenizer()(code=code))
+
+    scope = core_node.children[0]
+    assert [node.node_type for node in scope.children] == [NodeType.NODE_WHILE, NodeType.NODE_STMT]
+    for _ in range(depth):
+        assert scope.children[0].node_type == NodeType.NODE_WHILE
+        scope = scope.children[0].children[-1]
+    assert scope.children[0].node_type == NodeType.NODE_STMT
+
+
+@pytest.mark.parser
+def test_parse_long_expressions():
+    terms = 5000
+    code = "x = " + " + ".join(str(term) for term in range(terms)) + "\n"
+    code += "y = " + "(" * terms + "x" + ")" * terms + "\n"
+    core_node = Parser()(tokens=Tokenizer()(code=code))
+
+    sum_stmt, parens_stmt = core_node.children[0].children
+    node = sum_stmt.children[1]
+    depth = 0
+    while node.node_type == NodeType.NODE_BIN_EXPR:
+        assert node.children[2].value == str(terms - 1 - depth)
+        node = node.children[0]
+        depth += 1
+    assert depth == terms - 1
+    assert node.value == "0"
+    assert parens_stmt.children[1].node_type == NodeType.NODE_TERM
+
+
+@pytest.mark.parser
+def test_node_arena():
+    code = "x = 1\n" "while x < 10:\n" "    x *= 2 + x\n" "y = x\n"
+    core_node = Parser()(tokens=Tokenizer()(code=code))
+    arena = NodeArena(core_node)
+
+    assert arena.node_type(0) == NodeType.NODE_PROG
+    scope_id = arena.children(0)[0]
+    assert [arena.node_type(node_id) for node_id in arena.children(scope_id)] == [
+        NodeType.NODE_STMT,
+        NodeType.NODE_WHILE,
+        NodeType.NODE_STMT,
+    ]
+    rebuilt = arena.to_node()
+    assert rebuilt.pprint() == core_node.pprint()
+    condition = rebuilt.children[0].children[1].children[0]
+    assert str(condition.children[0].token) == str(
+        core_node.children[0].children[1].children[0].children[0].token
+    )
@@ -1,6 +1,7 @@
 import pytest
 
-from pyro_compiler.compiler.tokens import Tokenizer, TokenType
+from pyro_compiler.compiler.errors.message_registry import MessageRegistry
+from pyro_compiler.compiler.tokens import Tokenizer, TokenStore, TokenType
 
 
 @pytest.mark.tokenizer
@@ -142,3 +143,59 @@ def test_tokenize_while_statement(snapshot):
     tokenizer = Tokenizer()
     tokenizer(code=code)
     snapshot.assert_match(tokenizer.pprint(), "tokenize_while_statement")
+
+
+@pytest.mark.tokenizer
+def test_tokenize_lazily():
+    code = "x = 1\n" "while x < 10:\n" "    x *= 2\n"
+    tokens = Tokenizer().tokenize(code=code)
+
+    first_token = next(tokens)
+    assert first_token.token_type == TokenType.IDENT
+    assert [str(token) for token in [first_token, *tokens]] == [
+        str(token) for token in Tokenizer()(code=code)
+    ]
+
+
+@pytest.mark.tokenizer
+def test_token_store():
+    code = "x = 1\n" "while x < 10:\n" "    x *= 2\n" "y = x\n"
+    tokens = Tokenizer()(code=code)
+    store = TokenStore(tokens)
+
+    assert len(store) == len(tokens)
+    assert [str(token) for token in store] == [str(token) for token in tokens]
+    assert [store.token_type(index) for index in range(len(store))] == [
+        token.token_type for token in tokens
+    ]
+    assert store.content_table == [None, "x", "1", "10", "    ", "2", "y"]
+    assert str(store[-1]) == str(tokens[-1])
+
+
+@pytest.mark.tokenizer
+def test_tokenize_indent_dedent():
+    code = "while x:\n" "    if x:\n" "        x = 1\n" "\n" "    \n" "y = 2\n"
+    tokens = Tokenizer()(code=code)
+    indentation = [
+        token.token_type
+        for token in tokens
+        if token.token_type in (TokenType.INDENT, TokenType.DEDENT)
+    ]
+
+    assert indentation == [
+        TokenType.INDENT,
+        TokenType.INDENT,
+        TokenType.DEDENT,
+        TokenType.DEDENT,
+    ]
+    assert [token.line for token in tokens if token.token_type == TokenType.DEDENT] == [6, 6]
+
+
+@pytest.mark.tokenizer
+def test_tokenize_mismatching_dedent():
+    code = "while x:\n" "        x = 1\n" "    y = 2\n"
+    registry = MessageRegistry(code=code)
+    Tokenizer(message_registry=registry)(code=code)
+
+    assert registry.is_blocking_compilation
+    assert "must be 0 spaces, but got 4" in registry.display_messages()
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from pyro_compiler.compiler.compiler import Compiler
+from pyro_compiler.compiler.errors.message_registry import MessageRegistry
+from pyro_compiler.compiler.tokens import LexerMode, RegexTokenizer, Tokenizer
+
+
+PYTHON_FILES = sorted((Path(__file__).parents[2] / "code_tests" / "python_files").glob("*.py"))
+
+
+def tokenize(tokenizer_class: type[Tokenizer], code: str) -> tuple[str, str]:
+    registry = MessageRegistry(code=code)
+    tokenizer = tokenizer_class(message_registry=registry)
+    tokenizer(code=code)
+    return tokenizer.pprint(), registry.display_messages()
+
+
+@pytest.mark.tokenizer
+@pytest.mark.parametrize("path", PYTHON_FILES, ids=lambda path: path.stem)
+def test_regex_tokenizer_parity_on_code_tests(path: Path):
+    code = path.read_text()
+    assert tokenize(RegexTokenizer, code) == tokenize(Tokenizer, code)
+
+
+@pytest.mark.tokenizer
+@pytest.mark.parametrize(
+    "code",
+    [
+        "a **= b //= c <<= d >>= e ** f // g << h >> i == j != k <= l >= m\n",
+        "a += b -= c *= d /= e %= f &= g |= h ^= i = j + k - l * m / n % o\n",
+        "x = ~a & b | c ^ d < e > f, (g)\n",
+        "if a and b or not c:\n    while d:\n        break\n    continue\nelif x:\n    y = 1\n",
+        "   x = 1\n\n\t y = 2  \n        z = 3\n",
+        "1x = 1\n" "2x ! 2\n",
+        "x !",
+    ],
+)
+def test_regex_tokenizer_parity_on_snippets(code: str):
+    assert tokenize(RegexTokenizer, code) == tokenize(Tokenizer, code)
+
+
+@pytest.mark.tokenizer
+def test_regex_tokenizer_reports_unknown_characters():
+    code = "x = 1 $ 2\n"
+    registry = MessageRegistry(code=code)
+    tokens = RegexTokenizer(message_registry=registry)(code=code)
+
+    assert registry.is_blocking_compilation
+    assert [token.content for token in tokens if token.content is not None] == ["x", "1", "2"]
+
+
+@pytest.mark.tokenizer
+@pytest.mark.parametrize("path", PYTHON_FILES, ids=lambda path: path.stem)
+def test_compiler_lexer_modes_produce_same_asm(path: Path):
+    code = path.read_text()
+    regex_asm = Compiler(lexer=LexerMode.REGEX)(code=code)
+    assert regex_asm == Compiler(lexer=LexerMode.HANDWRITTEN)(code=code)